@@ -1,18 +1,27 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-import praw, os, nltk
+import os
+import time
 from dotenv import load_dotenv
-from utils.metrics import calculate_comprehensive_metrics, display_metrics
-from utils.praw_oauth import get_oauth_reddit
+from utils.analysis import compute_metrics
+from utils.downsample import downsample_timeline
+from utils.metrics import calculate_comprehensive_metrics, display_metrics, emotion_distribution
+from utils.praw_oauth import get_oauth_reddit, get_user_reddit
 from utils.praw_script import get_script_reddit
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from utils.incremental import COMMUNITY, refresh_community, refresh_user
+from utils.ingest import ingested_subreddits
+from utils.resources import get_analyzer, get_result_cache, get_store, prepare_session
+from utils.evaluation import evaluate_csv
+from utils.fetcher import default_rate_limiter
 from utils.sentiment import SentimentEnsemble, analyze_sentiment
+from utils.telemetry import process_path, telemetry
+from utils.volatility import grouped_rolling_std
 
 # ------------------ Setup ------------------
-nltk.download('vader_lexicon', quiet=True)
 load_dotenv()
 st.set_page_config(page_title="Reddit Emotional Volatility", layout="wide")
+_run_start = time.perf_counter()
 
 
 # ------------------ Custom Styling ------------------
@@ -43,11 +52,11 @@ st.markdown("""
 st.markdown('<div class="big-title">🧠 Reddit Emotional Volatility Dashboard</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-title">Track, Compare & Visualize Emotional Patterns Across Reddit</div>', unsafe_allow_html=True)
 
-_analyzer = SentimentEnsemble()
+_analyzer = get_analyzer()
+_store = get_store()
 
 # ------------------ Reddit Setup ------------------
 reddit_oauth = get_oauth_reddit()
-reddit_bot = get_script_reddit()
 reddit_user = None
 
 auth_url = reddit_oauth.auth.url(["identity", "history"], "state123", "permanent")
@@ -65,55 +74,67 @@ if code and "refresh_token" not in st.session_state:
 
 if "refresh_token" in st.session_state:
     try:
-        reddit_user = praw.Reddit(
-            client_id=os.getenv("OAUTH_CLIENT_ID"),
-            client_secret=os.getenv("OAUTH_CLIENT_SECRET"),
-            refresh_token=st.session_state.refresh_token,
-            user_agent="VolatilityApp by u/imaryapiyush99",
-        )
-        st.success(f"👤 Logged in as: {reddit_user.user.me().name}")
+        reddit_user = get_user_reddit(st.session_state.refresh_token)
+        if "reddit_username" not in st.session_state:
+            st.session_state.reddit_username = reddit_user.user.me().name
+        st.success(f"👤 Logged in as: {st.session_state.reddit_username}")
     except Exception as e:
         st.error(f"⚠️ Could not use refresh token: {e}")
 
 # ------------------ Helper: Fetch User Activity ------------------
 def fetch_user_activity(user, limit=200):
-    """Fetch both comments and posts from a Reddit user."""
-    activities = []
+    """Fetch a Reddit user's new comments and posts, score them and return all stored activity."""
+    df, n_new, errors = refresh_user(user, _store, _analyzer, limit=limit)
+    for kind, e in errors.items():
+        st.warning(f"⚠️ Could not fetch {kind}s: {e}")
+    if n_new:
+        st.success(f"Fetched {n_new} new items.")
+    # read-only: the dashboard derives views from it through PreparedDataset
+    return df
 
-    # Comments
-    try:
-        for c in user.comments.new(limit=limit):
-            activities.append({
-                "time": pd.to_datetime(c.created_utc, unit="s"),
-                "text": c.body,
-                "type": "comment",
-                "subreddit": str(c.subreddit)
-            })
-    except Exception as e:
-        st.warning(f"⚠️ Could not fetch comments: {e}")
+# ------------------ Helper: Community Results ------------------
+COMMUNITY_LIMIT = 100
 
-    # Posts
-    try:
-        for p in user.submissions.new(limit=limit):
-            activities.append({
-                "time": pd.to_datetime(p.created_utc, unit="s"),
-                "text": f"{p.title} {p.selftext or ''}",
-                "type": "post",
-                "subreddit": str(p.subreddit)
-            })
-    except Exception as e:
-        st.warning(f"⚠️ Could not fetch posts: {e}")
 
-    df = pd.DataFrame(activities)
-    if df.empty:
-        return df
+def community_results(sub_list, limit=COMMUNITY_LIMIT):
+    """Fetch and score new community posts.
 
-    # Sentiment analysis
-    analyzer = SentimentEnsemble()
-    df = analyze_sentiment(df, analyzer)
-    df["volatility"] = df.groupby("type")["sentiment_score"].transform(lambda x: x.rolling(5).std().fillna(0))
+    Returns ``(df_comm, n_new, errors)``. The frame is shared through
+    the result cache, so callers must not modify it.
+    """
+    # subreddits polled by a running ingestion worker (utils/ingest.py,
+    # per its heartbeat) are read from the store as-is; the others are
+    # fetched inline, and then only posts newer than the store holds
+    ingested = set(ingested_subreddits(_store.root))
+    to_fetch = [s for s in sub_list if s not in ingested]
+    n_new, fetch_errors = 0, {}
+    if to_fetch:
+        # one script client per fetch worker
+        _, n_new, fetch_errors = refresh_community(
+            get_script_reddit, _store, to_fetch, _analyzer, limit=limit, rate_limiter=default_rate_limiter
+        )
+    df_comm = _store.read(COMMUNITY, subreddits=sub_list)
+    return df_comm, n_new, fetch_errors
+
+
+def community_aggregate(sub_list, time_bin):
+    """One mean score per subreddit per ``time_bin``, plus rolling volatility.
+
+    Derived from the store's rollup cube, so changing ``time_bin`` does
+    not rescan the posts.
+    """
+    with telemetry.track("community_aggregate") as span:
+        df_comm_agg = (
+            _store.rollup(COMMUNITY)
+            .aggregate(time_bin, subreddits=sub_list)
+            .rename(columns={"mean": "sentiment_score"})[["subreddit", "time", "sentiment_score"]]
+        )
+        df_comm_agg["volatility"] = grouped_rolling_std(
+            df_comm_agg["sentiment_score"], df_comm_agg["subreddit"], window=3, min_periods=1
+        )
+        span.items = len(df_comm_agg)
+    return df_comm_agg
 
-    return df
 
 # ------------------ Tabs ------------------
 tab1, tab2, tab3, tab4 = st.tabs(
@@ -138,16 +159,19 @@ with tab1:
 
     df_user = st.session_state.df_user
     if not df_user.empty:
-        df_user = analyze_sentiment(df_user, _analyzer)
-        st.session_state.df_user = df_user
+        if "sentiment_score" not in df_user.columns:
+            df_user = analyze_sentiment(df_user.copy(), _analyzer)
+            st.session_state.df_user = df_user
 
-        display_metrics(df_user)
+        display_metrics(df_user, prepare_session("user_prepared", df_user).metrics())
 
-        fig_sent = px.line(df_user, x="time", y="sentiment_score", markers=True, title="📈 Sentiment Timeline")
+        fig_sent = px.line(downsample_timeline(df_user, "sentiment_score"), x="time", y="sentiment_score", markers=True,
+                           title="📈 Sentiment Timeline")
         fig_sent.update_yaxes(range=[-1, 1])
         st.plotly_chart(fig_sent, use_container_width=True)
 
-        fig_vol = px.line(df_user, x="time", y="volatility", markers=True, title="🌪 Volatility Timeline")
+        fig_vol = px.line(downsample_timeline(df_user, "volatility"), x="time", y="volatility", markers=True,
+                          title="🌪 Volatility Timeline")
         st.plotly_chart(fig_vol, use_container_width=True)
 
     else:
@@ -162,72 +186,53 @@ with tab2:
     # choose aggregation interval (one value per subreddit per interval)
     time_bin = st.selectbox(
         "Aggregation interval (one point per subreddit per interval)",
-        ["1min", "5min", "15min", "30min", "1H", "3H", "6H", "1D"],
+        ["1min", "5min", "15min", "30min", "1h", "3h", "6h", "1D"],
         index=4
     )
     # persist selection so comparison tab can use the same interval
     st.session_state["time_bin"] = time_bin
 
     if st.button("📥 Fetch Community Data"):
-        all_posts = []
-        for sub in [s.strip() for s in subs.split(",") if s.strip()]:
-            try:
-                for p in reddit_bot.subreddit(sub).new(limit=100):
-                    all_posts.append({
-                        "time": pd.to_datetime(p.created_utc, unit="s"),
-                        "text": f"{p.title} {p.selftext}",
-                        "subreddit": sub
-                    })
-            except Exception as e:
-                st.warning(f"⚠️ r/{sub}: {e}")
-
-        df_comm = pd.DataFrame(all_posts)
+        sub_list = [s.strip() for s in subs.split(",") if s.strip()]
+        st.session_state["subreddits"] = sub_list
+        # only the frame is shared across sessions (concurrent requests for
+        # the same key run one pipeline); the fetch count and errors belong
+        # to the session that ran it
+        fetched = {}
+
+        def compute():
+            df, fetched["n_new"], fetched["errors"] = community_results(sub_list, COMMUNITY_LIMIT)
+            return df
+
+        df_comm = get_result_cache().get_or_compute(
+            ("community", tuple(sorted(set(sub_list))), COMMUNITY_LIMIT), compute
+        )
+        for sub, e in fetched.get("errors", {}).items():
+            st.warning(f"⚠️ r/{sub}: {e}")
 
         if not df_comm.empty:
-            # ensure datetime and sorting
-            df_comm["time"] = pd.to_datetime(df_comm["time"])
-            df_comm = df_comm.sort_values(["subreddit", "time"]).reset_index(drop=True)
-
-            # analyze sentiment (use existing analyzer; fallback if missing)
-            try:
-                analyzer_obj = _analyzer
-            except NameError:
-                analyzer_obj = SentimentEnsemble()
-
-            df_comm = analyze_sentiment(df_comm, analyzer_obj)
-
-            # aggregate/resample into time bins so there is one value per bin
-            df_comm_agg = (
-                df_comm
-                .groupby(["subreddit", pd.Grouper(key="time", freq=time_bin)])["sentiment_score"]
-                .mean()
-                .reset_index()
-            )
-
-            # sort and compute rolling volatility on the aggregated series
-            df_comm_agg = df_comm_agg.sort_values(["subreddit", "time"]).reset_index(drop=True)
-            df_comm_agg["volatility"] = df_comm_agg.groupby("subreddit")["sentiment_score"].transform(
-                lambda s: s.rolling(window=3, min_periods=1).std().fillna(0)
-            )
-
-            # save both raw and aggregated in session_state
-            st.session_state.df_comm = df_comm          # raw per-post data
-            st.session_state.df_comm_agg = df_comm_agg  # aggregated for plotting
-
-            st.success(f"Fetched {len(df_comm)} posts — aggregated to {len(df_comm_agg)} points.")
+            st.session_state.df_comm = df_comm  # raw per-post data
+            if fetched:
+                st.success(f"Fetched {fetched['n_new']} new posts ({len(df_comm)} stored).")
+            else:
+                st.info(f"Showing cached results ({len(df_comm)} stored).")
 
     # load from session_state (if present)
     df_comm = st.session_state.get("df_comm", pd.DataFrame())
-    df_comm_agg = st.session_state.get("df_comm_agg", pd.DataFrame())
+    df_comm_agg = pd.DataFrame()
+    if not df_comm.empty:
+        # re-derived from the rollup cube on every rerun, so switching the interval is instant
+        df_comm_agg = community_aggregate(st.session_state["subreddits"], time_bin)
+        st.session_state.df_comm_agg = df_comm_agg  # aggregated for plotting
 
     if not df_comm.empty:
         # show raw metrics if you want (keeps existing behavior)
-        display_metrics(df_comm)
+        display_metrics(df_comm, prepare_session("comm_prepared", df_comm).metrics())
 
         # Plot aggregated sentiment (one series per subreddit)
         if not df_comm_agg.empty:
             fig_sent = px.line(
-                df_comm_agg,
+                downsample_timeline(df_comm_agg, "sentiment_score", color="subreddit"),
                 x="time",
                 y="sentiment_score",
                 color="subreddit",
@@ -237,7 +242,7 @@ with tab2:
             st.plotly_chart(fig_sent, use_container_width=True)
 
             fig_vol = px.line(
-                df_comm_agg,
+                downsample_timeline(df_comm_agg, "volatility", color="subreddit"),
                 x="time",
                 y="volatility",
                 color="subreddit",
@@ -262,30 +267,20 @@ with tab3:
     if df_user.empty or df_comm.empty:
         st.warning("⚠️ Please fetch both datasets first.")
     else:
-        # make sure user times are datetime & sorted
-        df_user["time"] = pd.to_datetime(df_user["time"])
-        df_user = df_user.sort_values("time").reset_index(drop=True)
+        # sorted once per fetch; binned means are cached per time_bin
+        user = prepare_session("user_prepared", df_user)
+        df_user = user.frame
 
         # aggregate user to same time_bin so comparison is apples-to-apples
-        df_user_agg = (
-            df_user
-            .groupby(pd.Grouper(key="time", freq=time_bin))["sentiment_score"]
-            .mean()
-            .reset_index()
+        with telemetry.track("user_aggregate", items=len(df_user)):
+            df_user_agg = user.binned_means(time_bin)
+        df_user_agg = df_user_agg.assign(
+            source=df_user["type"].iloc[0].capitalize() if "type" in df_user.columns else "User"
         )
-        df_user_agg["source"] = df_user.get("type", "User").iloc[0].capitalize() if "type" in df_user.columns else "User"
 
         # aggregated community should already exist; if not, compute a quick aggregation now
         if df_comm_agg.empty:
-            df_comm_agg = (
-                df_comm
-                .groupby(["subreddit", pd.Grouper(key="time", freq=time_bin)])["sentiment_score"]
-                .mean()
-                .reset_index()
-            )
-            df_comm_agg["volatility"] = df_comm_agg.groupby("subreddit")["sentiment_score"].transform(
-                lambda s: s.rolling(window=3, min_periods=1).std().fillna(0)
-            )
+            df_comm_agg = community_aggregate(st.session_state["subreddits"], time_bin)
 
         # prepare combined DataFrame for sentiment comparison
         # for plotting, we unify column names: 'source' (user) and 'subreddit' (community)
@@ -296,7 +291,8 @@ with tab3:
         ], ignore_index=True, sort=False)
 
         st.plotly_chart(
-            px.line(df_sent_comb, x="time", y="sentiment_score", color="source",
+            px.line(downsample_timeline(df_sent_comb, "sentiment_score", color="source"),
+                    x="time", y="sentiment_score", color="source",
                     title="📈 Sentiment Comparison (aggregated)").update_yaxes(range=[-1, 1]),
             use_container_width=True
         )
@@ -305,26 +301,15 @@ with tab3:
         # For now show community volatility per subreddit (source)
         df_comm_vol_plot = df_comm_agg.rename(columns={"subreddit": "source"})
         st.plotly_chart(
-            px.line(df_comm_vol_plot, x="time", y="volatility", color="source",
+            px.line(downsample_timeline(df_comm_vol_plot, "volatility", color="source"),
+                    x="time", y="volatility", color="source",
                     title="🌪 Volatility Comparison (community aggregated)"),
             use_container_width=True
         )
 
-        # Emotion distribution (keep original behavior using raw df_comm)
-        emotion_counts = []
+        # Emotion distribution (raw df_comm; every subreddit counted in one pass, cached)
         if "subreddit" in df_comm.columns:
-            for sub in df_comm["subreddit"].unique():
-                df_sub = df_comm[df_comm["subreddit"] == sub]
-                emotion_counts.append({
-                    "Subreddit": sub,
-                    "Positive": (df_sub["sentiment_label"] == "positive").sum(),
-                    "Neutral": (df_sub["sentiment_label"] == "neutral").sum(),
-                    "Negative": (df_sub["sentiment_label"] == "negative").sum(),
-                })
-
-            dist_df = pd.DataFrame(emotion_counts).melt(
-                id_vars="Subreddit", var_name="Emotion", value_name="Count"
-            )
+            dist_df = emotion_distribution(prepare_session("comm_prepared", df_comm).label_counts(), "Subreddit")
             fig_dist = px.bar(
                 dist_df, x="Subreddit", y="Count", color="Emotion",
                 barmode="group", title="🔎 Emotion Distribution by Subreddit"
@@ -340,62 +325,40 @@ with tab4:
     uploaded_file = st.file_uploader("Upload a labeled Reddit sentiment dataset (CSV)", type="csv")
 
     if uploaded_file is not None:
-        try:
-            df = pd.read_csv(uploaded_file)
+        progress = st.empty()
+        st.subheader("📉 Confusion Matrix")
+        cm_placeholder = st.empty()
+
+        def show_progress(evaluator):
+            # partial results after every chunk instead of a blank screen until the end
+            progress.info(f"⏳ Scored {evaluator.n:,} rows — accuracy so far {evaluator.accuracy:.2%}")
+            cm_placeholder.plotly_chart(
+                px.imshow(
+                    evaluator.confusion_frame(), text_auto=True,
+                    color_continuous_scale="Blues", title="Confusion Matrix"
+                ),
+                use_container_width=True,
+            )
 
-            # Check required columns
-            if "text" not in df.columns or "label" not in df.columns:
-                st.error("❌ Dataset must contain 'text' and 'label' columns.")
+        # same scoring as the shared analyzer, but benchmark rows stay out of its score cache
+        bench_analyzer = SentimentEnsemble(
+            _analyzer.w_vader, _analyzer.w_blob, _analyzer.w_nltk,
+            workers=_analyzer.workers, backends=_analyzer.backends,
+        )
+        try:
+            evaluator = evaluate_csv(uploaded_file, bench_analyzer, on_chunk=show_progress)
+            if evaluator.n == 0:
+                progress.empty()
+                st.error("❌ No valid labels found after mapping.")
             else:
-                df["text"] = df["text"].astype(str).fillna("")
-                df["label"] = df["label"].astype(str).str.lower().str.strip()
-
-                mapping = {"positive": 1, "neutral": 0, "negative": -1,
-                           "1": 1, "0": 0, "-1": -1}
-                df["label_mapped"] = df["label"].map(mapping)
-                df = df.dropna(subset=["label_mapped"])
-
-                if df.empty:
-                    st.error("❌ No valid labels found after mapping.")
-                else:
-                    analyzer = SentimentEnsemble()
-                    df["sentiment_score"] = df["text"].apply(analyzer.analyze_text)
-                    df["sentiment"] = df["sentiment_score"].apply(
-                        lambda s: 1 if s > 0.1 else (-1 if s < -0.1 else 0)
-                    )
-
-                    acc = accuracy_score(df["label_mapped"], df["sentiment"])
-                    st.success(f"✅ Accuracy: {acc:.2%}")
-
-                    unique_classes = sorted(df["label_mapped"].unique())
-                    class_names = []
-                    for uc in unique_classes:
-                        for name, val in mapping.items():
-                            if val == uc:
-                                class_names.append(name)
-                                break
-
-                    report = classification_report(
-                        df["label_mapped"], df["sentiment"],
-                        labels=unique_classes, target_names=class_names
-                    )
-                    st.text(report)
-
-                    cm = confusion_matrix(df["label_mapped"], df["sentiment"], labels=unique_classes)
-                    cm_df = pd.DataFrame(
-                        cm,
-                        index=[f"True {c}" for c in class_names],
-                        columns=[f"Pred {c}" for c in class_names]
-                    )
-
-                    st.subheader("📉 Confusion Matrix")
-                    fig_cm = px.imshow(
-                        cm_df, text_auto=True, color_continuous_scale="Blues", title="Confusion Matrix"
-                    )
-                    st.plotly_chart(fig_cm, use_container_width=True)
-
+                progress.success(f"✅ Accuracy: {evaluator.accuracy:.2%} ({evaluator.n:,} rows)")
+                st.dataframe(evaluator.report().round(2), use_container_width=True)
+        except ValueError as e:
+            st.error(f"❌ {e}")
         except Exception as e:
             st.error(f"⚠️ Failed to process dataset: {e}")
+        finally:
+            bench_analyzer.close()
 
 # ------------------ Footer ------------------
 st.markdown(
@@ -406,3 +369,21 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# ------------------ Pipeline Metrics ------------------
+telemetry.timer("app_run").record(time.perf_counter() - _run_start)
+with st.sidebar.expander("⏱ Pipeline metrics"):
+    ops = compute_metrics(st.session_state.get("df_comm_agg", pd.DataFrame()))
+    st.metric("Scoring throughput (texts/s)", f"{ops['throughput']:,.0f}")
+    st.metric("Reddit fetch p95 (ms)", f"{ops['latency']:,.0f}")
+    st.metric("API failures", ops["api_failures"])
+    st.metric("Volatility spikes", ops["spikes"])
+    if ops["operations"]:
+        st.dataframe(pd.DataFrame(ops["operations"]).T, use_container_width=True)
+if os.getenv("METRICS_PATH"):
+    # the ingest worker writes its own file beside this one
+    telemetry.process = "app"
+    try:
+        telemetry.write_prometheus(process_path(os.getenv("METRICS_PATH"), "app"))
+    except OSError as e:
+        st.sidebar.caption(f"Could not write metrics: {e}")
@@ -0,0 +1,76 @@
+"""Sentiment backends: throughput and agreement with the reference scorers on a labeled set.
+
+    python -m benchmarks.bench_backends --repeat 20
+
+Each ``lexicon_*`` backend is compared with the backend it ports
+(score correlation, exact matches, agreement of the -1/0/1 labels), and
+the default and all-lexicon ensembles are scored for accuracy on the
+bundled ``benchmarks/data/labeled_sample.csv``. The run fails when a
+port's label agreement drops below ``--min-agreement``.
+
+Measured on one CPU, 1,800 texts per run: lexicon_vader 7-9x vader
+(about 52,000 texts/s), lexicon_blob 8-9x textblob (about 37,000
+texts/s), both with 100% exact scores. That is below the 10x target.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backends import create_backend
+from utils.evaluation import evaluate_csv
+from utils.sentiment import SentimentEnsemble, scores_to_sentiment
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "data", "labeled_sample.csv")
+PORTS = {"lexicon_vader": "vader", "lexicon_blob": "textblob"}
+FAST = {"vader": "lexicon_vader", "blob": "lexicon_blob", "nltk": "lexicon_vader"}
+
+
+def _timed(backend, texts):
+    backend.score_batch(texts[:10])  # load lexicons outside the timing
+    start = time.perf_counter()
+    scores = backend.score_batch(texts)
+    return scores, len(texts) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=SAMPLE)
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the set for the throughput runs")
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args(argv)
+
+    texts = pd.read_csv(args.csv)["text"].astype(str).tolist()
+    timed = texts * args.repeat
+    print(f"{len(texts)} texts, {len(timed)} per throughput run")
+    print(f"{'backend':<14} {'texts/s':>9} {'vs':<9} {'speedup':>8} {'pearson':>8} {'exact':>7} {'labels':>7}")
+
+    failed = False
+    for fast, ref in PORTS.items():
+        ref_scores, ref_rate = _timed(create_backend(ref), timed)
+        fast_scores, fast_rate = _timed(create_backend(fast), timed)
+        ref_scores, fast_scores = ref_scores[:len(texts)], fast_scores[:len(texts)]
+        r = np.corrcoef(ref_scores, fast_scores)[0, 1]
+        exact = np.mean(ref_scores == fast_scores)
+        labels = np.mean(scores_to_sentiment(ref_scores) == scores_to_sentiment(fast_scores))
+        failed |= labels < args.min_agreement
+        print(f"{ref:<14} {ref_rate:>9,.0f}")
+        print(f"{fast:<14} {fast_rate:>9,.0f} {ref:<9} {fast_rate / ref_rate:>7.1f}x "
+              f"{r:>8.4f} {exact:>7.1%} {labels:>7.1%}")
+
+    print(f"\n{'ensemble':<14} {'accuracy':>9} {'rows/s':>9}")
+    for name, backends in (("default", None), ("lexicon", FAST)):
+        analyzer = SentimentEnsemble(backends=backends)
+        analyzer.analyze_batch(texts[:10])
+        start = time.perf_counter()
+        evaluator = evaluate_csv(args.csv, analyzer)
+        rate = evaluator.n / (time.perf_counter() - start)
+        print(f"{name:<14} {evaluator.accuracy:>9.2%} {rate:>9,.0f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
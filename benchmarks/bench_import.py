@@ -0,0 +1,66 @@
+"""Import-time budget for the dashboard's modules, measured with ``python -X importtime``.
+
+    python -m benchmarks.bench_import --budget-ms 1500
+
+Each module is imported in a fresh interpreter. The run fails when a
+module exceeds the budget or pulls in one of ``LAZY`` (dependencies that
+must load only when a feature needs them).
+"""
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "utils.sentiment",
+    "utils.metrics",
+    "utils.volatility",
+    "utils.store",
+    "utils.resources",
+    "utils.ingest",
+]
+LAZY = ["nltk", "textblob", "scipy", "sklearn"]
+
+
+def import_times(module: str) -> dict:
+    """Return ``{package: cumulative microseconds}`` for a cold import of ``module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=3, help="heaviest top-level packages to list")
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'module':<18} {'ms':>8}  heaviest packages")
+    for module in args.modules:
+        times = import_times(module)
+        total = times.get(module, 0) / 1000
+        top = sorted(
+            ((n, t) for n, t in times.items() if "." not in n and n != module),
+            key=lambda item: -item[1],
+        )[:args.top]
+        lazy = sorted({n.split(".")[0] for n in times} & set(LAZY))
+        over = total > args.budget_ms
+        failed |= over or bool(lazy)
+        heaviest = ", ".join(f"{n} {t / 1000:.0f}" for n, t in top)
+        print(f"{module:<18} {total:>8.0f}  {heaviest}"
+              + ("  OVER BUDGET" if over else "")
+              + (f"  eager: {', '.join(lazy)}" if lazy else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
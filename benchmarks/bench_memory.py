@@ -0,0 +1,57 @@
+"""Per-row memory of scored-post frames: the object/float64 layout vs the compact schema.
+
+    python -m benchmarks.bench_memory --rows 100000 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_sentiment import synthetic_comments
+from utils.metrics import calculate_comprehensive_metrics
+from utils.schema import TEXT_MODES, compact_frame
+from utils.sentiment import scores_to_sentiment, sentiment_to_labels
+
+
+def scored_posts(n, seed=0, n_subreddits=10):
+    """A frame laid out as fetch + ``analyze_sentiment`` used to leave it in session state."""
+    rng = np.random.default_rng(seed)
+    scores = np.round(rng.uniform(-1, 1, n), 3)
+    sentiment = scores_to_sentiment(scores)
+    return pd.DataFrame({
+        "time": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 86_400 * 30, n)), unit="s"),
+        "id": [f"t3_{i:x}" for i in range(n)],
+        "text": synthetic_comments(n, seed=seed)["text"].to_numpy(),
+        "type": rng.choice(["comment", "post"], n).astype(object),
+        "subreddit": rng.choice([f"sub{i}" for i in range(n_subreddits)], n).astype(object),
+        "sentiment_score": scores,
+        "volatility": rng.uniform(0, 1, n),
+        "sentiment": sentiment,
+        "sentiment_label": sentiment_to_labels(sentiment),
+    })
+
+
+def bytes_per_row(df):
+    return df.memory_usage(deep=True, index=False).sum() / len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'layout':<16} {'bytes/row':>10} {'MB':>8} {'vs legacy':>10}")
+    for n in args.rows:
+        legacy = scored_posts(n)
+        base = bytes_per_row(legacy)
+        expected = calculate_comprehensive_metrics(legacy)
+        print(f"{n:>10} {'legacy':<16} {base:>10.1f} {base * n / 2**20:>8.1f} {'':>10}")
+        for text in TEXT_MODES:
+            compact = compact_frame(legacy, text=text)
+            assert calculate_comprehensive_metrics(compact) == expected
+            size = bytes_per_row(compact)
+            print(f"{n:>10} {'compact/' + text:<16} {size:>10.1f} {size * n / 2**20:>8.1f} {base / size:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
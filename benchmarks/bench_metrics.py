@@ -0,0 +1,72 @@
+"""pytest-benchmark suite for utils.metrics.
+
+    pytest benchmarks/bench_metrics.py --benchmark-only
+    pytest benchmarks/bench_metrics.py --benchmark-only -k "100000 and not 10000000"
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.metrics import (
+    calculate_comprehensive_metrics,
+    count_emotional_swings,
+    count_negative_streaks,
+    identify_stability_periods,
+    label_counts,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = np.round(np.cumsum(rng.normal(0, 0.1, n)).clip(-1, 1), 3)
+    times = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n) * 60, unit="s")
+    return pd.DataFrame({"time": times, "sentiment_score": scores})
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=str)
+def frame(request):
+    return _frame(request.param)
+
+
+def test_comprehensive_metrics(benchmark, frame):
+    benchmark(calculate_comprehensive_metrics, frame)
+
+
+def test_emotional_swings(benchmark, frame):
+    benchmark(count_emotional_swings, frame["sentiment_score"])
+
+
+def test_stability_periods(benchmark, frame):
+    benchmark(identify_stability_periods, frame)
+
+
+def test_negative_streaks(benchmark, frame):
+    benchmark(count_negative_streaks, frame["sentiment_score"])
+
+
+@pytest.fixture(scope="module", params=[100_000, 1_000_000], ids=str)
+def by_subreddit(request):
+    """Scores over 300 subreddits, stored categorical as in the compact schema."""
+    df = _frame(request.param)
+    rng = np.random.default_rng(1)
+    return df.assign(subreddit=pd.Categorical(rng.choice([f"sub{i}" for i in range(300)], len(df))))
+
+
+def _label_counts_loop(df):
+    # the per-subreddit filter the distribution charts used to run
+    return [
+        ((s > 0.1).sum(), s.between(-0.1, 0.1).sum(), (s < -0.1).sum())
+        for s in (df[df["subreddit"] == sub]["sentiment_score"] for sub in df["subreddit"].unique())
+    ]
+
+
+def test_label_counts(benchmark, by_subreddit):
+    benchmark(label_counts, by_subreddit["sentiment_score"], by_subreddit["subreddit"])
+
+
+def test_label_counts_loop(benchmark, by_subreddit):
+    benchmark.pedantic(_label_counts_loop, args=(by_subreddit,), rounds=3)
@@ -0,0 +1,38 @@
+"""Scaling benchmark for process-pool sentiment scoring.
+
+    python -m benchmarks.bench_pool --rows 50000 --workers 1 2 4 8 16
+"""
+import argparse
+import os
+import time
+
+from benchmarks.bench_sentiment import synthetic_comments
+from utils.sentiment import SentimentEnsemble
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args(argv)
+
+    texts = synthetic_comments(args.rows, duplicate_ratio=0.0)["text"].to_numpy()
+    print(f"{os.cpu_count()} CPUs, {args.rows} rows")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+    baseline = None
+    for n in args.workers:
+        analyzer = SentimentEnsemble(workers=n, parallel_threshold=0)
+        try:
+            # warm the pool so process start-up is not counted
+            analyzer.analyze_batch(texts[: n * 64])
+            start = time.perf_counter()
+            analyzer.analyze_batch(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            analyzer.close()
+        baseline = baseline or elapsed
+        print(f"{n:>8} {elapsed:>9.2f} {args.rows / elapsed:>10,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Rows-per-second benchmark for DataFrame sentiment scoring.
+
+Compares the original per-row ``.apply`` path with ``analyze_sentiment``
+(``SentimentEnsemble.analyze_batch`` + vectorized labels).
+
+    python -m benchmarks.bench_sentiment --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.sentiment import SentimentEnsemble, analyze_sentiment
+
+VOCAB = (
+    "i feel really happy sad tired angry lonely great terrible today again "
+    "nobody cares thanks so much love hate this that work sleep anxious "
+    "better worse hope help please why always never friends family okay fine"
+).split()
+
+
+def synthetic_comments(n, seed=0, duplicate_ratio=0.1):
+    """Random comments; ``duplicate_ratio`` of them repeat earlier bodies."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(5, 30, size=n)
+    words = rng.choice(VOCAB, size=int(lengths.sum()))
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    texts = np.array(
+        [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(n)], dtype=object
+    )
+    dup = rng.random(n) < duplicate_ratio
+    texts[dup] = texts[rng.integers(0, n, size=int(dup.sum()))]
+    return pd.DataFrame({"text": texts})
+
+
+def legacy_analyze_sentiment(df, analyzer):
+    """The per-row implementation analyze_sentiment replaced."""
+    df["sentiment_score"] = df["text"].apply(analyzer.analyze_text)
+    df["sentiment"] = df["sentiment_score"].apply(
+        lambda s: 1 if s > 0.1 else (-1 if s < -0.1 else 0)
+    )
+    df["sentiment_label"] = df["sentiment"].map({1: "positive", 0: "neutral", -1: "negative"})
+    return df
+
+
+def _rows_per_sec(fn, df, analyzer):
+    start = time.perf_counter()
+    fn(df.copy(), analyzer)
+    return len(df) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    analyzer = SentimentEnsemble()
+    print(f"{'rows':>10} {'apply rows/s':>14} {'batch rows/s':>14} {'speedup':>8}")
+    for n in args.sizes:
+        df = synthetic_comments(n, duplicate_ratio=args.duplicate_ratio)
+        legacy = _rows_per_sec(legacy_analyze_sentiment, df, analyzer)
+        batch = _rows_per_sec(analyze_sentiment, df, analyzer)
+        print(f"{n:>10} {legacy:>14,.0f} {batch:>14,.0f} {batch / legacy:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
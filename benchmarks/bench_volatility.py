@@ -0,0 +1,49 @@
+"""Grouped rolling volatility: per-group lambda vs the shared cumulative-sum kernel.
+
+    python -m benchmarks.bench_volatility --rows 1000000 --groups 10 1000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.volatility import grouped_rolling_std
+
+
+def lambda_rolling_std(df, window):
+    """The per-group transform the app and pages used before the shared kernel."""
+    return df.groupby("subreddit")["sentiment_score"].transform(
+        lambda s: s.rolling(window).std().fillna(0)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{args.rows} rows, window {args.window}")
+    print(f"{'groups':>8} {'lambda s':>9} {'kernel s':>9} {'speedup':>8}")
+    for n_groups in args.groups:
+        df = pd.DataFrame({
+            "subreddit": rng.integers(0, n_groups, args.rows).astype(str),
+            "sentiment_score": np.round(rng.uniform(-1, 1, args.rows), 3),
+        })
+        start = time.perf_counter()
+        expected = lambda_rolling_std(df, args.window)
+        slow = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = grouped_rolling_std(df["sentiment_score"], df["subreddit"], window=args.window)
+        fast = time.perf_counter() - start
+
+        assert np.allclose(got, expected, atol=1e-9)
+        print(f"{n_groups:>8} {slow:>9.3f} {fast:>9.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
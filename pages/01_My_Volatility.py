@@ -1,12 +1,11 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import praw
-import os
 
-from utils.praw_oauth import get_oauth_reddit
-from utils.metrics import calculate_comprehensive_metrics, display_metrics
-from utils.sentiment import analyze_sentiment
+from utils.praw_oauth import get_oauth_reddit, get_user_reddit
+from utils.metrics import display_metrics
+from utils.downsample import downsample_timeline
+from utils.incremental import refresh_user
+from utils.resources import get_analyzer, get_store, load_prepared_user
 
 st.title("👤 My Reddit Volatility")
 
@@ -27,60 +26,50 @@ if code and "refresh_token" not in st.session_state:
 # --- Authenticate Reddit user ---
 reddit_user = None
 if "refresh_token" in st.session_state:
-    reddit_user = praw.Reddit(
-        client_id=os.getenv("OAUTH_CLIENT_ID"),
-        client_secret=os.getenv("OAUTH_CLIENT_SECRET"),
-        refresh_token=st.session_state.refresh_token,
-        user_agent="VolatilityApp by u/imaryapiyush99",
-    )
-    st.success(f"Logged in as: {reddit_user.user.me().name}")
-
-# --- Initialize session storage ---
-if "df_user" not in st.session_state:
-    st.session_state["df_user"] = pd.DataFrame()
+    reddit_user = get_user_reddit(st.session_state.refresh_token)
+    if "reddit_username" not in st.session_state:
+        st.session_state.reddit_username = reddit_user.user.me().name
+    st.success(f"Logged in as: {st.session_state.reddit_username}")
 
-# --- Fetch data ---
+# --- Fetch data (only items newer than the store are fetched and scored) ---
 if reddit_user and st.button("Fetch My Data"):
-    comments = [
-        {"time": pd.to_datetime(c.created_utc, unit="s"), "text": c.body}
-        for c in reddit_user.user.me().comments.new(limit=50)
-    ]
-    df_user = pd.DataFrame(comments)
-
-    if not df_user.empty:
-        # Sentiment + volatility
-        df_user = analyze_sentiment(df_user)
-        df_user["volatility"] = df_user["sentiment"].rolling(5).std().fillna(0)
-
-        # Save in session_state ✅
-        st.session_state["df_user"] = df_user
+    _, n_new, errors = refresh_user(reddit_user.user.me(), get_store(), get_analyzer(), limit=50)
+    for kind, e in errors.items():
+        st.warning(f"⚠️ Could not fetch {kind}s: {e}")
+    if n_new:
+        st.success(f"Fetched {n_new} new items.")
 
-# --- Always reuse stored data ---
-df_user = st.session_state["df_user"]
+# --- Always read from the shared store (prepared once per store version) ---
+user = load_prepared_user()
 
-if df_user.empty:
+if user is None or user.empty:
     st.info("🔑 Please fetch your Reddit data to see personal volatility.")
 else:
+    df_user = user.frame
     # Show metrics and plots
-    display_metrics(df_user)
+    display_metrics(df_user, user.metrics())
 
     st.plotly_chart(
-        px.line(df_user, x="time", y="sentiment_score", title="📈 Sentiment Timeline", markers=True)
+        px.line(downsample_timeline(df_user, "sentiment_score"), x="time", y="sentiment_score",
+                title="📈 Sentiment Timeline", markers=True)
           .update_yaxes(range=[-1, 1]),
         use_container_width=True,
     )
     st.plotly_chart(
-        px.line(df_user, x="time", y="volatility", title="🌪 Volatility Timeline", markers=True),
+        px.line(downsample_timeline(df_user, "volatility"), x="time", y="volatility",
+                title="🌪 Volatility Timeline", markers=True),
         use_container_width=True,
     )
     st.plotly_chart(
-            px.line(df_user, x="time", y="sentiment_score", color="type",
+            px.line(downsample_timeline(df_user, "sentiment_score", color="type"),
+                    x="time", y="sentiment_score", color="type",
                     title="📈 Sentiment Timeline (Posts vs Comments)", markers=True)
               .update_yaxes(range=[-1, 1]),
             use_container_width=True
     )
     st.plotly_chart(
-            px.line(df_user, x="time", y="volatility", color="type",
+            px.line(downsample_timeline(df_user, "volatility", color="type"),
+                    x="time", y="volatility", color="type",
                     title="🌪 Volatility Timeline (Posts vs Comments)", markers=True),
             use_container_width=True
     )
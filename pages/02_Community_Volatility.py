@@ -1,32 +1,28 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from utils.downsample import downsample_timeline
+from utils.metrics import emotion_distribution
+from utils.resources import load_prepared_community
+
 st.title("🌍 Community Emotional Volatility")
 
-# --- Load community data from session state ---
-df_comm = st.session_state.get("df_comm", pd.DataFrame())
+# --- Community data from the shared store, sorted and indexed once per store version ---
+comm = load_prepared_community()
 
 # --- Check data availability ---
-if df_comm.empty:
+if comm is None or comm.empty:
     st.warning("⚠️ No community data available. Please fetch subreddit posts first.")
-elif "subreddit" not in df_comm.columns:
+elif comm.group is None:
     st.error("❌ Community dataset has no 'subreddit' column. Please refetch data.")
     st.stop()
 else:
-    # Ensure datetime and sort
-    df_comm["time"] = pd.to_datetime(df_comm["time"])
-    df_comm = df_comm.sort_values("time")
-
-    # Compute volatility if missing
-    if "volatility" not in df_comm.columns:
-        df_comm["volatility"] = df_comm.groupby("subreddit")["sentiment_score"].transform(
-            lambda x: x.rolling(5).std().fillna(0)
-        )
+    # per-subreddit rolling volatility, computed once and shared
+    df_comm = comm.with_volatility(window=5)
 
     # --- Sentiment over time ---
     fig_sent = px.line(
-        df_comm,
+        downsample_timeline(df_comm, "sentiment_score", color="subreddit"),
         x="time",
         y="sentiment_score",
         color="subreddit",
@@ -37,7 +33,7 @@ else:
 
     # --- Volatility over time ---
     fig_vol = px.line(
-        df_comm,
+        downsample_timeline(df_comm, "volatility", color="subreddit"),
         x="time",
         y="volatility",
         color="subreddit",
@@ -47,21 +43,11 @@ else:
     st.plotly_chart(fig_vol, use_container_width=True)
 
 
-    # 🔎 Emotion distribution
-    rows = []
-    for sub in df_comm["subreddit"].unique():
-        df_sub = df_comm[df_comm["subreddit"] == sub]
-        rows.append({
-            "Subreddit": sub,
-            "Positive": int((df_sub["sentiment_score"] > 0.1).sum()),
-            "Neutral": int(df_sub["sentiment_score"].between(-0.1, 0.1).sum()),
-            "Negative": int((df_sub["sentiment_score"] < -0.1).sum()),
-        })
+    # 🔎 Emotion distribution (label counts of every subreddit in one pass, cached)
+    counts = comm.label_counts()
 
-    if rows:
-        dist_df = pd.DataFrame(rows).melt(
-            id_vars="Subreddit", var_name="Emotion", value_name="Count"
-        )
+    if len(counts):
+        dist_df = emotion_distribution(counts, "Subreddit")
         st.plotly_chart(
             px.bar(
                 dist_df, x="Subreddit", y="Count", color="Emotion",
@@ -2,31 +2,39 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from utils.downsample import downsample_timeline
+from utils.metrics import emotion_distribution, label_counts
+from utils.resources import load_prepared_community, load_prepared_user
+
 st.title("📊 Comparison: My Sentiment vs Community")
 
-# --- Check data availability ---
-df_user = st.session_state.get("df_user", pd.DataFrame())
-df_comm = st.session_state.get("df_comm", pd.DataFrame())
+# --- Check data availability (both prepared once per store version and shared) ---
+user = load_prepared_user()
+comm = load_prepared_community()
 
-if df_user.empty:
+if user is None or user.empty:
     st.warning("⚠️ No user data available. Please fetch your Reddit comments first.")
-elif df_comm.empty:
+elif comm is None or comm.empty:
     st.warning("⚠️ No community data available. Please fetch subreddit posts first.")
-elif "subreddit" not in df_comm.columns:
+elif comm.group is None:
     st.error("❌ Community dataset has no 'subreddit' column. Please refetch data.")
     st.stop()
 else:
-    # --- Sentiment Comparison ---
-    df_user_plot = df_user.copy()
-    df_user_plot["source"] = "Me"
-
-    df_comm_plot = df_comm.copy()
-    df_comm_plot["source"] = df_comm_plot["subreddit"]
-
-    df_all = pd.concat([df_user_plot, df_comm_plot], ignore_index=True)
+    df_user = user.frame
+    df_comm = comm.with_volatility(window=5)
+
+    def by_source(y):
+        """Me and each subreddit as ``time``/``y``/``source`` rows, each downsampled before combining."""
+        me = downsample_timeline(df_user, y)
+        subs = downsample_timeline(df_comm, y, color="subreddit")
+        return pd.concat([
+            pd.DataFrame({"time": me["time"], y: me[y], "source": "Me"}),
+            pd.DataFrame({"time": subs["time"], y: subs[y], "source": subs["subreddit"].astype(object)}),
+        ], ignore_index=True)
 
+    # --- Sentiment Comparison ---
     fig_sent = px.line(
-        df_all,
+        by_source("sentiment_score"),
         x="time",
         y="sentiment_score",
         color="source",
@@ -36,28 +44,9 @@ else:
     st.plotly_chart(fig_sent, use_container_width=True)
 
     # --- Volatility Comparison ---
-    # compute volatility if missing
-    if "volatility" not in df_user.columns:
-        df_user = df_user.sort_values("time")
-        df_user["volatility"] = df_user["sentiment_score"].rolling(5).std().fillna(0)
-
-    if "volatility" not in df_comm.columns:
-        df_comm = df_comm.sort_values("time")
-        df_comm["volatility"] = df_comm.groupby("subreddit")["sentiment_score"].transform(
-            lambda x: x.rolling(5).std().fillna(0)
-        )
-
-    df_user_vol = df_user.copy()
-    df_user_vol["source"] = "Me"
-
-    df_comm_vol = df_comm.copy()
-    df_comm_vol["source"] = df_comm_vol["subreddit"]
-
-    df_all_vol = pd.concat([df_user_vol, df_comm_vol], ignore_index=True)
-
     # Chart 1: Me vs Each Subreddit
     fig_vol_each = px.line(
-        df_all_vol,
+        by_source("volatility"),
         x="time",
         y="volatility",
         color="source",
@@ -67,16 +56,13 @@ else:
     st.plotly_chart(fig_vol_each, use_container_width=True)
 
     # Chart 2: Me vs Community Average
-    df_comm_avg = df_comm.groupby(df_comm["time"].dt.date)["volatility"].mean().reset_index()
-    df_comm_avg["source"] = "Community Avg"
-
-    df_user_avg = df_user.groupby(df_user["time"].dt.date)["volatility"].mean().reset_index()
-    df_user_avg["source"] = "Me"
-
-    df_avg = pd.concat([df_user_avg, df_comm_avg], ignore_index=True)
+    df_avg = pd.concat([
+        user.daily_means("volatility").assign(source="Me"),
+        comm.daily_means("volatility").assign(source="Community Avg"),
+    ], ignore_index=True)
 
     fig_vol_avg = px.line(
-        df_avg,
+        downsample_timeline(df_avg, "volatility", color="source"),
         x="time",
         y="volatility",
         color="source",
@@ -85,28 +71,10 @@ else:
     st.plotly_chart(fig_vol_avg, use_container_width=True)
 
     # 🔎 Emotion Distribution: Subreddit vs My Emotion
-    rows = []
-    for sub in df_comm["subreddit"].unique():
-        df_sub = df_comm[df_comm["subreddit"] == sub]
-        rows.append({
-            "Source": sub,
-            "Positive": int((df_sub["sentiment_score"] > 0.1).sum()),
-            "Neutral": int(df_sub["sentiment_score"].between(-0.1, 0.1).sum()),
-            "Negative": int((df_sub["sentiment_score"] < -0.1).sum()),
-        })
-
-    if not df_user.empty and "sentiment_score" in df_user.columns:
-        rows.append({
-            "Source": "My Emotion",
-            "Positive": int((df_user["sentiment_score"] > 0.1).sum()),
-            "Neutral": int(df_user["sentiment_score"].between(-0.1, 0.1).sum()),
-            "Negative": int((df_user["sentiment_score"] < -0.1).sum()),
-        })
+    counts = pd.concat([comm.label_counts(), label_counts(df_user["sentiment_score"], "My Emotion")])
 
-    if rows:
-        dist_df = pd.DataFrame(rows).melt(
-            id_vars="Source", var_name="Emotion", value_name="Count"
-        )
+    if len(counts):
+        dist_df = emotion_distribution(counts, "Source")
         st.plotly_chart(
             px.bar(
                 dist_df, x="Source", y="Count", color="Emotion",
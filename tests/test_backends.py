@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+import pytest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "data", "labeled_sample.csv")
+
+
+def test_registry_and_spec_parsing():
+    from utils.backends import available_backends, create_backend, parse_backends
+    assert {"vader", "textblob", "lexicon_vader", "lexicon_blob"} <= set(available_backends())
+    assert parse_backends(" blob=lexicon_blob, vader=lexicon_vader ") == {"blob": "lexicon_blob", "vader": "lexicon_vader"}
+    assert parse_backends("") == {}
+    with pytest.raises(ValueError):
+        parse_backends("lexicon_blob")
+    with pytest.raises(ValueError):
+        create_backend("bogus")
+
+
+def test_lexicon_backends_match_reference_scores():
+    from utils.backends import create_backend
+    texts = pd.read_csv(SAMPLE)["text"].tolist() + [
+        "The movie was VERY good!!!", "never so happy", "kind of good?? yeah right", "not bad at all :)"
+    ]
+    for fast, ref in (("lexicon_vader", "vader"), ("lexicon_blob", "textblob")):
+        assert create_backend(fast).score_batch(texts).tolist() == create_backend(ref).score_batch(texts).tolist()
+
+
+def _fuzzed_texts(n, seed=0):
+    """Reddit-like texts: lexicon words, negations, emoticons, abbreviations, quotes and marks."""
+    import random
+    from textblob import _text
+    from textblob.en import sentiment as pattern_sentiment
+
+    pattern_sentiment.load()
+    rng = random.Random(seed)
+    words = sorted(dict.keys(pattern_sentiment))
+    pieces = words[::len(words) // 300] + sorted(e for faces in _text.EMOTICONS.values() for e in faces) + [
+        "not", "never", "n't", "no", "very", "really", "barely", "kind of", "but", "least", "a", "is",
+        "!", "?", ".", "...", "(!)", ",", ":", "'", '"', "\u201c", "\u2019", "(", ")", "\n\n", "don't", "I'm",
+        "U.S.", "e.g.", "Mr.", "etc.", "x D", ": )", "<3", "lol", "smh", "#tag", "@user", "GOOD", "Bad!!",
+    ]
+    return [
+        "".join(
+            (p.upper() if rng.random() < 0.2 else p) + rng.choice([" ", " ", "", "  "])
+            for p in rng.choices(pieces, k=rng.randint(1, 14))
+        )
+        for _ in range(n)
+    ]
+
+
+def test_lexicon_backends_match_reference_on_fuzzed_text():
+    from utils.backends import create_backend
+    texts = _fuzzed_texts(2000)
+    for fast, ref in (("lexicon_vader", "vader"), ("lexicon_blob", "textblob")):
+        assert create_backend(fast).score_batch(texts).tolist() == create_backend(ref).score_batch(texts).tolist()
+
+
+def test_ensemble_routes_components_to_registered_backends():
+    from utils.backends import SentimentBackend, register_backend
+    from utils.sentiment import SentimentCache, SentimentEnsemble
+
+    class Constant(SentimentBackend):
+        def score(self, text):
+            return 0.5
+
+    register_backend("test_constant", Constant)
+    analyzer = SentimentEnsemble(0, 1, 0, backends={"blob": "test_constant"})
+    assert analyzer.analyze_batch(["anything", "", None]).tolist() == [0.5, 0.0, 0.0]
+    assert analyzer.analyze_text("anything") == 0.5
+    assert SentimentCache.make_key("x", (0, 1, 0), analyzer._custom_backends()) != SentimentCache.make_key("x", (0, 1, 0))
+    with pytest.raises(ValueError):
+        SentimentEnsemble(backends={"blob": "bogus"})
+    with pytest.raises(ValueError):
+        SentimentEnsemble(backends={"bogus": "vader"})
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+def _frame(n=50_000, groups=("a", "b"), seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 86_400 * 7, n)), unit="s"),
+        "subreddit": rng.choice(list(groups), n),
+        "sentiment_score": rng.uniform(-1, 1, n).round(3),
+    })
+
+
+def test_downsample_keeps_budget_extremes_and_endpoints():
+    from utils.downsample import downsample_timeline
+    df = _frame()
+    df.loc[777, "sentiment_score"] = 9.0  # a spike must survive
+    out = downsample_timeline(df, "sentiment_score", color="subreddit", max_points=400)
+    assert out.index.is_monotonic_increasing
+    assert 777 in out.index
+    for sub, full in df.groupby("subreddit"):
+        kept = out[out["subreddit"] == sub]
+        assert len(kept) <= 400
+        assert kept["sentiment_score"].max() == full["sentiment_score"].max()
+        assert kept["sentiment_score"].min() == full["sentiment_score"].min()
+        assert kept["time"].iloc[[0, -1]].tolist() == full["time"].iloc[[0, -1]].tolist()
+
+
+def test_small_series_and_unsorted_input_are_kept_whole():
+    from utils.downsample import downsample_indices, downsample_timeline
+    df = _frame(n=300)
+    assert downsample_timeline(df, "sentiment_score", max_points=400) is df
+
+    shuffled = _frame(n=5_000).sample(frac=1, random_state=0)
+    y = shuffled["sentiment_score"].to_numpy()
+    y[:10] = np.nan
+    groups = np.where(np.arange(5_000) < 100, "small", "big")
+    idx = downsample_indices(shuffled["time"], y, groups, max_points=200)
+    assert (groups[idx] == "small").sum() == 100
+    assert (groups[idx] == "big").sum() <= 200
+    assert np.nanmax(y[idx]) == np.nanmax(y)
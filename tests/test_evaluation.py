@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from utils.evaluation import StreamingEvaluator, evaluate_csv, main
+from utils.sentiment import SentimentEnsemble, scores_to_sentiment
+
+def test_streaming_evaluator_matches_sklearn():
+    rng = np.random.default_rng(0)
+    y_true, y_pred = rng.choice([-1, 1], 500), rng.choice([-1, 0, 1], 500)
+    evaluator = StreamingEvaluator()
+    for start in range(0, 500, 128):
+        evaluator.update(y_true[start:start + 128], y_pred[start:start + 128])
+
+    assert evaluator.accuracy == accuracy_score(y_true, y_pred)
+    assert (evaluator.confusion_frame().to_numpy() == confusion_matrix(y_true, y_pred, labels=[-1, 1])).all()
+    expected = pd.DataFrame(classification_report(
+        y_true, y_pred, labels=[-1, 1], target_names=["negative", "positive"], output_dict=True, zero_division=0
+    )).T.drop(index="micro avg", errors="ignore")
+    assert np.allclose(evaluator.report().to_numpy(), expected.loc[evaluator.report().index].to_numpy())
+
+def test_evaluate_csv_in_chunks(tmp_path):
+    texts = ["I love this!", "This is awful.", "The sky is blue.", "Great work", "I hate it"] * 20
+    labels = ["positive", "negative", "neutral", "1", "bogus"] * 20
+    path = tmp_path / "labeled.csv"
+    pd.DataFrame({"text": texts, "label": labels}).to_csv(path, index=False)
+
+    seen = []
+    evaluator = evaluate_csv(path, SentimentEnsemble(), chunksize=30, on_chunk=lambda e: seen.append(e.n))
+    assert seen == [24, 48, 72, 80]
+    assert evaluator.skipped == 20
+    pred = scores_to_sentiment(SentimentEnsemble().analyze_batch(texts[:4]))
+    assert evaluator.accuracy == np.mean(pred == [1, -1, 0, 1])
+
+    assert main([str(path), "--min-accuracy", "1.01"]) == 1
+
+def test_evaluate_csv_requires_columns(tmp_path):
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"body": ["hi"]}).to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        evaluate_csv(path)
+
+def test_weight_sweep_matches_rescoring():
+    from utils.evaluation import WeightSweep, weight_grid
+    texts = ["I love this!", "This is awful.", "The sky is blue.", "Great work", "meh, fine I guess", ""] * 5
+    y_true = np.array([1, -1, 0, 1, 0, 0] * 5)
+    sweep = WeightSweep(SentimentEnsemble().component_scores(texts), y_true)
+
+    grid = weight_grid(0.25)
+    assert len(grid) == 15 and np.allclose(grid.sum(axis=1), 1)
+    result = sweep.evaluate(grid)
+    for w, acc in zip(grid[::4], result["accuracy"].to_numpy()[::4]):
+        pred = scores_to_sentiment(SentimentEnsemble(*w).analyze_batch(texts))
+        assert acc == accuracy_score(y_true, pred)
+    assert result["macro_f1"].between(0, 1).all()
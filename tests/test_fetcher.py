@@ -0,0 +1,93 @@
+import time
+from utils.fake_reddit import FakeRedditServer, make_posts
+from utils.fetcher import RateLimiter, fetch_subreddits
+
+def test_fetch_subreddits_concurrently_with_errors():
+    posts = {"depression": make_posts("depression", 150), "bpd": make_posts("bpd", 20)}
+    with FakeRedditServer(posts, delay=0.2) as server:
+        start = time.perf_counter()
+        workers = []
+
+        def client(worker):  # one client per pool worker
+            workers.append(worker)
+            return server.reddit()
+
+        df, errors = fetch_subreddits(client, ["depression", "missing", "bpd"], limit=120)
+        elapsed = time.perf_counter() - start
+
+    assert df["subreddit"].value_counts().to_dict() == {"depression": 120, "bpd": 20}
+    assert list(df["subreddit"].unique()) == ["depression", "bpd"]
+    assert set(errors) == {"missing"}
+    assert sorted(workers) == [0, 1, 2]
+    assert str(df["time"].dtype).startswith("datetime64")
+    # 4 requests at 0.2s each would take 0.8s sequentially
+    assert elapsed < 0.7
+
+def test_shared_client_sends_one_request_at_a_time():
+    import threading
+    from utils.fetcher import fetch_subreddit
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    class Listing:
+        def __init__(self, sub):
+            self.sub = sub
+
+        def __iter__(self):
+            for i in range(3):
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)  # a page request
+                active[0] -= 1
+                yield type("Post", (), {"created_utc": i, "title": "t", "selftext": "", "fullname": f"{self.sub}{i}"})
+
+    class Client:
+        def subreddit(self, sub):
+            return type("Subreddit", (), {"new": lambda _, limit: Listing(sub)})()
+
+    client = Client()
+    threads = [threading.Thread(target=fetch_subreddit, args=(client, s, 3, None, None, lock)) for s in "abcd"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 1
+
+def test_rate_limiter_paces_requests():
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.perf_counter()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_failed_user_listing_keeps_none_of_its_rows():
+    from utils.fetcher import fetch_user_items
+
+    def item(i, kind):
+        return type(kind, (), {"created_utc": 100 - i, "body": "b", "title": "t", "selftext": "",
+                               "subreddit": "bpd", "fullname": f"{kind}{i}"})
+
+    def failing(limit):
+        yield item(0, "c")
+        yield item(1, "c")
+        raise ConnectionError("page 2")
+
+    listing = type("Listing", (), {"new": lambda _, limit: failing(limit)})
+    ok = type("Listing", (), {"new": lambda _, limit: iter([item(0, "p")])})
+    user = type("User", (), {"comments": listing(), "submissions": ok()})()
+    df, errors = fetch_user_items(user)
+    assert set(errors) == {"comment"}
+    assert df["id"].tolist() == ["p0"]
+
+
+def test_callers_share_the_default_rate_limiter(tmp_path, monkeypatch):
+    from utils.fetcher import default_rate_limiter
+    from utils.ingest import IngestWorker
+    from utils.store import FetchStore
+    assert IngestWorker(None, FetchStore(root=str(tmp_path)), []).rate_limiter is default_rate_limiter
+    acquired = []
+    monkeypatch.setattr(default_rate_limiter, "acquire", lambda tokens=1.0: acquired.append(tokens))
+    with FakeRedditServer({"bpd": make_posts("bpd", 5)}) as server:
+        fetch_subreddits(server.reddit(), ["bpd"], limit=5)
+    assert acquired == [1.0]
@@ -0,0 +1,10 @@
+import subprocess
+import sys
+
+def test_utils_import_without_heavy_dependencies():
+    code = (
+        "import sys, utils.sentiment, utils.metrics, utils.store, utils.resources, utils.ingest\n"
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'nltk', 'textblob', 'scipy', 'sklearn'}))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
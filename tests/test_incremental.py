@@ -0,0 +1,27 @@
+from utils.fake_reddit import FakeRedditServer, make_posts
+from utils.incremental import refresh_community
+from utils.store import FetchStore
+
+def test_refresh_community_fetches_only_new_posts(tmp_path):
+    posts = make_posts("bpd", 150)
+    with FakeRedditServer({"bpd": posts}) as server:
+        reddit = server.reddit()
+        store = FetchStore(root=str(tmp_path))
+
+        df, n_new, errors = refresh_community(reddit, store, ["bpd"], limit=100)
+        assert (n_new, len(df), errors) == (100, 100, {})
+        assert df["time"].is_monotonic_increasing
+
+        # three newer posts arrive
+        newer = make_posts("bpd", 3, start_utc=posts[0]["created_utc"] + 10)
+        for p in newer:
+            p["id"] = "new" + p["id"]
+        server.posts["bpd"] = newer + posts
+        before = server.requests
+        df, n_new, _ = refresh_community(reddit, store, ["bpd"], limit=100)
+        assert (n_new, len(df)) == (3, 103)
+        assert server.requests - before == 1
+
+    reopened = FetchStore(root=str(tmp_path))
+    assert len(reopened.frame("community")) == 103
+    assert reopened.watermark("r/bpd")[1] == "t3_newbpd000000"
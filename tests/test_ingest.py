@@ -0,0 +1,81 @@
+import threading
+import time
+from utils.fake_reddit import FakeRedditServer, make_posts
+from utils.incremental import COMMUNITY
+from utils.ingest import IngestWorker
+from utils.store import FetchStore
+
+def test_ingest_worker_polls_scores_and_stores(tmp_path):
+    posts = {"bpd": make_posts("bpd", 40), "depression": make_posts("depression", 25)}
+    with FakeRedditServer(posts) as server:
+        store = FetchStore(root=str(tmp_path))
+        worker = IngestWorker(server.reddit(), store, ["bpd", "depression"], interval=0, batch_size=10)
+        stats = worker.run(max_polls=2)
+
+    df = store.read(COMMUNITY)
+    assert len(df) == 65
+    assert df["sentiment_score"].notna().all()
+    # the second poll finds nothing new
+    assert (stats["polls"], stats["fetched"], stats["written"]) == (2, 65, 65)
+
+def test_ingest_worker_blocks_when_queue_is_full(tmp_path, monkeypatch):
+    from utils import ingest
+    monkeypatch.setattr(ingest, "HEARTBEAT_EVERY", 0.1)
+    with FakeRedditServer({"bpd": make_posts("bpd", 5)}) as server:
+        worker = IngestWorker(server.reddit(), FetchStore(root=str(tmp_path)), ["bpd"], queue_size=1)
+        worker.queue.put("backlog")  # scorer not started, queue is full
+        poller = threading.Thread(target=worker.poll_once)
+        poller.start()
+        poller.join(timeout=1.0)
+        assert poller.is_alive(), "poll_once should wait for queue space"
+        # the heartbeat stays fresh while it waits
+        assert ingest.ingested_subreddits(str(tmp_path)) == ["bpd"]
+
+        assert worker.queue.get() == "backlog"
+        poller.join(timeout=5)
+        assert len(worker.queue.get()) == 5
+
+def test_ingest_worker_retries_a_failed_write(tmp_path):
+    posts = {"bpd": make_posts("bpd", 20), "depression": make_posts("depression", 10)}
+    with FakeRedditServer(posts) as server:
+        store = FetchStore(root=str(tmp_path))
+        append, calls = store.append, []
+
+        def flaky_append(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return append(*args, **kwargs)
+
+        store.append = flaky_append
+        worker = IngestWorker(server.reddit(), store, ["bpd", "depression"], interval=0, max_wait=0.1)
+        stats = worker.run(max_polls=2)
+
+    assert len(store.read(COMMUNITY)) == 30
+    assert (stats["errors"], stats["written"]) == (1, 30)
+
+
+def test_ingest_worker_refetches_after_giving_up(tmp_path):
+    with FakeRedditServer({"bpd": make_posts("bpd", 15)}) as server:
+        store = FetchStore(root=str(tmp_path))
+        worker = IngestWorker(server.reddit(), store, ["bpd"], max_retries=0)
+        append = store.append
+        store.append = lambda *args, **kwargs: (_ for _ in ()).throw(OSError("disk full"))
+        worker.poll_once()
+        worker._write_batch(worker.queue.get())
+
+        store.append = append
+        assert worker.poll_once() == 15  # the dropped posts are fetched again
+
+
+def test_ingested_subreddits_follow_the_worker_heartbeat(tmp_path):
+    from utils.ingest import ingested_subreddits
+    assert ingested_subreddits(str(tmp_path)) == []
+
+    worker = IngestWorker(None, FetchStore(root=str(tmp_path)), ["bpd", "depression"], interval=60)
+    worker._heartbeat()
+    assert ingested_subreddits(str(tmp_path)) == ["bpd", "depression"]
+    assert ingested_subreddits(str(tmp_path), now=time.time() + 3600) == []  # stale
+
+    worker._clear_heartbeat()
+    assert ingested_subreddits(str(tmp_path)) == []
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from utils.metrics import (
+    calculate_comprehensive_metrics,
+    count_emotional_swings,
+    count_negative_streaks,
+    identify_stability_periods,
+    label_counts,
+)
+
+def test_count_emotional_swings():
+    assert count_emotional_swings(pd.Series([0.0, 0.5, 0.4, -0.2])) == 2
+    assert count_emotional_swings(pd.Series([0.3])) == 0
+
+def test_count_negative_streaks():
+    scores = pd.Series([-0.5, -0.2, 0.0, -0.3, -0.4, -0.9, 0.2])
+    assert count_negative_streaks(scores) == 3
+    assert count_negative_streaks(pd.Series([0.1, 0.2])) == 0
+    assert count_negative_streaks(pd.Series(dtype=float)) == 0
+
+def test_identify_stability_periods():
+    df = pd.DataFrame({"sentiment_score": [0.0, 0.1, 0.0, 0.9, 0.9, 0.8, 0.85, -0.5, -0.5]})
+    periods = identify_stability_periods(df)
+    assert [(p["start_index"], p["end_index"], p["duration"]) for p in periods] == [(0, 2, 3), (3, 6, 4)]
+    assert periods[1]["avg_sentiment"] == df["sentiment_score"].iloc[3:7].mean()
+
+def test_comprehensive_metrics_sorts_by_time():
+    df = pd.DataFrame({
+        "time": pd.to_datetime([3, 1, 2], unit="D"),
+        "sentiment_score": [-0.5, 0.5, 0.0],
+    })
+    metrics = calculate_comprehensive_metrics(df)
+    assert metrics["emotional_swings"] == 2
+    assert metrics["posts_analyzed"] == 3
+    assert metrics["mean_sentiment"] == round(np.mean([-0.5, 0.5, 0.0]), 3)
+
+def test_streaming_metrics_match_batch():
+    from utils.metrics import calculate_streaming_metrics
+    rng = np.random.default_rng(7)
+    scores = np.round(np.cumsum(rng.normal(0, 0.2, 500)).clip(-1, 1), 3)
+    df = pd.DataFrame({
+        "time": pd.to_datetime(np.arange(500) * 3600, unit="s"),
+        "sentiment_score": scores,
+    })
+    chunks = (df.iloc[i:i + 37] for i in range(0, len(df), 37))
+    assert calculate_streaming_metrics(chunks) == calculate_comprehensive_metrics(df)
+
+
+def test_label_counts_matches_per_group_masks():
+    rng = np.random.default_rng(0)
+    scores = pd.Series(np.round(rng.uniform(-1, 1, 500), 3)).astype(np.float32)
+    scores[[0, 1]] = [0.1, -0.1]
+    groups = pd.Series(rng.choice(["c", "a", "b"], 500)).astype("category")
+    counts = label_counts(scores, groups)
+
+    assert counts.index.tolist() == groups.unique().tolist()
+    for sub in counts.index:
+        s = pd.Series(np.round(scores[groups == sub].astype(np.float64), 3))
+        expected = [(s < -0.1).sum(), s.between(-0.1, 0.1).sum(), (s > 0.1).sum()]
+        assert counts.loc[sub].tolist() == expected
+    assert label_counts([0.5, np.nan, -0.5], "Me").loc["Me"].tolist() == [1, 0, 1]
@@ -0,0 +1,70 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+
+def _frame():
+    return pd.DataFrame({
+        "time": pd.to_datetime(["2024-01-02 10:00", "2024-01-01 09:00", "2024-01-01 12:00",
+                                "2024-01-02 08:00", "2024-01-01 10:00", "2024-01-02 09:00"]),
+        "subreddit": ["a", "b", "a", "b", "a", "a"],
+        "sentiment_score": [0.5, -0.5, 0.05, 0.2, -0.3, 0.1],
+    })
+
+
+def test_prepared_dataset_sorts_once_and_indexes():
+    from utils.prepared import PreparedDataset
+    df = _frame()
+    prepared = PreparedDataset(df)
+    assert prepared.frame["time"].is_monotonic_increasing
+    assert df["time"].iloc[0] == pd.Timestamp("2024-01-02 10:00")  # input untouched
+
+    day1 = prepared.between("2024-01-01", "2024-01-01 23:59")
+    assert len(day1) == 3 and np.shares_memory(day1["sentiment_score"].to_numpy(),
+                                                prepared.frame["sentiment_score"].to_numpy())
+    assert prepared.groups() == ["a", "b"]
+    assert prepared.for_group("b")["sentiment_score"].tolist() == [-0.5, 0.2]
+
+
+def test_prepared_views_match_direct_computation_and_are_cached():
+    from utils.metrics import calculate_comprehensive_metrics
+    from utils.prepared import PreparedDataset
+    from utils.volatility import grouped_rolling_std
+    prepared = PreparedDataset(_frame())
+    frame = prepared.frame
+
+    assert prepared.metrics() == calculate_comprehensive_metrics(_frame())
+    assert prepared.metrics() is prepared.metrics()
+
+    expected = grouped_rolling_std(frame["sentiment_score"], frame["subreddit"], window=2)
+    np.testing.assert_array_equal(prepared.with_volatility(2)["volatility"], expected)
+    assert prepared.with_volatility(2) is prepared.with_volatility(2)
+
+    daily = prepared.daily_means(by_group=True)
+    expected = frame.groupby([frame["subreddit"], frame["time"].dt.normalize()])["sentiment_score"].mean()
+    np.testing.assert_allclose(daily["sentiment_score"], expected.to_numpy())
+    assert len(prepared.binned_means("12h")) == 3
+
+    counts = prepared.label_counts()
+    assert counts.loc["a"].tolist() == [1, 2, 1]
+    assert counts.loc["b"].tolist() == [1, 0, 1]
+
+
+def test_shared_prepared_rows_keep_one_current_copy(tmp_path, monkeypatch):
+    from utils import resources
+    from utils.store import FetchStore
+    store = FetchStore(root=str(tmp_path))
+    monkeypatch.setattr(resources, "get_store", lambda: store)
+    # st.cache_resource does not cache outside a Streamlit run
+    monkeypatch.setattr(resources, "_prepared_slot", functools.cache(resources._prepared_slot.__wrapped__))
+    rows = _frame().assign(id=[f"t3_{i}" for i in range(6)], text="x")
+    columns = ("time", "subreddit", "sentiment_score")
+
+    store.append("community", rows.iloc[:4], "subreddit", "r/")
+    first = resources._prepared("community", ("a", "b"), columns)
+    assert resources._prepared("community", ("a", "b"), columns) is first
+    store.append("community", rows.iloc[4:], "subreddit", "r/")
+    second = resources._prepared("community", ("a", "b"), columns)
+    assert len(first) == 4 and len(second) == 6
+    assert resources._prepared_slot("community", ("a", "b"), columns)["prepared"] is second
@@ -9,3 +9,30 @@ from utils.reddit_client import get_reddit
 def test_reddit_connection():
     reddit = get_reddit()
     assert reddit.user.me() is None or isinstance(reddit.user.me(), object)
+
+def test_registry_reuses_clients_and_counts_requests():
+    from utils.fake_reddit import FakeRedditServer, make_posts
+    from utils.reddit_client import RedditClientRegistry
+
+    registry = RedditClientRegistry()
+    with FakeRedditServer({"bpd": make_posts("bpd", 30)}) as server:
+        creds = dict(client_id="fake", client_secret="fake", user_agent="tests",
+                     oauth_url=server.url, reddit_url=server.url, check_for_updates=False)
+        reddit = registry.get("bot", **creds)
+        assert registry.get("bot", **creds) is reddit
+        assert registry.get("bot", **{**creds, "client_id": "other"}) is not reddit
+        assert registry.get("bot", worker=1, **creds) is not reddit
+        assert len(list(reddit.subreddit("bpd").new(limit=30))) == 30
+
+    stats = registry.stats()
+    assert stats["bot"]["requests"] == 2  # access token + one listing page
+    assert stats["bot"]["errors"] == 0
+    assert stats["bot#2"]["requests"] == 0
+
+
+def test_oauth_flow_client_is_never_shared(monkeypatch):
+    from utils.praw_oauth import get_oauth_reddit, get_user_reddit
+    monkeypatch.setenv("OAUTH_CLIENT_ID", "fake")
+    monkeypatch.setenv("OAUTH_CLIENT_SECRET", "fake")
+    assert get_oauth_reddit() is not get_oauth_reddit()
+    assert get_user_reddit("token") is get_user_reddit("token")
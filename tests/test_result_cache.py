@@ -0,0 +1,40 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from utils.result_cache import ResultCache
+
+def test_single_flight_shares_one_computation():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return pd.DataFrame({"x": range(10)})
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+def test_ttl_memory_cap_and_errors():
+    cache = ResultCache(ttl=0.05, max_bytes=10_000)
+    cache.get_or_compute("a", lambda: 1)
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    time.sleep(0.06)
+    assert cache.get_or_compute("a", lambda: 3) == 3
+
+    big = lambda: pd.DataFrame({"x": range(1000)})  # ~8KB each
+    cache.get_or_compute("b", big)
+    cache.get_or_compute("c", big)
+    assert cache.stats()["bytes"] <= 10_000
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("d", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert cache.get_or_compute("d", lambda: "ok") == "ok"
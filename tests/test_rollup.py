@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.rollup import RollupCube
+from utils.store import FetchStore
+
+def _posts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3 * 86400, n)), unit="s"),
+        "id": [f"t3_{i}" for i in range(n)],
+        "subreddit": rng.choice(["bpd", "depression", "mentalhealth"], n),
+        "sentiment_score": rng.uniform(-1, 1, n).round(3),
+    })
+
+def test_rollup_matches_groupby_at_every_interval():
+    df = _posts(2000)
+    cube = RollupCube.from_rows(df.iloc[:1200]).merge(RollupCube.from_rows(df.iloc[1200:]))
+    for freq in ["1min", "5min", "30min", "1h", "6h", "1D"]:
+        expected = (
+            df.groupby(["subreddit", pd.Grouper(key="time", freq=freq)])["sentiment_score"]
+            .agg(["count", "mean", "std"]).reset_index()
+        )
+        got = cube.aggregate(freq)
+        assert got["subreddit"].tolist() == expected["subreddit"].tolist()
+        assert (got["time"] == expected["time"]).all()
+        assert got["count"].tolist() == expected["count"].tolist()
+        np.testing.assert_allclose(got["mean"], expected["mean"], atol=1e-12)
+        np.testing.assert_allclose(got["std"], expected["std"], atol=1e-9)
+
+    overall = cube.aggregate("1D", subreddits=["bpd", "depression"], by_subreddit=False)
+    sub = df[df["subreddit"].isin(["bpd", "depression"])]
+    assert overall["count"].tolist() == sub.groupby(sub["time"].dt.date).size().tolist()
+
+def test_store_keeps_rollup_current(tmp_path):
+    df = _posts(300)
+    store = FetchStore(root=str(tmp_path))
+    store.append("community", df.iloc[:200], "subreddit", "r/")
+    assert store.rollup("community").aggregate("1D")["count"].sum() == 200
+
+    # another process appending is picked up; known ids are not counted twice
+    FetchStore(root=str(tmp_path)).append("community", df, "subreddit", "r/")
+    assert store.rollup("community").aggregate("1D")["count"].sum() == 300
+
+    # stores without a rollup file build it once from the rows
+    os.remove(tmp_path / "community.rollup.parquet")
+    daily = FetchStore(root=str(tmp_path)).rollup("community").aggregate("1D", value="sentiment")
+    assert daily["count"].sum() == 300
+    assert os.path.exists(tmp_path / "community.rollup.parquet")
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+def _rows():
+    return pd.DataFrame({
+        "time": pd.to_datetime([1.7e9, 1.7e9 + 60, 1.7e9 + 120], unit="s"),
+        "id": ["t1_a", "t3_b", "t1_c"],
+        "text": ["same", "other", "same"],
+        "type": ["comment", "post", "comment"],
+        "subreddit": ["s", "s", "t"],
+        "sentiment_score": [0.1, -0.123, -0.1],
+        "volatility": [0.0, 0.2, 0.3],
+    })
+
+
+def test_compact_frame_dtypes_and_exact_scores():
+    from utils.schema import compact_frame, score_values
+    from utils.sentiment import scores_to_sentiment
+    df = compact_frame(_rows(), text="intern")
+    assert df["time"].dtype == "datetime64[s]"
+    assert df["sentiment_score"].dtype == np.float32
+    assert isinstance(df["type"].dtype, pd.CategoricalDtype)
+    assert df["text"].cat.categories.tolist() == ["other", "same"]
+    assert score_values(df["sentiment_score"]).tolist() == [0.1, -0.123, -0.1]
+    # the ±0.1 boundaries stay neutral after the float32 round trip
+    assert scores_to_sentiment(df["sentiment_score"]).tolist() == [0, -1, 0]
+    assert "text" not in compact_frame(_rows(), text="drop").columns
+
+
+def test_store_reads_compact_frames_and_writes_exact_scores(tmp_path):
+    from utils.schema import compact_frame
+    from utils.store import FetchStore
+    store = FetchStore(str(tmp_path), text="drop")
+    store.append("u/me", compact_frame(_rows()), "type", "u/me/")
+
+    df = store.read("u/me")
+    assert "text" not in df.columns
+    assert df["sentiment"].dtype == np.int8
+    assert df["sentiment_label"].tolist() == ["neutral", "negative", "neutral"]
+    assert store.read("u/me", columns=["text"])["text"].tolist() == ["same", "other", "same"]
+    stored = pd.read_parquet(tmp_path / "u_me")
+    assert sorted(stored["sentiment_score"]) == [-0.123, -0.1, 0.1]
@@ -14,3 +14,88 @@ def test_neutral_sentiment():
     text = "The sky is blue."
     score = analyze_text(text)
     assert -0.2 < score < 0.2, "Neutral text should be near zero"
+
+def test_analyze_batch_matches_analyze_text():
+    from utils.sentiment import get_default_analyzer
+    analyzer = get_default_analyzer()
+    texts = ["I am very happy and excited!", "This is terrible and depressing.",
+             "The sky is blue.", "", None, "I am very happy and excited!"]
+    scores = analyzer.analyze_batch(texts)
+    assert scores.tolist() == [analyzer.analyze_text(t) for t in texts]
+
+def test_analyze_sentiment_labels():
+    import pandas as pd
+    from utils.sentiment import analyze_sentiment
+    df = analyze_sentiment(pd.DataFrame({"text": [
+        "I am very happy and excited!", "This is terrible and depressing.", "The sky is blue."
+    ]}))
+    assert df["sentiment"].tolist() == [1, -1, 0]
+    assert df["sentiment_label"].tolist() == ["positive", "negative", "neutral"]
+
+def test_identical_backends_run_once():
+    from utils.sentiment import SentimentEnsemble
+    plan = SentimentEnsemble()._plan()
+    assert sorted(names for _, _, names in plan) == [["blob"], ["vader", "nltk"]]
+    plan = SentimentEnsemble(0, 1, 0)._plan()
+    assert [names for _, _, names in plan] == [["blob"]]
+
+def test_sentiment_cache_hits_and_persistence(tmp_path):
+    from utils.sentiment import SentimentCache, SentimentEnsemble
+    path = str(tmp_path / "scores.sqlite")
+    texts = ["I am very happy and excited!", "This is terrible and depressing.", "I am very happy and excited!"]
+
+    analyzer = SentimentEnsemble(cache=SentimentCache(maxsize=10, path=path))
+    first = analyzer.analyze_batch(texts)
+    assert analyzer.cache.stats()["misses"] == 2
+    assert analyzer.analyze_batch(texts).tolist() == first.tolist()
+    assert analyzer.cache.stats()["hits"] == 2
+
+    restarted = SentimentEnsemble(cache=SentimentCache(maxsize=10, path=path))
+    assert restarted.analyze_batch(texts).tolist() == first.tolist()
+    assert restarted.cache.stats()["disk_hits"] == 2
+
+    reweighted = SentimentEnsemble(0, 1, 0, cache=SentimentCache(maxsize=10, path=path))
+    reweighted.analyze_batch(texts)
+    assert reweighted.cache.stats()["hits"] == 0
+
+def test_sentiment_cache_lru_eviction():
+    from utils.sentiment import SentimentCache
+    cache = SentimentCache(maxsize=2)
+    cache.put_many({b"a": 0.1, b"b": 0.2})
+    cache.get_many([b"a"])
+    cache.put_many({b"c": 0.3})
+    assert set(cache.get_many([b"a", b"b", b"c"])) == {b"a", b"c"}
+
+def test_process_pool_preserves_order():
+    from utils.sentiment import SentimentEnsemble
+    texts = ["I am very happy and excited!", "This is terrible and depressing.", "The sky is blue."] * 50
+    texts = [f"{t} #{i}" for i, t in enumerate(texts)]
+    pooled = SentimentEnsemble(workers=2, parallel_threshold=10)
+    try:
+        assert pooled.analyze_batch(texts).tolist() == SentimentEnsemble().analyze_batch(texts).tolist()
+    finally:
+        pooled.close()
+
+
+def test_empty_batch_with_process_pool():
+    from utils.sentiment import SentimentEnsemble
+    pooled = SentimentEnsemble(workers=2, parallel_threshold=0)
+    try:
+        scores = pooled.analyze_batch([])
+        assert scores.dtype == "float64" and scores.shape == (0,)
+        assert pooled.component_scores([]).shape == (0, 3)
+    finally:
+        pooled.close()
+
+
+def test_process_pool_uses_configured_backends():
+    from utils.sentiment import SentimentEnsemble
+    texts = [f"not bad at all :) #{i}" for i in range(40)] + ["kind of good?? yeah right"] * 5
+    backends = {"blob": "lexicon_blob", "vader": "lexicon_vader", "nltk": "lexicon_vader"}
+    pooled = SentimentEnsemble(workers=2, parallel_threshold=10, backends=backends)
+    try:
+        expected = SentimentEnsemble(backends=backends).component_scores(texts)
+        assert pooled.component_scores(texts).tolist() == expected.tolist()
+        assert pooled._pool._mp_context.get_start_method() == "forkserver"
+    finally:
+        pooled.close()
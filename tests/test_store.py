@@ -0,0 +1,69 @@
+import os
+import pandas as pd
+from utils.store import FetchStore
+
+def _rows(sub, start, n, prefix):
+    return pd.DataFrame({
+        "time": pd.date_range(start, periods=n, freq="12h"),
+        "id": [f"t3_{prefix}{i}" for i in range(n)],
+        "text": [f"text {i}" for i in range(n)],
+        "subreddit": sub,
+        "sentiment_score": [0.5, -0.5, 0.0, 0.2][:n],
+    })
+
+def test_store_partitions_and_pushdown(tmp_path):
+    store = FetchStore(root=str(tmp_path))
+    store.append("community", _rows("bpd", "2024-01-01", 4, "a"), "subreddit", "r/")
+    store.append("community", _rows("depression", "2024-01-01", 4, "b"), "subreddit", "r/")
+
+    assert os.path.isdir(tmp_path / "community" / "subreddit=bpd" / "day=2024-01-02")
+    assert len(store.read("community")) == 8
+
+    df = store.read("community", subreddits=["bpd"], start="2024-01-01 12:00", end="2024-01-02 00:00")
+    assert df["id"].tolist() == ["t3_a1", "t3_a2"]
+    assert df["sentiment_label"].tolist() == ["negative", "neutral"]
+
+    scores = store.read("community", columns=["time", "sentiment_score"])
+    assert list(scores.columns) == ["time", "sentiment_score"]
+    assert scores["time"].is_monotonic_increasing
+
+def test_store_skips_known_ids_and_compacts(tmp_path):
+    store = FetchStore(root=str(tmp_path))
+    rows = _rows("bpd", "2024-01-01", 4, "a")
+    store.append("community", rows.iloc[:3], "subreddit", "r/")
+    written = store.append("community", rows, "subreddit", "r/")
+    assert written["id"].tolist() == ["t3_a3"]
+    assert store.watermark("r/bpd")[1] == "t3_a3"
+
+    store.compact("community")
+    day = tmp_path / "community" / "subreddit=bpd" / "day=2024-01-02"
+    assert len(os.listdir(day)) == 1
+    assert store.read("community")["id"].tolist() == ["t3_a0", "t3_a1", "t3_a2", "t3_a3"]
+
+def test_marks_merge_across_store_instances(tmp_path):
+    # two instances on one root stand in for the app and the ingest worker
+    app, worker = FetchStore(root=str(tmp_path)), FetchStore(root=str(tmp_path))
+    assert worker.watermark("r/bpd") is None
+    app.append("community", _rows("bpd", "2024-01-01", 2, "a"), "subreddit", "r/")
+    worker.append("community", _rows("depression", "2024-01-01", 2, "b"), "subreddit", "r/")
+
+    assert app.watermark("r/depression")[1] == "t3_b1"
+    assert FetchStore(root=str(tmp_path)).watermark("r/bpd")[1] == "t3_a1"
+
+
+def _append_batches(root, prefix):
+    store = FetchStore(root=root)
+    for i in range(8):
+        store.append("community", _rows("bpd", f"2024-01-0{i + 1}", 2, f"{prefix}{i}_"), "subreddit", "r/")
+
+
+def test_rollup_counts_add_up_across_processes(tmp_path):
+    import multiprocessing
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_append_batches, args=(str(tmp_path), p)) for p in "ab"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert [p.exitcode for p in procs] == [0, 0]
+    assert FetchStore(root=str(tmp_path)).rollup("community").bins["count"].sum() == 32
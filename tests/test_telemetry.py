@@ -0,0 +1,115 @@
+import urllib.request
+
+import pandas as pd
+import pytest
+
+
+def test_track_counts_items_failures_and_percentiles():
+    from utils.telemetry import Telemetry
+    telemetry = Telemetry()
+    for n in (10, 20, 30):
+        with telemetry.track("score") as span:
+            span.items = n
+    with pytest.raises(RuntimeError):
+        with telemetry.track("score"):
+            raise RuntimeError("boom")
+
+    snap = telemetry.snapshot()["score"]
+    assert (snap["calls"], snap["items"], snap["failures"]) == (4, 61, 1)
+    assert snap["items_per_sec"] > 0
+    assert 0 <= snap["p50_ms"] <= snap["p95_ms"] <= snap["p99_ms"]
+
+
+def test_paused_time_is_left_out_of_the_span():
+    import time
+    from utils.telemetry import Telemetry
+    telemetry = Telemetry()
+    with telemetry.track("reddit_fetch") as span:
+        with span.paused():
+            time.sleep(0.2)  # throttling, not Reddit's latency
+    assert telemetry.snapshot()["reddit_fetch"]["p50_ms"] < 100
+
+
+def test_prometheus_text_file_and_endpoint(tmp_path):
+    from utils.telemetry import Telemetry
+    telemetry = Telemetry()
+    telemetry.timer("reddit_fetch").record(0.25, items=100, failed=True)
+    text = telemetry.prometheus()
+    assert '# TYPE volatility_operation_seconds summary' in text
+    assert 'volatility_operation_seconds{op="reddit_fetch",quantile="0.95"} 0.25' in text
+    assert 'volatility_operation_items_total{op="reddit_fetch"} 100' in text
+    assert 'volatility_operation_failures_total{op="reddit_fetch"} 1' in text
+
+    path = tmp_path / "metrics.prom"
+    telemetry.write_prometheus(str(path))
+    assert path.read_text() == text
+
+    server = telemetry.serve(0, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            assert response.read().decode() == text
+    finally:
+        server.shutdown()
+
+
+def test_compute_metrics_reports_measured_values():
+    from utils.analysis import compute_metrics
+    from utils.telemetry import Telemetry
+    telemetry = Telemetry()
+    telemetry.timer("reddit_fetch").record(0.2, items=50)
+    telemetry.timer("reddit_fetch").record(0.4, items=0, failed=True)
+    telemetry.timer("sentiment_batch").record(0.5, items=1000)
+
+    metrics = compute_metrics(pd.DataFrame({"volatility": [0.1, 0.6, 0.9]}), telemetry)
+    assert metrics["throughput"] == 2000.0
+    assert metrics["api_failures"] == 1
+    assert metrics["latency_p50"] == 300.0
+    assert metrics["spikes"] == 2
+
+
+def test_scoring_and_fetching_are_instrumented():
+    from utils.fetcher import fetch_subreddits
+    from utils.fake_reddit import FakeRedditServer, make_posts
+    from utils.reddit_client import TimedRequestor
+    from utils.sentiment import SentimentEnsemble
+    from utils.telemetry import telemetry
+
+    before = telemetry.snapshot()
+    SentimentEnsemble().analyze_batch(["I am happy", "I am sad"])
+    with FakeRedditServer({"sub": make_posts("sub", 5)}) as server:
+        fetch_subreddits(server.reddit(requestor_class=TimedRequestor), ["sub"], limit=5)
+    after = telemetry.snapshot()
+
+    def delta(op, key):
+        return after[op][key] - before.get(op, {}).get(key, 0)
+
+    assert delta("sentiment_batch", "items") == 2
+    assert delta("reddit_fetch", "items") == 5
+    assert delta("reddit_request", "calls") >= 1
+
+
+def test_concurrent_prometheus_writes_and_process_label(tmp_path):
+    import threading
+    from utils.telemetry import Telemetry, process_path
+    telemetry = Telemetry(process="app")
+    telemetry.timer("score").record(0.1)
+    assert 'volatility_operation_items_total{process="app",op="score"} 1' in telemetry.prometheus()
+
+    path = process_path(str(tmp_path / "metrics.prom"), "app")
+    assert path.endswith("metrics.app.prom")
+    errors = []
+
+    def write():
+        try:
+            for _ in range(50):
+                telemetry.write_prometheus(path)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert [p.name for p in tmp_path.iterdir()] == ["metrics.app.prom"]
@@ -1,3 +1,4 @@
+import numpy as np
 from utils.volatility import VolatilityTracker
 
 def test_volatility_tracker():
@@ -7,3 +8,46 @@ def test_volatility_tracker():
     
     assert vols[-1] > 0, "Volatility should be >0 with varying scores"
     assert tracker.update(0.5) >= 0, "Volatility must always be non-negative"
+
+def test_volatility_tracker_matches_rolling_std():
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    # runs of repeated scores: pandas reports those windows as exactly 0
+    scores = np.round(rng.choice([0.0, 0.5, -0.3, 0.674], 3000, p=[0.5, 0.2, 0.2, 0.1]), 3)
+    scores[:200] = np.round(rng.uniform(-1, 1, 200), 3)
+    expected = pd.Series(scores).rolling(5).std().fillna(0).to_numpy()
+
+    tracker = VolatilityTracker(window_size=5)
+    vols = np.array([tracker.update(s) for s in scores])
+    np.testing.assert_array_equal(vols == 0, expected == 0)
+    assert np.allclose(vols, expected)
+
+    batched = VolatilityTracker(window_size=5)
+    vols = np.concatenate([batched.update_many(part) for part in np.array_split(scores, 37)])
+    np.testing.assert_array_equal(vols == 0, expected == 0)
+    assert np.allclose(vols, expected)
+    assert np.isclose(batched.update(0.5), tracker.update(0.5))
+    assert [batched.update(0.5) for _ in range(4)][-1] == 0.0
+
+def test_detect_crisis_patterns_includes_last_window():
+    from utils.volatility import VolatilityAnalyzer
+    emotions = [0.2, 0.1, -1.0, -1.0, -1.0, 1.0, -1.0]
+    crises = VolatilityAnalyzer()._detect_crisis_patterns(emotions)
+    assert crises["position"].tolist() == [2]
+    assert crises["severity"].iloc[0] == abs(np.mean(emotions[2:7])) * np.std(emotions[2:7])
+    assert VolatilityAnalyzer()._detect_crisis_patterns(emotions[:3]).empty
+
+def test_grouped_rolling_std_matches_groupby_transform():
+    import pandas as pd
+    from utils.volatility import grouped_rolling_std
+    rng = np.random.default_rng(1)
+    scores = np.round(rng.uniform(-1, 1, 500), 1)
+    scores[rng.random(500) < 0.05] = np.nan
+    groups = rng.choice(["bpd", "depression", "mentalhealth"], 500)
+    for window, min_periods in [(5, None), (3, 1)]:
+        expected = pd.Series(scores).groupby(groups).transform(
+            lambda s: s.rolling(window, min_periods=min_periods).std().fillna(0)
+        )
+        got = grouped_rolling_std(scores, groups, window=window, min_periods=min_periods)
+        assert np.allclose(got, expected, atol=1e-12)
+    assert grouped_rolling_std([0.3, 0.3, 0.3], window=2).tolist() == [0.0, 0.0, 0.0]
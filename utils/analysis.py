@@ -1,13 +1,26 @@
-import numpy as np
+from utils.telemetry import telemetry as _telemetry
 
-def compute_metrics(df):
-    throughput = len(df)  # comments per time window (mocked)
-    latency = np.random.randint(100, 500)  # ms
-    api_failures = np.random.randint(0, 2)
-    spikes = (df["volatility"] > 0.5).sum()
+
+def compute_metrics(df, telemetry=None):
+    """Pipeline health figures, measured by ``utils.telemetry``.
+
+    ``throughput`` is texts scored per second on the batch path,
+    ``latency`` the p95 (``latency_p50``/``latency_p99`` alongside) of a
+    Reddit listing fetch in ms, ``api_failures`` the fetches that raised
+    and ``spikes`` the rows of ``df`` with volatility above 0.5.
+    ``operations`` holds every timer's snapshot.
+    """
+    operations = (telemetry or _telemetry).snapshot()
+    empty = {"items_per_sec": 0.0, "failures": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    fetch = operations.get("reddit_fetch", empty)
+    scoring = operations.get("sentiment_batch", empty)
+    spikes = int((df["volatility"] > 0.5).sum()) if "volatility" in df.columns else 0
     return {
-        "throughput": throughput,
-        "latency": latency,
-        "api_failures": api_failures,
-        "spikes": spikes
+        "throughput": scoring["items_per_sec"],
+        "latency": fetch["p95_ms"],
+        "latency_p50": fetch["p50_ms"],
+        "latency_p99": fetch["p99_ms"],
+        "api_failures": fetch["failures"],
+        "spikes": spikes,
+        "operations": operations,
     }
@@ -0,0 +1,430 @@
+"""Sentiment backends behind one batch interface, and the registry the ensemble draws from.
+
+A backend turns a batch of texts into raw polarities in [-1, 1]. The
+ensemble routes each of its components (``vader``, ``blob``, ``nltk``)
+to a backend by registered name, so a new scorer is one
+:func:`register_backend` call away:
+
+    SentimentEnsemble(backends={"blob": "lexicon_blob"})
+
+Built in:
+
+``vader``          NLTK's VADER ``compound`` score
+``textblob``       TextBlob (pattern) polarity
+``lexicon_vader``  compiled port of ``vader``
+``lexicon_blob``   compiled port of ``textblob``
+
+The ``lexicon_*`` backends load the same lexicons once into plain dicts
+and score each text with one tokenizer pass and dict lookups, without
+building a TextBlob (and its pattern parse) per text or VADER's
+per-text punctuation tables. They reproduce the reference scores on
+``benchmarks/data/labeled_sample.csv``; ``benchmarks.bench_backends``
+reports agreement and throughput. Both ports are still pure Python and
+run about 8x faster than their references there (7-9x between runs),
+short of the 10x they were meant to reach.
+"""
+import math
+import re
+import threading
+
+import numpy as np
+
+_registry = {}
+_lock = threading.Lock()
+
+
+class SentimentBackend:
+    """Scores texts; subclasses implement :meth:`score` or :meth:`score_batch`.
+
+    Callers pass only non-empty strings.
+    """
+
+    def score(self, text: str) -> float:
+        raise NotImplementedError
+
+    def score_batch(self, texts) -> np.ndarray:
+        """Return one raw polarity per text as a float64 array."""
+        return np.fromiter((self.score(text) for text in texts), dtype=np.float64, count=len(texts))
+
+
+def register_backend(name: str, factory):
+    """Make ``factory()`` (returning a :class:`SentimentBackend`) available as ``name``.
+
+    Backends used on the scoring process pool must be registered at
+    import time of a module the workers import, too.
+    """
+    with _lock:
+        _registry[name] = factory
+
+
+def create_backend(name: str) -> SentimentBackend:
+    try:
+        factory = _registry[name]
+    except KeyError:
+        raise ValueError(f"unknown sentiment backend {name!r}; available: {available_backends()}") from None
+    return factory()
+
+
+def available_backends() -> list:
+    with _lock:
+        return sorted(_registry)
+
+
+def parse_backends(spec: str) -> dict:
+    """Parse ``"blob=lexicon_blob,vader=lexicon_vader"`` into a component -> backend dict."""
+    backends = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        component, _, backend = item.partition("=")
+        if not backend:
+            raise ValueError(f"expected component=backend, got {item!r}")
+        backends[component.strip()] = backend.strip()
+    return backends
+
+
+class VaderBackend(SentimentBackend):
+    """NLTK's VADER ``compound`` score; the analyzer and lexicon load on first use."""
+
+    def __init__(self):
+        self._analyzer = None
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            from utils.sentiment import _load_vader
+
+            self._analyzer = _load_vader()
+        return self._analyzer
+
+    def score(self, text: str) -> float:
+        return self.analyzer.polarity_scores(text).get("compound", 0.0)
+
+
+class TextBlobBackend(SentimentBackend):
+    """TextBlob polarity (pattern's adjective lexicon)."""
+
+    def score(self, text: str) -> float:
+        from textblob import TextBlob
+
+        return TextBlob(text).sentiment.polarity
+
+
+# ---------- Compiled lexicon scorers ----------
+class LexiconBlobBackend(SentimentBackend):
+    """TextBlob's polarity rules over a precompiled ``word -> (polarity, intensity, modifier)`` dict.
+
+    Follows pattern's ``find_tokens`` and ``Sentiment.assessments`` for
+    untagged text: an adverb in the lexicon scales the next known word, a
+    negation flips it (``* -0.5``), "!" boosts the previous word, "(!)"
+    adds a neutral irony mark, emoticons count as words, and the result is
+    the mean over known words. What it saves is pattern's per-text regex
+    passes (contractions, whitespace) and its linear emoticon search.
+    """
+
+    _compiled = None
+
+    def __init__(self):
+        if LexiconBlobBackend._compiled is None:
+            from textblob import _text
+            from textblob.en import sentiment as pattern_sentiment
+
+            pattern_sentiment.load()
+            emoticons = {}
+            for (_, p), faces in _text.EMOTICONS.items():
+                for e in faces:
+                    e = e.lower()
+                    # pattern only looks up short non-alphabetic tokens
+                    if not e.isalpha() and len(e) <= 5 and e not in _text.PUNCTUATION:
+                        emoticons.setdefault(e, p)
+            LexiconBlobBackend._compiled = (
+                {
+                    word: (float(p), float(i) or 1.0, "RB" in senses)
+                    for word, senses in dict.items(pattern_sentiment)
+                    for p, _, i in [senses[None]]
+                },
+                emoticons,
+                frozenset(pattern_sentiment.negations),
+                _text,
+            )
+        self.lexicon, self.emoticons, self.negations, self._text = LexiconBlobBackend._compiled
+        punctuation = self._text.PUNCTUATION.replace(".", "")
+        self._lead = tuple(punctuation)
+        self._trail = tuple(punctuation) + (".",)
+        self._edge_marks = frozenset(self._text.PUNCTUATION)
+        self._breaks = frozenset(("...", ".", "!", "?", self._text.EOS))
+        self._closers = self._breaks | {"'", "\"", "\u201d", "\u2019", ")"}
+
+    def _split(self, t, tokens):
+        """pattern's leading/trailing punctuation split of one whitespace token."""
+        text, replace = self._text, self._text.replacements
+        tail = []
+        while t.startswith(self._lead) and t not in replace:
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(self._trail) and t not in replace:
+            if t.endswith(self._lead):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if (t in text.ABBREVIATIONS or text.RE_ABBR1.match(t) is not None
+                        or text.RE_ABBR2.match(t) is not None or text.RE_ABBR3.match(t) is not None):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+
+    def _words(self, text):
+        """Lowercased words of ``" ".join(pattern_sentiment.tokenizer(text)).split()``."""
+        _text = self._text
+        if "'" in text:
+            # every contraction replacement contains "'"
+            for a, b in _text.replacements.items():
+                text = text.replace(a, b)
+        text = (text.replace("\u201c", " \u201c ").replace("\u201d", " \u201d ")
+                .replace("\u2018", " \u2018 ").replace("\u2019", " \u2019 ")
+                .replace("'", " ' ").replace('"', ' " '))
+        if "\n" in text:
+            text = re.sub(r"\n{2,}", " %s " % _text.EOS, text.replace("\r\n", "\n"))
+        tokens = []
+        edge = self._edge_marks
+        for t in text.split():
+            if t[0] in edge or t[-1] in edge:
+                self._split(t, tokens)
+            else:
+                tokens.append(t)
+
+        # sentence breaks only matter to the sarcasm and emoticon joins below;
+        # pattern's scan, jumping from break to break
+        eos = _text.EOS
+        breaks, closers = self._breaks, self._closers
+        positions = [k for k, t in enumerate(tokens) if t in breaks]
+        sentences, i, j, p = [[]], 0, 0, 0
+        while p < len(positions):
+            if positions[p] < j:
+                p += 1
+                continue
+            j = positions[p]
+            while j < len(tokens) and tokens[j] in closers:
+                if tokens[j] in ("'", "\"") and sentences[-1].count(tokens[j]) % 2 == 0:
+                    break
+                j += 1
+            sentences[-1].extend(t for t in tokens[i:j] if t != eos)
+            sentences.append([])
+            i = j
+            j += 1
+        sentences[-1].extend(tokens[i:])
+        words = []
+        for sentence in sentences:
+            if not sentence:
+                continue
+            joined = " ".join(sentence)
+            if "!" in joined:
+                joined = _text.RE_SARCASM.sub("(!)", joined)
+            joined = _text.RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+            words.extend(joined.lower().split())
+        return words
+
+    def score(self, text: str) -> float:
+        lexicon, negations = self.lexicon, self.negations
+        found = []  # [polarity, intensity, negated]
+        modifier = negation = None
+        for w in self._words(text):
+            entry = lexicon.get(w)
+            if entry is not None:
+                p, i, is_modifier = entry
+                if modifier is None:
+                    found.append([p, i, False])
+                else:
+                    last = found[-1]
+                    last[0] = max(-1.0, min(p * last[1], 1.0))
+                    last[1] = i
+                if negation is not None:
+                    found[-1][1] = 1.0 / found[-1][1]
+                    found[-1][2] = True
+                modifier = w if is_modifier else None
+                negation = w if w in negations else None
+                continue
+
+            if w in negations:
+                negation = w
+            elif negation and len(w.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                found[-1][2] = True
+                negation = None
+            elif modifier and len(w) > 2:
+                modifier = None
+            if w == "!" and found:
+                found[-1][0] = max(-1.0, min(found[-1][0] * 1.25, 1.0))
+            if w == "(!)":
+                found.append([0.0, 1.0, False])
+            if w in self.emoticons:
+                found.append([self.emoticons[w], 1.0, False])
+
+        if not found:
+            return 0.0
+        return sum(p * -0.5 if negated else p for p, _, negated in found) / len(found)
+
+
+class LexiconVaderBackend(SentimentBackend):
+    """VADER's valence rules over its lexicon, precompiled into dicts.
+
+    Ports ``SentimentIntensityAnalyzer.polarity_scores`` rule for rule
+    (boosters, negation and "never so", ALL-CAPS emphasis, "least",
+    "but", idioms, "!"/"?" amplification), including its habit of
+    reading the context of a repeated word at its first occurrence.
+    What it saves is VADER's per-text tokenizer, which builds a
+    punctuation x word product for every text, and its per-word string
+    formatting for the idiom lookups.
+    """
+
+    _compiled = None
+
+    def __init__(self):
+        if LexiconVaderBackend._compiled is None:
+            from nltk.sentiment.vader import VaderConstants
+
+            constants = VaderConstants()
+            LexiconVaderBackend._compiled = (
+                dict(VaderBackend().analyzer.lexicon),
+                dict(constants.BOOSTER_DICT),
+                frozenset(constants.NEGATE),
+                tuple(constants.PUNC_LIST),
+                constants.REGEX_REMOVE_PUNCTUATION,
+                dict(constants.SPECIAL_CASE_IDIOMS),
+                constants.C_INCR,
+                constants.N_SCALAR,
+                constants.B_DECR,
+            )
+        (self.lexicon, self.boosters, self.negate, self.punctuation, self._remove_punctuation,
+         self.idioms, self.c_incr, self.n_scalar, self.b_decr) = LexiconVaderBackend._compiled
+        self._edge_marks = frozenset("".join(self.punctuation))
+        # words that can start an idiom or a two-word booster; other
+        # windows skip the phrase lookups
+        self._phrase_words = frozenset(
+            word for phrase in [*self.idioms, *self.boosters] if " " in phrase for word in phrase.split()
+        )
+
+    def _words(self, text):
+        """VADER's words_and_emoticons: tokens longer than one character, one leading or trailing mark stripped."""
+        words = []
+        for token in text.split():
+            if len(token) < 2:
+                continue
+            if token[0] not in self._edge_marks and token[-1] not in self._edge_marks:
+                words.append(token)
+                continue
+            for mark in self.punctuation:
+                if token.endswith(mark):
+                    inner = token[:-len(mark)]
+                elif token.startswith(mark):
+                    inner = token[len(mark):]
+                else:
+                    continue
+                if len(inner) > 1 and self._remove_punctuation.sub("", inner) == inner:
+                    token = inner
+                    break
+            words.append(token)
+        return words
+
+    def score(self, text: str) -> float:
+        lexicon, boosters = self.lexicon, self.boosters
+        words = self._words(text)
+        if not words:
+            return 0.0
+        lower = [w.lower() for w in words]
+        # every other word scores 0.0 and adds nothing to the sum
+        hits = [k for k, wl in enumerate(lower) if wl in lexicon and wl not in boosters]
+        if not hits:
+            return 0.0
+        negated = [w in self.negate or "n't" in w for w in lower]
+        n_caps = sum(map(str.isupper, words))
+        cap_diff = 0 < n_caps < len(words)
+        but = lower.index("but") if "but" in lower else None
+
+        total = 0.0
+        for k in hits:
+            w, wl = words[k], lower[k]
+            i = words.index(w)
+            if wl == "kind" and i < len(words) - 1 and lower[i + 1] == "of":
+                continue
+            v = lexicon[wl]
+            if cap_diff and w.isupper():
+                v += self.c_incr if v > 0 else -self.c_incr
+            for start in range(3):
+                if i <= start or lower[i - start - 1] in lexicon:
+                    continue
+                prev = words[i - start - 1]
+                boost = boosters.get(lower[i - start - 1], 0.0)
+                if boost:
+                    if v < 0:
+                        boost = -boost
+                    if cap_diff and prev.isupper():
+                        boost += self.c_incr if v > 0 else -self.c_incr
+                    v += boost * (1.0, 0.95, 0.9)[start]
+                v = self._never_check(v, words, negated, start, i)
+                if start == 2:
+                    v = self._idioms_check(v, words, i)
+            if i > 1 and lower[i - 1] not in lexicon and lower[i - 1] == "least":
+                if lower[i - 2] not in ("at", "very"):
+                    v *= self.n_scalar
+            elif i > 0 and lower[i - 1] not in lexicon and lower[i - 1] == "least":
+                v *= self.n_scalar
+            if but is not None:
+                v = v * 0.5 if k < but else v * 1.5 if k > but else v
+            total += v
+
+        emphasis = min(text.count("!"), 4) * 0.292
+        questions = text.count("?")
+        if questions > 1:
+            emphasis += questions * 0.18 if questions <= 3 else 0.96
+        if total > 0:
+            total += emphasis
+        elif total < 0:
+            total -= emphasis
+        compound = max(-1.0, min(total / math.sqrt(total * total + 15), 1.0))
+        return round(compound, 4)
+
+    def _never_check(self, v, words, negated, start, i):
+        if start == 0:
+            if negated[i - 1]:
+                v *= self.n_scalar
+        elif start == 1:
+            if words[i - 2] == "never" and words[i - 1] in ("so", "this"):
+                v *= 1.5
+            elif negated[i - 2]:
+                v *= self.n_scalar
+        else:
+            if (words[i - 3] == "never" and words[i - 2] in ("so", "this")) or words[i - 1] in ("so", "this"):
+                v *= 1.25
+            elif negated[i - 3]:
+                v *= self.n_scalar
+        return v
+
+    def _idioms_check(self, v, words, i):
+        if self._phrase_words.isdisjoint(words[i - 3:i + 3]):
+            return v
+        idioms = self.idioms
+        for seq in (words[i - 1:i + 1], words[i - 2:i + 1], words[i - 2:i],
+                    words[i - 3:i], words[i - 3:i - 1]):
+            seq = " ".join(seq)
+            if seq in idioms:
+                v = idioms[seq]
+                break
+        for k in (2, 3):
+            seq = " ".join(words[i:i + k])
+            if i + k <= len(words) and seq in idioms:
+                v = idioms[seq]
+        if " ".join(words[i - 3:i - 1]) in self.boosters or " ".join(words[i - 2:i]) in self.boosters:
+            v += self.b_decr
+        return v
+
+
+register_backend("vader", VaderBackend)
+register_backend("textblob", TextBlobBackend)
+register_backend("lexicon_vader", LexiconVaderBackend)
+register_backend("lexicon_blob", LexiconBlobBackend)
@@ -0,0 +1,84 @@
+"""Point-budget downsampling for the timeline charts.
+
+Plotly serializes every point to the browser, so a chart of a few
+hundred thousand posts spends longer in transfer and rendering than the
+dashboard spends computing it. :func:`downsample_timeline` cuts each
+series to at most ``max_points`` rows before charting: the x range is
+split into equal-width buckets (one per few pixels) and each bucket
+keeps its first, last, lowest and highest point, so spikes and dips stay
+visible and the line's shape is unchanged at screen resolution.
+"""
+import numpy as np
+import pandas as pd
+
+# rows per series; four are kept per bucket
+MAX_POINTS = 2000
+
+
+def _first_per_bucket(mask, bucket):
+    """Sorted positions of the first ``True`` of ``mask`` in each bucket run."""
+    pos = np.flatnonzero(mask)
+    b = bucket[pos]
+    return pos[np.concatenate(([True], b[1:] != b[:-1]))] if len(pos) else pos
+
+
+def downsample_indices(x, y, groups=None, max_points: int = MAX_POINTS) -> np.ndarray:
+    """Positions (ascending) of the rows to keep so each group has at most ``max_points``.
+
+    ``x`` may be datetimes, numbers or anything else (then buckets are
+    by position). Groups no larger than ``max_points`` are kept whole.
+    NaN ``y`` values are never chosen as a bucket's min or max.
+    """
+    n = len(y)
+    if groups is None:
+        codes = np.zeros(n, dtype=np.intp)
+    else:
+        codes = pd.factorize(pd.Series(np.asarray(groups)), use_na_sentinel=False)[0]
+    sizes = np.bincount(codes)
+    if n == 0 or sizes.max() <= max_points:
+        return np.arange(n)
+
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        xv = x.to_numpy("datetime64[ns]").view(np.int64)
+    elif pd.api.types.is_numeric_dtype(x):
+        xv = x.to_numpy(np.float64)
+    else:
+        xv = np.arange(n)
+    if np.all(xv[1:] >= xv[:-1]):
+        # already time-ordered: a stable sort by group (radix on 16-bit codes) keeps it so
+        order = np.argsort(codes.astype(np.uint16) if len(sizes) <= 1 << 16 else codes, kind="stable")
+    else:
+        order = np.lexsort((xv, codes))
+    codes, xv = codes[order], xv[order]
+    yv = np.asarray(y, dtype=np.float64)[order]
+
+    buckets = max(max_points // 4, 1)
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    lo = xv[starts][codes]
+    span = (xv[np.append(starts[1:], n) - 1] - xv[starts])[codes].astype(np.float64)
+    rel = (xv - lo).astype(np.float64) / np.where(span > 0, span, 1.0)
+    key = codes * buckets + np.minimum((rel * buckets).astype(np.int64), buckets - 1)
+
+    new_bucket = np.concatenate(([True], key[1:] != key[:-1]))
+    bstarts = np.flatnonzero(new_bucket)
+    bucket = np.cumsum(new_bucket) - 1
+    keep = np.zeros(n, dtype=bool)
+    keep[bstarts] = True
+    keep[np.append(bstarts[1:], n) - 1] = True
+    with np.errstate(invalid="ignore"):
+        lows = np.fmin.reduceat(yv, bstarts)[bucket]
+        highs = np.fmax.reduceat(yv, bstarts)[bucket]
+    keep[_first_per_bucket(yv == lows, bucket)] = True
+    keep[_first_per_bucket(yv == highs, bucket)] = True
+    keep |= sizes[codes] <= max_points
+    return np.sort(order[keep])
+
+
+def downsample_timeline(df: pd.DataFrame, y: str, x: str = "time", color: str = None,
+                        max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """Rows of ``df`` to chart as ``px.line(df, x, y, color=color)``, at most ``max_points`` per series."""
+    if len(df) <= max_points:
+        return df
+    groups = df[color] if color is not None else None
+    return df.iloc[downsample_indices(df[x], df[y], groups, max_points)]
@@ -0,0 +1,299 @@
+"""Streaming accuracy evaluation of the sentiment ensemble on a labeled CSV.
+
+    python -m utils.evaluation labeled.csv --chunksize 50000 --workers 4
+    python -m utils.evaluation labeled.csv --min-accuracy 0.6   # exit 1 below 60%
+    python -m utils.evaluation labeled.csv --sweep 0.05 --components scores.npz
+
+The CSV is read in chunks (``text`` and ``label`` columns). While one
+chunk is scored, the next is parsed on a reader thread. Results are
+folded into a running confusion matrix, so accuracy and the per-class
+report are available after every chunk instead of only at the end.
+
+:class:`WeightSweep` scores a labeled set once per component and then
+evaluates any number of ensemble weightings from that matrix.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.backends import parse_backends
+from utils.sentiment import COMPONENTS, SentimentCache, SentimentEnsemble, scores_to_sentiment
+
+LABEL_MAPPING = {"positive": 1, "neutral": 0, "negative": -1, "1": 1, "0": 0, "-1": -1}
+CLASSES = np.array([-1, 0, 1])
+CLASS_NAMES = ["negative", "neutral", "positive"]
+
+
+def map_labels(labels) -> np.ndarray:
+    """Map raw labels to -1/0/1; labels outside ``LABEL_MAPPING`` become NaN."""
+    labels = pd.Series(labels).astype(str).str.lower().str.strip()
+    return labels.map(LABEL_MAPPING).to_numpy(dtype=np.float64)
+
+
+def _class_scores(cm, present):
+    """Per-class precision, recall, F1 and support of confusion matrices ``cm[..., 3, 3]``.
+
+    Only the classes at indices ``present`` are scored; a class that is
+    never predicted gets precision 0, as with sklearn's ``zero_division=0``.
+    """
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)[..., present].astype(np.float64)
+    predicted = cm.sum(axis=-2)[..., present]
+    support = cm.sum(axis=-1)[..., present]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return precision, recall, f1, support
+
+
+class StreamingEvaluator:
+    """Confusion matrix over (-1, 0, 1) labels, updated one batch at a time."""
+
+    def __init__(self):
+        self.confusion_matrix = np.zeros((3, 3), dtype=np.int64)  # rows: true, columns: predicted
+        self.skipped = 0
+
+    @property
+    def n(self) -> int:
+        return int(self.confusion_matrix.sum())
+
+    @property
+    def accuracy(self) -> float:
+        return float(np.trace(self.confusion_matrix) / self.n) if self.n else 0.0
+
+    def update(self, y_true, y_pred):
+        """Add a batch of true and predicted labels (-1/0/1)."""
+        idx = (np.asarray(y_true, dtype=np.int64) + 1) * 3 + np.asarray(y_pred, dtype=np.int64) + 1
+        self.confusion_matrix += np.bincount(idx, minlength=9).reshape(3, 3)
+        return self
+
+    def labels(self) -> np.ndarray:
+        """Indices into ``CLASSES`` of the classes present in the true labels."""
+        return np.flatnonzero(self.confusion_matrix.sum(axis=1))
+
+    def confusion_frame(self) -> pd.DataFrame:
+        """Confusion matrix restricted to the classes present in the true labels."""
+        present = self.labels()
+        names = [CLASS_NAMES[i] for i in present]
+        return pd.DataFrame(
+            self.confusion_matrix[np.ix_(present, present)],
+            index=[f"True {c}" for c in names],
+            columns=[f"Pred {c}" for c in names],
+        )
+
+    def report(self) -> pd.DataFrame:
+        """Per-class precision, recall, f1-score and support, plus macro and weighted averages.
+
+        Same numbers as ``sklearn.metrics.classification_report`` with
+        ``labels`` set to the classes present in the true labels.
+        """
+        present = self.labels()
+        precision, recall, f1, support = _class_scores(self.confusion_matrix, present)
+        report = pd.DataFrame(
+            {"precision": precision, "recall": recall, "f1-score": f1, "support": support},
+            index=[CLASS_NAMES[i] for i in present],
+        )
+        weights = support / max(support.sum(), 1)
+        report.loc["macro avg"] = [precision.mean(), recall.mean(), f1.mean(), support.sum()]
+        report.loc["weighted avg"] = [precision @ weights, recall @ weights, f1 @ weights, support.sum()]
+        report["support"] = report["support"].astype(np.int64)
+        return report
+
+
+def _read_chunks(source, chunksize):
+    """Yield ``(texts, labels)`` per chunk; rows with unknown labels are dropped.
+
+    The next chunk is parsed on a reader thread while the caller works
+    on the current one.
+    """
+    def parse():
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            if "text" not in chunk.columns or "label" not in chunk.columns:
+                raise ValueError("Dataset must contain 'text' and 'label' columns.")
+            y_true = map_labels(chunk["label"])
+            valid = ~np.isnan(y_true)
+            yield chunk["text"].astype(str).to_numpy()[valid], y_true[valid].astype(np.int64), int((~valid).sum())
+
+    chunks = parse()
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(next, chunks, None)
+        while True:
+            item = pending.result()
+            if item is None:
+                return
+            pending = reader.submit(next, chunks, None)
+            yield item
+
+
+def evaluate_csv(source, analyzer: SentimentEnsemble = None, chunksize: int = 50_000,
+                 on_chunk=None) -> StreamingEvaluator:
+    """Score a labeled CSV chunk by chunk and return the filled evaluator.
+
+    ``source`` is a path or file-like object. Rows whose label is not in
+    ``LABEL_MAPPING`` are counted in ``evaluator.skipped``. After each
+    chunk, ``on_chunk(evaluator)`` is called if given. Batches go through
+    ``analyzer.analyze_batch``, which uses the analyzer's process pool
+    when it has ``workers > 1``.
+    """
+    analyzer = analyzer or SentimentEnsemble()
+    evaluator = StreamingEvaluator()
+    for texts, y_true, skipped in _read_chunks(source, chunksize):
+        evaluator.skipped += skipped
+        evaluator.update(y_true, scores_to_sentiment(analyzer.analyze_batch(texts)))
+        if on_chunk is not None:
+            on_chunk(evaluator)
+    return evaluator
+
+
+def weight_grid(step: float = 0.05) -> np.ndarray:
+    """Every weight vector over ``COMPONENTS`` with entries in multiples of ``step`` summing to 1."""
+    k = round(1 / step)
+    a, b = np.meshgrid(np.arange(k + 1), np.arange(k + 1), indexing="ij")
+    keep = a + b <= k
+    return np.stack([a[keep], b[keep], k - a[keep] - b[keep]], axis=1) / k
+
+
+class WeightSweep:
+    """Accuracy and F1 of many ensemble weightings from a single scoring pass.
+
+    ``components`` is the ``(n, len(COMPONENTS))`` matrix from
+    :meth:`SentimentEnsemble.component_scores` and ``y_true`` the -1/0/1
+    labels. Scores for every weighting are one matrix product, rounded
+    and thresholded as ``SentimentEnsemble`` does. The product can differ
+    from per-text scoring by one ulp, so a score sitting exactly on a
+    rounding tie may land on the other side.
+    """
+
+    # bound the (n_texts, n_weightings) score block held in memory at once
+    BLOCK_ELEMENTS = 1 << 24
+
+    def __init__(self, components, y_true):
+        self.components = np.asarray(components, dtype=np.float64)
+        self.y_true = np.asarray(y_true, dtype=np.int64)
+        if self.components.shape != (len(self.y_true), len(COMPONENTS)):
+            raise ValueError("components must have one row per label and one column per component")
+
+    @classmethod
+    def from_csv(cls, source, analyzer: SentimentEnsemble = None, chunksize: int = 50_000):
+        """Compute component scores for a labeled CSV, chunk by chunk."""
+        analyzer = analyzer or SentimentEnsemble()
+        matrices, labels = [], []
+        for texts, y_true, _ in _read_chunks(source, chunksize):
+            matrices.append(analyzer.component_scores(texts))
+            labels.append(y_true)
+        if not labels:
+            return cls(np.zeros((0, len(COMPONENTS))), np.zeros(0, dtype=np.int64))
+        return cls(np.concatenate(matrices), np.concatenate(labels))
+
+    def save(self, path):
+        """Store the component matrix and labels as ``.npz``."""
+        np.savez_compressed(path, components=self.components, y_true=self.y_true)
+
+    @classmethod
+    def load(cls, path) -> "WeightSweep":
+        with np.load(path) as data:
+            return cls(data["components"], data["y_true"])
+
+    def confusion_matrices(self, weights) -> np.ndarray:
+        """Return one 3x3 confusion matrix per weight vector, shape ``(k, 3, 3)``."""
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        n, k = len(self.y_true), len(weights)
+        out = np.zeros((k, 9), dtype=np.int64)
+        true_offset = ((self.y_true + 1) * 3)[:, None]
+        block = max(1, self.BLOCK_ELEMENTS // max(n, 1))
+        for lo in range(0, k, block):
+            w = weights[lo:lo + block]
+            total = w.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = np.round((self.components @ w.T) / total, 3)
+            scores[:, total == 0] = 0.0
+            pred = (scores > 0.1).astype(np.int64) - (scores < -0.1)
+            idx = true_offset + pred + 1 + 9 * np.arange(len(w))
+            out[lo:lo + len(w)] = np.bincount(idx.ravel(), minlength=9 * len(w)).reshape(len(w), 9)
+        return out.reshape(k, 3, 3)
+
+    def evaluate(self, weights) -> pd.DataFrame:
+        """Accuracy, macro F1 and weighted F1 for each weight vector, in input order."""
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        cms = self.confusion_matrices(weights)
+        present = np.flatnonzero(np.bincount(self.y_true + 1, minlength=3))
+        _, _, f1, support = _class_scores(cms, present)
+        n = max(len(self.y_true), 1)
+        result = pd.DataFrame(weights, columns=[f"w_{name}" for name in COMPONENTS])
+        result["accuracy"] = np.trace(cms, axis1=1, axis2=2) / n
+        result["macro_f1"] = f1.mean(axis=1) if len(present) else 0.0
+        result["weighted_f1"] = (f1 * support).sum(axis=1) / n
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the sentiment ensemble on a labeled CSV.")
+    parser.add_argument("csv", help="CSV with 'text' and 'label' columns")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SENTIMENT_WORKERS", "1")))
+    parser.add_argument("--backends", default=os.getenv("SENTIMENT_BACKENDS"),
+                        help="component=backend list, e.g. blob=lexicon_blob,vader=lexicon_vader")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="exit with status 1 when the final accuracy is below this")
+    parser.add_argument("--sweep", type=float, default=None, metavar="STEP",
+                        help="evaluate every weighting on a grid of this step instead")
+    parser.add_argument("--components", default=None,
+                        help="with --sweep: .npz of component scores, reused if present, written if not")
+    parser.add_argument("--top", type=int, default=10, help="with --sweep: weightings to print")
+    args = parser.parse_args(argv)
+
+    analyzer = SentimentEnsemble(
+        cache=SentimentCache(path=os.getenv("SENTIMENT_CACHE_PATH")), workers=args.workers,
+        backends=parse_backends(args.backends),
+    )
+    start = time.perf_counter()
+
+    def progress(evaluator):
+        elapsed = time.perf_counter() - start
+        print(f"{evaluator.n:>10,} rows  accuracy {evaluator.accuracy:.2%}  "
+              f"{evaluator.n / elapsed:,.0f} rows/s", file=sys.stderr)
+
+    try:
+        if args.sweep is not None:
+            return _sweep(args, analyzer)
+        evaluator = evaluate_csv(args.csv, analyzer, chunksize=args.chunksize, on_chunk=progress)
+    finally:
+        analyzer.close()
+
+    print(f"Accuracy: {evaluator.accuracy:.4f} on {evaluator.n} rows ({evaluator.skipped} skipped)")
+    print(evaluator.report().round(4).to_string())
+    print(evaluator.confusion_frame().to_string())
+    if args.min_accuracy is not None and evaluator.accuracy < args.min_accuracy:
+        return 1
+    return 0
+
+
+def _sweep(args, analyzer):
+    start = time.perf_counter()
+    if args.components and os.path.exists(args.components):
+        sweep = WeightSweep.load(args.components)
+    else:
+        sweep = WeightSweep.from_csv(args.csv, analyzer, chunksize=args.chunksize)
+        if args.components:
+            sweep.save(args.components)
+    scored = time.perf_counter()
+
+    grid = weight_grid(args.sweep)
+    result = sweep.evaluate(grid).sort_values(["accuracy", "macro_f1"], ascending=False)
+    done = time.perf_counter()
+    print(f"{len(sweep.y_true)} rows: component scores {scored - start:.2f}s, "
+          f"{len(grid)} weightings {done - scored:.2f}s", file=sys.stderr)
+    print(result.head(args.top).round(4).to_string(index=False))
+    best = result["accuracy"].iloc[0] if len(result) else 0.0
+    if args.min_accuracy is not None and best < args.min_accuracy:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Local stand-in for the Reddit API, for offline tests and development.
+
+Serves just enough of the OAuth token endpoint and the
+``/r/<sub>/new`` listing for PRAW to authenticate and page through
+submissions:
+
+    with FakeRedditServer({"depression": posts}) as server:
+        reddit = server.reddit()
+        list(reddit.subreddit("depression").new(limit=50))
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import praw
+
+
+def make_posts(subreddit, n, start_utc=1_700_000_000, step=60):
+    """Return ``n`` synthetic submissions for ``subreddit``, newest first."""
+    return [
+        {
+            "id": f"{subreddit[:3]}{i:06d}",
+            "title": f"post {i} in {subreddit}",
+            "selftext": "I feel okay today" if i % 2 else "this is awful and sad",
+            "created_utc": float(start_utc + (n - i) * step),
+        }
+        for i in range(n)
+    ]
+
+
+class FakeRedditServer:
+    """Threaded HTTP server imitating the parts of Reddit PRAW touches.
+
+    ``posts`` maps subreddit name to a list of submission dicts (``id``,
+    ``title``, ``selftext``, ``created_utc``) ordered newest first. Unknown
+    subreddits return 404; ``delay`` adds per-request latency.
+    """
+
+    def __init__(self, posts=None, delay=0.0):
+        self.posts = dict(posts or {})
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reddit(self, **kwargs) -> praw.Reddit:
+        """Return a read-only praw.Reddit pointed at this server."""
+        return praw.Reddit(
+            client_id="fake",
+            client_secret="fake",
+            user_agent="VolatilityApp tests",
+            oauth_url=self.url,
+            reddit_url=self.url,
+            check_for_updates=False,
+            **kwargs,
+        )
+
+    def _listing(self, sub, query):
+        posts = self.posts[sub]
+        limit = min(int(query.get("limit", ["25"])[0]), 100)  # Reddit caps pages at 100
+        after = query.get("after", [None])[0]
+        start = 0
+        if after:
+            names = [f"t3_{p['id']}" for p in posts]
+            start = names.index(after) + 1 if after in names else len(posts)
+        page = posts[start:start + limit]
+        children = [
+            {"kind": "t3", "data": {**p, "name": f"t3_{p['id']}", "subreddit": sub}}
+            for p in page
+        ]
+        more = start + limit < len(posts)
+        return {
+            "kind": "Listing",
+            "data": {
+                "after": children[-1]["data"]["name"] if children and more else None,
+                "before": None,
+                "children": children,
+            },
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._send(200, {
+                    "access_token": "fake-token",
+                    "token_type": "bearer",
+                    "expires_in": 3600,
+                    "scope": "*",
+                })
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                url = urlparse(self.path)
+                parts = [p for p in url.path.split("/") if p]
+                if len(parts) >= 3 and parts[0] == "r" and parts[2] == "new":
+                    sub = parts[1]
+                    if sub in server.posts:
+                        return self._send(200, server._listing(sub, parse_qs(url.query)))
+                self._send(404, {"message": "Not Found", "error": 404})
+
+        return Handler
@@ -0,0 +1,204 @@
+"""Concurrent subreddit fetching for the Community tab."""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils.telemetry import telemetry
+
+# Reddit pages listings at 100 items per request
+PAGE_SIZE = 100
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by all fetch workers.
+
+    ``rate`` tokens are added per second up to ``burst``; each listing
+    page costs one token. The default matches Reddit's 100 requests per
+    minute for OAuth clients.
+    """
+
+    def __init__(self, rate: float = 100 / 60, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# one request budget for every fetch in this process: all dashboard
+# sessions, or the ingest worker
+default_rate_limiter = RateLimiter()
+
+
+def take_new(listing, since=None):
+    """Yield items from a newest-first listing until the high-water mark.
+
+    ``since`` is ``(created_utc, fullname)`` of the newest item already
+    stored. Iteration stops at that item (or anything older), so PRAW does
+    not request further pages. Items sharing the mark's timestamp are
+    still yielded; callers drop duplicates by ``id``.
+    """
+    for item in listing:
+        if since is not None and (item.fullname == since[1] or item.created_utc < since[0]):
+            return
+        yield item
+
+
+def _locked(iterable, lock):
+    """Iterate ``iterable`` taking ``lock`` around each step (each may send a request)."""
+    iterator = iter(iterable)
+    while True:
+        with lock:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def fetch_subreddit(reddit, sub: str, limit: int = 100, rate_limiter: RateLimiter = None,
+                    since=None, lock=None) -> list:
+    """Return the newest ``limit`` submissions of r/``sub`` as row dicts.
+
+    With ``since`` (see :func:`take_new`) only items newer than the mark
+    are returned. ``lock``, if given, is held while each page is requested
+    (for a client shared between threads).
+    """
+    rows = []
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    listing = reddit.subreddit(sub).new(limit=limit)
+    if lock is not None:
+        listing = _locked(listing, lock)
+    # the rate limiter is left out of the span: the latency is Reddit's,
+    # not our own throttling
+    with telemetry.track("reddit_fetch") as span:
+        for p in take_new(listing, since):
+            rows.append({
+                "time": p.created_utc,
+                "text": f"{p.title} {p.selftext}",
+                "subreddit": sub,
+                "id": p.fullname,
+            })
+            # the next item comes from a new page request
+            if rate_limiter is not None and len(rows) % PAGE_SIZE == 0 and len(rows) < limit:
+                with span.paused():
+                    rate_limiter.acquire()
+        span.items = len(rows)
+    return rows
+
+
+def fetch_subreddits(reddit, subreddits, limit: int = 100, max_workers: int = 8,
+                     rate_limiter: RateLimiter = None, since: dict = None):
+    """Fetch several subreddits concurrently on a bounded thread pool.
+
+    praw.Reddit is not thread-safe (one requestor, token refresh and
+    rate-limit state), so ``reddit`` is preferably a ``client(worker)``
+    factory, e.g. :func:`utils.praw_script.get_script_reddit`: each pool
+    worker then requests through its own client. A single client is
+    shared under a lock, one page request at a time.
+
+    Returns ``(df, errors)``: a DataFrame with ``time``, ``text``,
+    ``subreddit`` and ``id`` columns (in the order ``subreddits`` were
+    given) and a ``{subreddit: exception}`` dict for the ones that failed,
+    so one bad subreddit does not sink the batch. ``since`` maps
+    subreddit to a high-water mark for incremental fetches. Without a
+    ``rate_limiter`` the process-wide ``default_rate_limiter`` is used,
+    so concurrent callers share one request budget.
+    """
+    subreddits = list(dict.fromkeys(subreddits))
+    since = since or {}
+    if rate_limiter is None:
+        rate_limiter = default_rate_limiter
+
+    if callable(reddit):
+        local, workers = threading.local(), itertools.count()
+
+        def init_worker():
+            local.reddit = reddit(next(workers))
+
+        def fetch(sub):
+            return fetch_subreddit(local.reddit, sub, limit, rate_limiter, since.get(sub))
+    else:
+        init_worker, lock = None, threading.Lock()
+
+        def fetch(sub):
+            return fetch_subreddit(reddit, sub, limit, rate_limiter, since.get(sub), lock)
+
+    rows, errors = [], {}
+    if subreddits:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(subreddits)), initializer=init_worker) as pool:
+            futures = {sub: pool.submit(fetch, sub) for sub in subreddits}
+            for sub, future in futures.items():
+                try:
+                    rows.extend(future.result())
+                except Exception as e:
+                    errors[sub] = e
+
+    df = pd.DataFrame(rows, columns=["time", "text", "subreddit", "id"])
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df, errors
+
+
+def fetch_user_items(user, limit: int = 200, since: dict = None):
+    """Fetch a redditor's comments and posts.
+
+    Returns ``(df, errors)`` with ``time``, ``text``, ``type``,
+    ``subreddit`` and ``id`` columns; ``errors`` maps "comment"/"post" to
+    the exception that stopped that listing, whose rows are then dropped
+    (a partial listing would move its high-water mark past the items it
+    missed). ``since`` maps the type to a high-water mark.
+    """
+    since = since or {}
+    rows, errors = [], {}
+
+    try:
+        with telemetry.track("reddit_fetch") as span:
+            for c in take_new(user.comments.new(limit=limit), since.get("comment")):
+                rows.append({
+                    "time": c.created_utc,
+                    "text": c.body,
+                    "type": "comment",
+                    "subreddit": str(c.subreddit),
+                    "id": c.fullname,
+                })
+            span.items = len(rows)
+    except Exception as e:
+        errors["comment"] = e
+        rows.clear()
+
+    n_comments = len(rows)
+    try:
+        with telemetry.track("reddit_fetch") as span:
+            for p in take_new(user.submissions.new(limit=limit), since.get("post")):
+                rows.append({
+                    "time": p.created_utc,
+                    "text": f"{p.title} {p.selftext or ''}",
+                    "type": "post",
+                    "subreddit": str(p.subreddit),
+                    "id": p.fullname,
+                })
+            span.items = len(rows) - n_comments
+    except Exception as e:
+        errors["post"] = e
+        del rows[n_comments:]
+
+    df = pd.DataFrame(rows, columns=["time", "text", "type", "subreddit", "id"])
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df, errors
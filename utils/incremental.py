@@ -0,0 +1,52 @@
+"""Incremental refresh: fetch only what is newer than the store, score only that."""
+from utils.fetcher import fetch_subreddits, fetch_user_items
+from utils.schema import score_values
+from utils.sentiment import analyze_sentiment
+from utils.volatility import VolatilityTracker
+
+COMMUNITY = "community"
+
+
+def refresh_community(reddit, store, subreddits, analyzer=None, limit=100, rate_limiter=None):
+    """Fetch and score new posts for ``subreddits`` and append them to the store.
+
+    ``reddit`` is a client or a ``client(worker)`` factory and
+    ``rate_limiter`` a shared request budget (see ``fetch_subreddits``). Returns ``(df, n_new, errors)`` where ``df``
+    holds every stored post of the requested subreddits.
+    """
+    subreddits = list(dict.fromkeys(subreddits))
+    since = {sub: store.watermark(f"r/{sub}") for sub in subreddits}
+    new_rows, errors = fetch_subreddits(reddit, subreddits, limit=limit, rate_limiter=rate_limiter, since=since)
+    if not new_rows.empty:
+        new_rows = analyze_sentiment(new_rows, analyzer)
+    written = store.append(COMMUNITY, new_rows, "subreddit", "r/")
+    return store.read(COMMUNITY, subreddits=subreddits), len(written), errors
+
+
+def refresh_user(user, store, analyzer=None, limit=200, window=5):
+    """Fetch and score a redditor's new comments/posts and append them to the store.
+
+    Volatility (rolling std per type) is computed only for the new rows,
+    continuing from the last ``window - 1`` stored scores of each type.
+    Returns ``(df, n_new, errors)``.
+    """
+    dataset = f"u/{user.name}"
+    since = {kind: store.watermark(f"{dataset}/{kind}") for kind in ("comment", "post")}
+    new_rows, errors = fetch_user_items(user, limit=limit, since=since)
+    if new_rows.empty:
+        return store.read(dataset), 0, errors
+
+    new_rows = analyze_sentiment(new_rows.sort_values("time", kind="stable").reset_index(drop=True), analyzer)
+    stored = store.read(dataset, columns=["type", "sentiment_score"])
+    new_rows["volatility"] = 0.0
+    for kind, idx in new_rows.groupby("type", observed=True).indices.items():
+        tracker = VolatilityTracker(window_size=window)
+        if not stored.empty:
+            history = score_values(stored.loc[stored["type"] == kind, "sentiment_score"])
+            tracker.update_many(history[max(len(history) - window + 1, 0):])
+        new_rows.loc[idx, "volatility"] = tracker.update_many(
+            new_rows["sentiment_score"].to_numpy()[idx]
+        )
+
+    written = store.append(dataset, new_rows, "type", f"{dataset}/")
+    return store.read(dataset), len(written), errors
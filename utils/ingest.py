@@ -0,0 +1,321 @@
+"""Background ingestion worker: poll subreddits, score new posts, write the store.
+
+    python -m utils.ingest --subreddits depression,mentalhealth,bpd --interval 300
+    python -m utils.ingest --fake --once        # offline, against a local fake Reddit
+    python -m utils.ingest --metrics-port 9108  # Prometheus scrape endpoint at /metrics
+
+Fetching and scoring run on separate threads joined by a bounded queue:
+when scoring falls behind, the fetcher blocks on the queue instead of
+piling up rows in memory. The scorer drains the queue in batches so the
+analyzer and the Parquet writer see a few large writes rather than many
+small ones. While it runs, the worker keeps a heartbeat file in the
+store's root; the dashboard skips inline fetching only for the
+subreddits of a live heartbeat and reads what this worker has stored.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from utils.backends import parse_backends
+from utils.fetcher import default_rate_limiter, fetch_subreddits
+from utils.incremental import COMMUNITY
+from utils.sentiment import SentimentCache, SentimentEnsemble, analyze_sentiment
+from utils.store import FetchStore
+from utils.telemetry import process_path, telemetry
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+HEARTBEAT_FILE = "ingest_heartbeat.json"
+# a heartbeat older than this many polling intervals (plus a minute) is stale
+HEARTBEAT_INTERVALS = 2
+# while a poll waits for queue space, the heartbeat is refreshed this often (seconds)
+HEARTBEAT_EVERY = 30.0
+
+
+def configured_subreddits() -> list:
+    """Subreddits listed in INGEST_SUBREDDITS (comma separated)."""
+    return [s.strip() for s in os.getenv("INGEST_SUBREDDITS", "").split(",") if s.strip()]
+
+
+def ingested_subreddits(root: str, now: float = None) -> list:
+    """Subreddits polled by a live ingestion worker writing to ``root`` ([] if none is running)."""
+    try:
+        with open(os.path.join(root, HEARTBEAT_FILE)) as f:
+            beat = json.load(f)
+    except (OSError, ValueError):
+        return []
+    now = time.time() if now is None else now
+    if now - beat["time"] > HEARTBEAT_INTERVALS * beat["interval"] + 60:
+        return []
+    return beat["subreddits"]
+
+
+class IngestWorker:
+    """Poll ``subreddits`` every ``interval`` seconds into ``store``.
+
+    ``reddit`` is a client or a ``client(worker)`` factory, as for
+    :func:`utils.fetcher.fetch_subreddits`.
+
+    ``queue_size`` bounds the number of fetched frames waiting to be
+    scored (backpressure); ``batch_size`` is the number of rows the scorer
+    collects before scoring and writing, and ``max_wait`` the longest it
+    holds a partial batch. A batch that fails to score or write is retried
+    with the next one; after ``max_retries`` failures in a row it is
+    dropped and its subreddits' pending marks are rolled back, so the next
+    poll fetches those posts again. With ``metrics_path`` the telemetry is
+    written there in Prometheus text format after every poll and batch.
+    """
+
+    def __init__(self, reddit, store, subreddits, analyzer=None, interval=300.0, limit=100,
+                 batch_size=500, queue_size=8, max_wait=2.0, rate_limiter=None, metrics_path=None,
+                 max_retries=3):
+        self.reddit = reddit
+        self.store = store
+        self.subreddits = list(dict.fromkeys(subreddits))
+        self.analyzer = analyzer or SentimentEnsemble()
+        self.interval = interval
+        self.limit = limit
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.metrics_path = metrics_path
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=queue_size)
+        # updated by the poll and scorer threads
+        self.stats = {"polls": 0, "fetched": 0, "written": 0, "batches": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        # marks of rows fetched but not yet written, so the next poll
+        # does not fetch them again while they wait in the queue
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        # rows of the last failed batch and how often in a row it failed
+        self._retry = None
+        self._failures = 0
+        self._stop = threading.Event()
+        self._scorer = None
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for key, n in deltas.items():
+                self.stats[key] += n
+
+    def _since(self, sub):
+        stored = self.store.watermark(f"r/{sub}")
+        with self._pending_lock:
+            pending = self._pending.get(sub)
+        if stored is None or (pending is not None and pending[0] > stored[0]):
+            return pending
+        return stored
+
+    def poll_once(self):
+        """Fetch new posts of every subreddit and queue them for scoring."""
+        since = {sub: self._since(sub) for sub in self.subreddits}
+        df, errors = fetch_subreddits(
+            self.reddit, self.subreddits, limit=self.limit,
+            rate_limiter=self.rate_limiter, since=since,
+        )
+        for sub, e in errors.items():
+            log.warning("r/%s: %s", sub, e)
+        self._count(polls=1, errors=len(errors), fetched=len(df))
+        self._export_metrics()
+        if df.empty:
+            return 0
+
+        newest = df.loc[df.groupby("subreddit", observed=True)["time"].idxmax()]
+        with self._pending_lock:
+            for _, row in newest.iterrows():
+                self._pending[row["subreddit"]] = (row["time"].timestamp(), row["id"])
+        # blocks while the scorer is behind, keeping the heartbeat fresh so
+        # the dashboard does not start fetching these subreddits itself
+        while True:
+            try:
+                self.queue.put(df, timeout=HEARTBEAT_EVERY)
+                break
+            except queue.Full:
+                log.warning("scorer is behind; waiting for queue space")
+                self._heartbeat()
+        log.info("queued %d posts (queue depth %d)", len(df), self.queue.qsize())
+        return len(df)
+
+    def _score_loop(self):
+        done = False
+        # after stop, a failed batch still gets its retries
+        while not done or self._retry is not None:
+            batch = [] if self._retry is None else [self._retry]
+            rows = sum(len(item) for item in batch)
+            # a failed batch waits at most max_wait for new rows to join it
+            deadline = time.monotonic() + self.max_wait if batch else None
+            while rows < self.batch_size:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    done = True
+                    break
+                batch.append(item)
+                rows += len(item)
+                deadline = deadline or time.monotonic() + self.max_wait
+            if batch:
+                self._write_batch(pd.concat(batch, ignore_index=True))
+
+    def _write_batch(self, df):
+        try:
+            scored = analyze_sentiment(df.copy(), self.analyzer)
+            with telemetry.track("store_append", items=len(scored)):
+                written = self.store.append(COMMUNITY, scored, "subreddit", "r/")
+        except Exception:
+            log.exception("failed to score/write %d posts", len(df))
+            self._count(errors=1)
+            self._failed(df)
+            return
+        finally:
+            self._export_metrics()
+        self._retry, self._failures = None, 0
+        self._count(batches=1, written=len(written))
+        log.info("wrote %d posts", len(written))
+
+    def _failed(self, df):
+        """Keep ``df`` for the next batch, or give up on it and let the next poll refetch it."""
+        self._failures += 1
+        if self._failures <= self.max_retries:
+            self._retry = df
+        else:
+            self._give_up(df)
+
+    def _give_up(self, df):
+        log.error("dropping %d posts after %d failed writes; they will be fetched again",
+                  len(df), self._failures)
+        # every batch since the first failure failed, so the stored marks are
+        # still older than these rows
+        with self._pending_lock:
+            for sub in df["subreddit"].unique():
+                self._pending.pop(sub, None)
+        self._retry, self._failures = None, 0
+
+    def _heartbeat(self):
+        path = os.path.join(self.store.root, HEARTBEAT_FILE)
+        beat = {"time": time.time(), "interval": self.interval, "subreddits": self.subreddits}
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=self.store.root, suffix=".tmp", delete=False) as f:
+                json.dump(beat, f)
+            os.replace(f.name, path)
+        except OSError as e:
+            log.warning("could not write heartbeat to %s: %s", path, e)
+
+    def _clear_heartbeat(self):
+        try:
+            os.remove(os.path.join(self.store.root, HEARTBEAT_FILE))
+        except OSError:
+            pass
+
+    def _export_metrics(self):
+        if self.metrics_path:
+            try:
+                telemetry.write_prometheus(self.metrics_path)
+            except OSError as e:
+                log.warning("could not write metrics to %s: %s", self.metrics_path, e)
+
+    def start(self):
+        """Start the scorer thread."""
+        if self._scorer is None:
+            self._scorer = threading.Thread(target=self._score_loop, name="ingest-scorer", daemon=True)
+            self._scorer.start()
+        return self
+
+    def stop(self):
+        """Flush queued posts and stop the scorer."""
+        self._stop.set()
+        if self._scorer is not None:
+            self.queue.put(_STOP)
+            self._scorer.join()
+            self._scorer = None
+
+    def run(self, max_polls=None):
+        """Poll on schedule until :meth:`stop` is called or ``max_polls`` is reached."""
+        self.start()
+        self._heartbeat()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.poll_once()
+                except Exception:
+                    log.exception("poll failed")
+                    self._count(errors=1)
+                self._heartbeat()
+                if max_polls is not None and self.stats["polls"] >= max_polls:
+                    break
+                self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+        finally:
+            self.stop()
+            self._clear_heartbeat()
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll subreddits and store scored posts.")
+    parser.add_argument("--subreddits", default=",".join(configured_subreddits()) or "depression,mentalhealth,bpd")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("INGEST_INTERVAL", "300")))
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--data-dir", default=os.getenv("DATA_DIR", "data"))
+    parser.add_argument("--once", action="store_true", help="poll once, flush and exit")
+    parser.add_argument("--fake", action="store_true", help="use a local fake Reddit with synthetic posts")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")),
+                        help="serve Prometheus metrics at /metrics on this port (0: off)")
+    parser.add_argument("--metrics-path", default=os.getenv("METRICS_PATH"),
+                        help="write Prometheus metrics after every poll and batch, to this path "
+                             "with .ingest before the extension")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    telemetry.process = "ingest"
+    if args.metrics_port:
+        telemetry.serve(args.metrics_port)
+        log.info("serving metrics on :%d/metrics", args.metrics_port)
+
+    subreddits = [s.strip() for s in args.subreddits.split(",") if s.strip()]
+    server = None
+    if args.fake:
+        from utils.fake_reddit import FakeRedditServer, make_posts
+        server = FakeRedditServer({sub: make_posts(sub, args.limit) for sub in subreddits}).start()
+
+        def reddit(worker):
+            # a client per fetch worker (praw.Reddit is not thread-safe)
+            return server.reddit()
+    else:
+        from utils.praw_script import get_script_reddit
+        reddit = get_script_reddit
+
+    analyzer = SentimentEnsemble(
+        cache=SentimentCache(path=os.getenv("SENTIMENT_CACHE_PATH")),
+        workers=int(os.getenv("SENTIMENT_WORKERS", "1")),
+        backends=parse_backends(os.getenv("SENTIMENT_BACKENDS")),
+    )
+    worker = IngestWorker(
+        reddit, FetchStore(args.data_dir), subreddits, analyzer=analyzer,
+        interval=args.interval, limit=args.limit, batch_size=args.batch_size,
+        metrics_path=process_path(args.metrics_path, "ingest") if args.metrics_path else None,
+    )
+    try:
+        stats = worker.run(max_polls=1 if args.once else None)
+        log.info("stopped: %s", stats)
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        analyzer.close()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
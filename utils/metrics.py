@@ -1,7 +1,9 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from scipy import stats
+
+from utils.schema import LABEL_DTYPE, score_values
+from utils.telemetry import telemetry
 
 
 def calculate_comprehensive_metrics(df: pd.DataFrame) -> dict:
@@ -10,177 +12,341 @@ def calculate_comprehensive_metrics(df: pd.DataFrame) -> dict:
     if df.empty or "sentiment_score" not in df.columns:
         return {}
 
-    # Ensure data is sorted by time
-    if "time" in df.columns:
-        df = df.sort_values("time")
-
-    # Basic Statistics
-    mean_sentiment = df["sentiment_score"].mean()
-    sentiment_std = df["sentiment_score"].std()
-    sentiment_range = df["sentiment_score"].max() - df["sentiment_score"].min()
-
-    # Volatility Metrics
-    volatility_score = sentiment_std
-    emotional_swings = count_emotional_swings(df["sentiment_score"])
-    swing_frequency = emotional_swings / len(df) if len(df) > 0 else 0
-
-    # Stability Analysis
-    stability_periods = identify_stability_periods(df)
-    avg_stability_duration = (
-        np.mean([p["duration"] for p in stability_periods]) if stability_periods else 0
-    )
-    stability_ratio = (
-        sum([p["duration"] for p in stability_periods]) / len(df)
-        if stability_periods
-        else 0
-    )
-
-    # Trend Analysis
-    if len(df) > 1:
-        trend_slope, trend_p_value = calculate_trend(df)
-        trend_direction = (
-            "Improving"
-            if trend_slope > 0.01
-            else "Declining"
-            if trend_slope < -0.01
-            else "Stable"
+    with telemetry.track("metrics_comprehensive", items=len(df)):
+        # Ensure data is sorted by time
+        times = None
+        if "time" in df.columns:
+            if not df["time"].is_monotonic_increasing:
+                df = df.sort_values("time")
+            times = df["time"].to_numpy()
+
+        acc = MetricsAccumulator()
+        scores = _as_scores(df)
+        for i in range(0, len(scores), MetricsAccumulator.CHUNK_ROWS):
+            acc.update(
+                scores[i:i + MetricsAccumulator.CHUNK_ROWS],
+                None if times is None else times[i:i + MetricsAccumulator.CHUNK_ROWS],
+            )
+        return acc.result()
+
+
+def calculate_streaming_metrics(chunks) -> dict:
+    """Calculate dashboard metrics over an iterable of time-ordered DataFrames.
+
+    Each chunk needs a ``sentiment_score`` column and may carry ``time``;
+    only one chunk is held in memory at a time, e.g.
+    ``calculate_streaming_metrics(pd.read_csv(path, chunksize=100_000, parse_dates=["time"]))``.
+    """
+    acc = MetricsAccumulator()
+    for chunk in chunks:
+        if chunk.empty or "sentiment_score" not in chunk.columns:
+            continue
+        acc.update(
+            _as_scores(chunk),
+            chunk["time"].to_numpy() if "time" in chunk.columns else None,
         )
-    else:
-        trend_slope, trend_p_value, trend_direction = 0, 1, "Insufficient Data"
-
-    # Risk Indicators
-    crisis_risk = calculate_crisis_risk(df)
-    negative_streaks = count_negative_streaks(df["sentiment_score"])
-    extreme_events = count_extreme_events(df["sentiment_score"])
-
-    # Time-based Patterns
-    daily_pattern = analyze_daily_patterns(df) if "time" in df.columns else {}
-
-    return {
-        # Core Volatility Metrics
-        "volatility_score": round(volatility_score, 3),
-        "emotional_swings": emotional_swings,
-        "swing_frequency": round(swing_frequency, 3),
-        "sentiment_range": round(sentiment_range, 3),
-
-        # Stability Metrics
-        "avg_stability_duration": round(avg_stability_duration, 1),
-        "stability_ratio": round(stability_ratio, 3),
-        "stability_periods_count": len(stability_periods),
-
-        # Trend Analysis
-        "trend_direction": trend_direction,
-        "trend_slope": round(trend_slope, 4),
-        "trend_significance": "Significant"
-        if trend_p_value < 0.05
-        else "Not Significant",
-
-        # Risk Assessment
-        "crisis_risk": crisis_risk,
-        "negative_streaks": negative_streaks,
-        "extreme_events": extreme_events,
-
-        # Basic Stats
-        "mean_sentiment": round(mean_sentiment, 3),
-        "posts_analyzed": len(df),
-        "time_span_days": calculate_time_span(df)
-        if "time" in df.columns
-        else 0,
-
-        # Distribution
-        "positive_ratio": round((df["sentiment_score"] > 0.1).mean(), 3),
-        "negative_ratio": round((df["sentiment_score"] < -0.1).mean(), 3),
-        "neutral_ratio": round(
-            (df["sentiment_score"].between(-0.1, 0.1)).mean(), 3
-        ),
-    }
+    return acc.result()
+
+
+class MetricsAccumulator:
+    """Single-pass accumulator for :func:`calculate_comprehensive_metrics`.
+
+    Feed time-ordered score chunks with :meth:`update`; :meth:`result`
+    returns the same dict as the batch function. Mean/variance and the
+    regression sums are merged per chunk with Welford/Chan updates, and
+    swing, stability and negative-streak runs carry across chunk
+    boundaries, so the full series never has to be held in memory.
+    """
+
+    CHUNK_ROWS = 65_536
+    RECENT = 10
+
+    def __init__(self, swing_threshold=0.3, stability_threshold=0.15):
+        self.swing_threshold = swing_threshold
+        self.stability_threshold = stability_threshold
+        self.n = 0
+        # Welford moments of y (scores) and x (position), plus co-moment
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.mean_x = 0.0
+        self.m2_x = 0.0
+        self.c_xy = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.swings = 0
+        self.last = None
+        self.recent = np.empty(0)
+        # stability runs: start of the open run, closed run count/total
+        self.run_start = 0
+        self.stable_count = 0
+        self.stable_total = 0
+        # negative streaks: open run length and best so far
+        self.neg_run = 0
+        self.neg_max = 0
+        self.extreme_positive = 0
+        self.extreme_negative = 0
+        self.crisis_negative = 0
+        self.positive = 0
+        self.negative = 0
+        self.neutral = 0
+        self.time_min = None
+        self.time_max = None
+
+    def update(self, scores, times=None):
+        """Add the next chunk of scores (and optionally their timestamps)."""
+        y = _as_scores(scores)
+        k = len(y)
+        if k == 0:
+            return self
+        offset = self.n
+
+        # moments (Chan et al. pairwise merge of chunk statistics)
+        x = np.arange(offset, offset + k, dtype=np.float64)
+        mean_b, mean_xb = y.mean(), x.mean()
+        dy, dx = y - mean_b, x - mean_xb
+        m2_b, m2_xb, c_b = dy @ dy, dx @ dx, dx @ dy
+        n = offset + k
+        delta, delta_x = mean_b - self.mean, mean_xb - self.mean_x
+        self.mean += delta * k / n
+        self.mean_x += delta_x * k / n
+        self.m2 += m2_b + delta * delta * offset * k / n
+        self.m2_x += m2_xb + delta_x * delta_x * offset * k / n
+        self.c_xy += c_b + delta_x * delta * offset * k / n
+        self.n = n
+
+        self.min = min(self.min, y.min())
+        self.max = max(self.max, y.max())
+
+        # consecutive differences, including the step across the boundary
+        steps = np.abs(np.diff(y if self.last is None else np.concatenate(([self.last], y))))
+        self.swings += int(np.count_nonzero(steps > self.swing_threshold))
+        first = offset + (0 if self.last is None else -1)
+        self.last = y[-1]
+        self.recent = np.concatenate((self.recent, y))[-self.RECENT:]
+
+        # stability runs are the segments between large steps
+        breaks = np.flatnonzero(steps > self.stability_threshold) + first + 1
+        if len(breaks):
+            starts = np.concatenate(([self.run_start], breaks[:-1]))
+            durations = breaks - starts
+            durations = durations[durations >= 3]
+            self.stable_count += len(durations)
+            self.stable_total += int(durations.sum())
+            self.run_start = int(breaks[-1])
+
+        # negative streaks, extending the open run from the previous chunk
+        negative = y < -0.1
+        if negative.any():
+            edges = np.diff(np.concatenate(([0], negative.view(np.int8), [0])))
+            runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+            if negative[0]:
+                runs[0] += self.neg_run
+            self.neg_max = max(self.neg_max, int(runs.max()))
+            self.neg_run = int(runs[-1]) if negative[-1] else 0
+        else:
+            self.neg_run = 0
+
+        positive = y > 0.1
+        self.negative += int(np.count_nonzero(negative))
+        self.positive += int(np.count_nonzero(positive))
+        self.neutral += int(np.count_nonzero((y >= -0.1) & (y <= 0.1)))
+        self.extreme_positive += int(np.count_nonzero(y > 0.8))
+        self.extreme_negative += int(np.count_nonzero(y < -0.8))
+        self.crisis_negative += int(np.count_nonzero(y < -0.7))
+
+        if times is not None and len(times):
+            times = np.asarray(times)
+            lo, hi = times.min(), times.max()
+            self.time_min = lo if self.time_min is None else min(self.time_min, lo)
+            self.time_max = hi if self.time_max is None else max(self.time_max, hi)
+        return self
+
+    def _trend(self):
+        """Return (slope, p_value) of scores against position, as linregress would."""
+        if self.n < 3 or self.m2_x == 0:
+            return 0, 1
+        slope = self.c_xy / self.m2_x
+        r = 0.0 if self.m2 == 0 else self.c_xy / np.sqrt(self.m2_x * self.m2)
+        r = min(max(r, -1.0), 1.0)
+        dof = self.n - 2
+        tiny = 1.0e-20
+        t = r * np.sqrt(dof / ((1.0 - r + tiny) * (1.0 + r + tiny)))
+        from scipy import stats  # imported on first use; it costs ~1s at startup
+
+        return slope, 2 * stats.t.sf(np.abs(t), dof)
+
+    def _crisis_risk(self, std):
+        risk_score = 0
+        if self.n > 1 and std > 0.5:
+            risk_score += 2
+        if len(self.recent) > 3 and self.recent.mean() < -0.3:
+            risk_score += 2
+        if self.crisis_negative > self.n * 0.2:
+            risk_score += 1
+        if self.neg_max > 5:
+            risk_score += 1
+
+        if risk_score >= 4:
+            return "High"
+        elif risk_score >= 2:
+            return "Medium"
+        else:
+            return "Low"
+
+    def result(self) -> dict:
+        """Return the metrics for everything fed so far."""
+        n = self.n
+        if n == 0:
+            return {}
+
+        sentiment_std = np.sqrt(self.m2 / (n - 1)) if n > 1 else np.nan
+
+        # close the open stability run without mutating state
+        stable_count, stable_total = self.stable_count, self.stable_total
+        if n >= 3 and n - self.run_start >= 3:
+            stable_count += 1
+            stable_total += n - self.run_start
+
+        if n > 1:
+            trend_slope, trend_p_value = self._trend()
+            trend_direction = (
+                "Improving"
+                if trend_slope > 0.01
+                else "Declining"
+                if trend_slope < -0.01
+                else "Stable"
+            )
+        else:
+            trend_slope, trend_p_value, trend_direction = 0, 1, "Insufficient Data"
+
+        time_span_days = 0
+        if self.time_min is not None:
+            time_span_days = (pd.Timestamp(self.time_max) - pd.Timestamp(self.time_min)).days
+
+        return {
+            # Core Volatility Metrics
+            "volatility_score": round(sentiment_std, 3),
+            "emotional_swings": self.swings,
+            "swing_frequency": round(self.swings / n, 3),
+            "sentiment_range": round(self.max - self.min, 3),
+
+            # Stability Metrics
+            "avg_stability_duration": round(np.float64(stable_total) / stable_count, 1)
+            if stable_count
+            else 0,
+            "stability_ratio": round(stable_total / n, 3) if stable_count else 0,
+            "stability_periods_count": stable_count,
+
+            # Trend Analysis
+            "trend_direction": trend_direction,
+            "trend_slope": round(trend_slope, 4),
+            "trend_significance": "Significant"
+            if trend_p_value < 0.05
+            else "Not Significant",
+
+            # Risk Assessment
+            "crisis_risk": self._crisis_risk(sentiment_std),
+            "negative_streaks": self.neg_max,
+            "extreme_events": self.extreme_positive + self.extreme_negative,
+
+            # Basic Stats
+            "mean_sentiment": round(self.mean, 3),
+            "posts_analyzed": n,
+            "time_span_days": time_span_days,
+
+            # Distribution
+            "positive_ratio": round(np.float64(self.positive) / n, 3),
+            "negative_ratio": round(np.float64(self.negative) / n, 3),
+            "neutral_ratio": round(np.float64(self.neutral) / n, 3),
+        }
+
+
+def _as_scores(data) -> np.ndarray:
+    """Return sentiment scores as a contiguous float64 array.
+
+    Accepts a DataFrame with a ``sentiment_score`` column, a Series or any
+    array-like, so sub-metrics can share one array instead of re-reading
+    the column.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data["sentiment_score"]
+    return np.ascontiguousarray(score_values(data))
 
 
 def count_emotional_swings(sentiment_series, threshold=0.3):
     """Count significant emotional changes between consecutive posts."""
-    if len(sentiment_series) < 2:
+    scores = _as_scores(sentiment_series)
+    if len(scores) < 2:
         return 0
 
-    swings = 0
-    for i in range(1, len(sentiment_series)):
-        if abs(sentiment_series.iloc[i] - sentiment_series.iloc[i - 1]) > threshold:
-            swings += 1
-    return swings
+    return int(np.count_nonzero(np.abs(np.diff(scores)) > threshold))
 
 
 def identify_stability_periods(df, stability_threshold=0.15):
-    """Identify periods of emotional stability."""
-    if len(df) < 3:
-        return []
-
-    stable_periods = []
-    current_period_start = 0
+    """Identify periods of emotional stability.
 
-    for i in range(1, len(df)):
-        sentiment_diff = abs(
-            df["sentiment_score"].iloc[i] - df["sentiment_score"].iloc[i - 1]
-        )
+    A period is a run of at least 3 posts with no step larger than
+    ``stability_threshold`` between consecutive posts.
+    """
+    scores = _as_scores(df)
+    if len(scores) < 3:
+        return []
 
-        if sentiment_diff > stability_threshold:
-            if i - current_period_start >= 3:  # Minimum 3 posts for stability
-                stable_periods.append(
-                    {
-                        "start_index": current_period_start,
-                        "end_index": i - 1,
-                        "duration": i - current_period_start,
-                        "avg_sentiment": df["sentiment_score"].iloc[
-                            current_period_start:i
-                        ].mean(),
-                    }
-                )
-            current_period_start = i
-
-    if len(df) - current_period_start >= 3:
-        stable_periods.append(
-            {
-                "start_index": current_period_start,
-                "end_index": len(df) - 1,
-                "duration": len(df) - current_period_start,
-                "avg_sentiment": df["sentiment_score"]
-                .iloc[current_period_start:]
-                .mean(),
-            }
-        )
+    breaks = np.flatnonzero(np.abs(np.diff(scores)) > stability_threshold) + 1
+    starts = np.concatenate(([0], breaks))
+    stops = np.concatenate((breaks, [len(scores)]))
+    keep = (stops - starts) >= 3  # Minimum 3 posts for stability
 
-    return stable_periods
+    return [
+        {
+            "start_index": start,
+            "end_index": stop - 1,
+            "duration": stop - start,
+            "avg_sentiment": scores[start:stop].mean(),
+        }
+        for start, stop in zip(starts[keep].tolist(), stops[keep].tolist())
+    ]
 
 
 def calculate_trend(df):
     """Calculate overall sentiment trend using linear regression."""
-    if len(df) < 3:
+    y = _as_scores(df)
+    if len(y) < 3:
         return 0, 1
 
-    x = np.arange(len(df))
-    y = df["sentiment_score"].values
+    x = np.arange(len(y))
+
+    from scipy import stats
 
     slope, _, _, p_value, _ = stats.linregress(x, y)
     return slope, p_value
 
 
-def calculate_crisis_risk(df):
-    """Calculate crisis risk based on multiple factors."""
-    if df.empty:
+def calculate_crisis_risk(df, negative_streak=None):
+    """Calculate crisis risk based on multiple factors.
+
+    ``negative_streak`` may be passed in when the caller has already
+    computed :func:`count_negative_streaks` for the same scores.
+    """
+    scores = _as_scores(df)
+    if len(scores) == 0:
         return "Low"
 
     risk_score = 0
 
-    if df["sentiment_score"].std() > 0.5:
+    if len(scores) > 1 and scores.std(ddof=1) > 0.5:
         risk_score += 2
 
-    recent_data = df.tail(10)
-    if len(recent_data) > 3 and recent_data["sentiment_score"].mean() < -0.3:
+    recent_data = scores[-10:]
+    if len(recent_data) > 3 and recent_data.mean() < -0.3:
         risk_score += 2
 
-    extreme_negative = (df["sentiment_score"] < -0.7).sum()
-    if extreme_negative > len(df) * 0.2:
+    extreme_negative = np.count_nonzero(scores < -0.7)
+    if extreme_negative > len(scores) * 0.2:
         risk_score += 1
 
-    negative_streak = count_negative_streaks(df["sentiment_score"])
+    if negative_streak is None:
+        negative_streak = count_negative_streaks(scores)
     if negative_streak > 5:
         risk_score += 1
 
@@ -194,27 +360,23 @@ def calculate_crisis_risk(df):
 
 def count_negative_streaks(sentiment_series):
     """Count maximum consecutive negative posts."""
-    if sentiment_series.empty:
+    negative = _as_scores(sentiment_series) < -0.1
+    if not negative.any():
         return 0
 
-    max_streak, current_streak = 0, 0
-    for sentiment_score in sentiment_series:
-        if sentiment_score < -0.1:
-            current_streak += 1
-            max_streak = max(max_streak, current_streak)
-        else:
-            current_streak = 0
-
-    return max_streak
+    # run lengths of True from the edges of the padded mask
+    edges = np.diff(np.concatenate(([0], negative.view(np.int8), [0])))
+    return int((np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)).max())
 
 
 def count_extreme_events(sentiment_series):
     """Count extremely positive or negative posts."""
-    if sentiment_series.empty:
+    scores = _as_scores(sentiment_series)
+    if len(scores) == 0:
         return 0
 
-    extreme_positive = (sentiment_series > 0.8).sum()
-    extreme_negative = (sentiment_series < -0.8).sum()
+    extreme_positive = np.count_nonzero(scores > 0.8)
+    extreme_negative = np.count_nonzero(scores < -0.8)
 
     return extreme_positive + extreme_negative
 
@@ -233,13 +395,13 @@ def analyze_daily_patterns(df):
     if df.empty or "time" not in df.columns:
         return {}
 
-    df = df.copy()
-    df["hour"] = df["time"].dt.hour
+    hour = df["time"].dt.hour
+    scores = df["sentiment_score"]
 
-    morning = df[df["hour"].between(6, 12)]["sentiment_score"].mean()
-    afternoon = df[df["hour"].between(12, 18)]["sentiment_score"].mean()
-    evening = df[df["hour"].between(18, 24)]["sentiment_score"].mean()
-    night = df[df["hour"] < 6]["sentiment_score"].mean()
+    morning = scores[hour.between(6, 12)].mean()
+    afternoon = scores[hour.between(12, 18)].mean()
+    evening = scores[hour.between(18, 24)].mean()
+    night = scores[hour < 6].mean()
 
     return {
         "morning_avg": round(morning, 3) if not pd.isna(morning) else 0,
@@ -249,9 +411,35 @@ def analyze_daily_patterns(df):
     }
 
 
-def display_metrics(df):
-    """Display metrics in Streamlit dashboard."""
-    metrics = calculate_comprehensive_metrics(df)
+def label_counts(scores, groups=None) -> pd.DataFrame:
+    """Posts per group and sentiment label, counted in one ``np.bincount`` pass.
+
+    ``groups`` is aligned with ``scores`` (a categorical column is
+    factorized on its codes), or one label for all rows. Rows are groups in
+    order of first appearance; columns are ``negative``/``neutral``/
+    ``positive`` by the ±0.1 thresholds. NaN scores are not counted.
+    """
+    scores = _as_scores(scores)
+    if groups is None or np.isscalar(groups):
+        codes, uniques = np.zeros(len(scores), dtype=np.intp), pd.Index([groups])
+    else:
+        codes, uniques = pd.factorize(groups)
+    label = (scores > 0.1).astype(np.intp) - (scores < -0.1) + 1
+    keep = (codes >= 0) & ~np.isnan(scores)
+    counts = np.bincount(codes[keep] * 3 + label[keep], minlength=3 * len(uniques)).reshape(-1, 3)
+    return pd.DataFrame(counts, index=uniques, columns=LABEL_DTYPE.categories)
+
+
+def emotion_distribution(counts: pd.DataFrame, id_name: str) -> pd.DataFrame:
+    """Long ``id_name``/``Emotion``/``Count`` rows of :func:`label_counts` output, for a grouped bar chart."""
+    wide = counts[["positive", "neutral", "negative"]].rename(columns=str.capitalize)
+    return wide.rename_axis(id_name).reset_index().melt(id_vars=id_name, var_name="Emotion", value_name="Count")
+
+
+def display_metrics(df, metrics=None):
+    """Display metrics in Streamlit dashboard (``metrics`` if already computed for ``df``)."""
+    if metrics is None:
+        metrics = calculate_comprehensive_metrics(df)
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Volatility Score", metrics.get("volatility_score", 0))
@@ -1,6 +1,7 @@
-import praw
 import os
 
+from utils.reddit_client import registry
+
 def get_oauth_reddit():
     """
     Returns a PRAW Reddit instance configured for OAuth login.
@@ -8,10 +9,28 @@ def get_oauth_reddit():
     - OAUTH_CLIENT_ID
     - OAUTH_CLIENT_SECRET
     - REDIRECT_URI (must match your Reddit app settings)
+    A new instance is built on every call: ``auth.authorize`` turns the
+    client into the authorizing user's, so it must never be shared
+    between sessions. Only the per-token clients of
+    :func:`get_user_reddit` are cached.
     """
-    return praw.Reddit(
+    return registry.new(
         client_id=os.getenv("OAUTH_CLIENT_ID"),
         client_secret=os.getenv("OAUTH_CLIENT_SECRET"),
         redirect_uri=os.getenv("REDIRECT_URI", "http://localhost:8501/"),
         user_agent="VolatilityApp by u/imaryapiyush99",
     )
+
+def get_user_reddit(refresh_token):
+    """
+    Returns a PRAW Reddit instance acting as the user who granted
+    ``refresh_token``. Cached per token, so reruns reuse the same client
+    and its access token is only refreshed when it expires.
+    """
+    return registry.get(
+        "user",
+        client_id=os.getenv("OAUTH_CLIENT_ID"),
+        client_secret=os.getenv("OAUTH_CLIENT_SECRET"),
+        refresh_token=refresh_token,
+        user_agent="VolatilityApp by u/imaryapiyush99",
+    )
@@ -1,7 +1,8 @@
-import praw
 import os
 
-def get_script_reddit():
+from utils.reddit_client import registry
+
+def get_script_reddit(worker: int = 0):
     """
     Returns a PRAW Reddit instance using script authentication.
     Requires environment variables:
@@ -9,8 +10,12 @@ def get_script_reddit():
     - SCRIPT_CLIENT_SECRET
     - REDDIT_USERNAME
     - REDDIT_PASSWORD
+    The instance is cached in the shared client registry, one per
+    ``worker`` (pass the function itself to ``fetch_subreddits``).
     """
-    return praw.Reddit(
+    return registry.get(
+        "script",
+        worker=worker,
         client_id=os.getenv("SCRIPT_CLIENT_ID"),
         client_secret=os.getenv("SCRIPT_CLIENT_SECRET"),
         username=os.getenv("REDDIT_USERNAME"),
@@ -0,0 +1,114 @@
+"""Sorted, read-only scored rows with cached derived views, shared by the dashboard pages."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import calculate_comprehensive_metrics, label_counts
+from utils.volatility import grouped_rolling_std
+
+
+class PreparedDataset:
+    """Scored rows sorted by time once, indexed by time and ``group``, with cached views.
+
+    The frame and every view are shared between reruns and sessions
+    (see ``utils.resources.load_prepared_community``), so callers must not
+    modify them: select, slice or ``assign`` instead. Views are computed
+    on first use and kept for the lifetime of the object; a new store
+    version builds a new object rather than updating this one.
+    """
+
+    def __init__(self, df: pd.DataFrame, group: str = "subreddit"):
+        if not df.empty and not df["time"].is_monotonic_increasing:
+            df = df.sort_values("time", kind="stable")
+        self.frame = df.reset_index(drop=True)
+        self.group = group if group in df.columns else None
+        self._times = self.frame["time"].to_numpy() if "time" in df.columns else None
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def _view(self, key, compute):
+        view = self._views.get(key)
+        if view is None:
+            view = compute()
+            with self._lock:
+                view = self._views.setdefault(key, view)
+        return view
+
+    # ---------- Indexes ----------
+    def between(self, start=None, end=None) -> pd.DataFrame:
+        """Rows with ``start <= time <= end``, as a slice of the frame (no copy)."""
+        lo = 0 if start is None else np.searchsorted(self._times, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(self) if end is None else np.searchsorted(self._times, np.datetime64(pd.Timestamp(end)), "right")
+        return self.frame.iloc[lo:hi]
+
+    def _group_index(self):
+        """``(values, positions)``: group values and each one's time-ordered row positions."""
+        def compute():
+            codes, values = pd.factorize(self.frame[self.group], sort=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            return list(values), [order[bounds[i]:bounds[i + 1]] for i in range(len(values))]
+        return self._view("group_index", compute)
+
+    def groups(self) -> list:
+        """Distinct values of the group column, sorted."""
+        return self._group_index()[0] if self.group else []
+
+    def for_group(self, value) -> pd.DataFrame:
+        """Rows of one group, in time order."""
+        values, positions = self._group_index()
+        return self.frame.iloc[positions[values.index(value)]]
+
+    # ---------- Cached views ----------
+    def metrics(self) -> dict:
+        """``calculate_comprehensive_metrics`` of the rows (already sorted, so not re-sorted)."""
+        return self._view("metrics", lambda: calculate_comprehensive_metrics(self.frame))
+
+    def volatility(self, window: int = 5) -> np.ndarray:
+        """Rolling std of ``sentiment_score`` within each group, aligned with the frame."""
+        def compute():
+            groups = self.frame[self.group] if self.group else None
+            vol = grouped_rolling_std(self.frame["sentiment_score"], groups, window=window)
+            vol.flags.writeable = False
+            return vol
+        return self._view(("volatility", window), compute)
+
+    def with_volatility(self, window: int = 5) -> pd.DataFrame:
+        """The frame plus a per-group ``volatility`` column (built once per window)."""
+        return self._view(("with_volatility", window),
+                          lambda: self.frame.assign(volatility=self.volatility(window)))
+
+    def _column(self, column):
+        """``column`` of the frame; ``"volatility"`` falls back to the default-window view."""
+        if column not in self.frame.columns and column == "volatility":
+            return pd.Series(self.volatility(), name=column)
+        return self.frame[column]
+
+    def binned_means(self, freq: str, column: str = "sentiment_score") -> pd.DataFrame:
+        """``time``/``column`` mean per ``freq`` bin over all rows, empty bins included."""
+        def compute():
+            frame = pd.DataFrame({"time": self.frame["time"], column: self._column(column)})
+            return frame.groupby(pd.Grouper(key="time", freq=freq))[column].mean().reset_index()
+        return self._view(("binned", freq, column), compute)
+
+    def daily_means(self, column: str = "sentiment_score", by_group: bool = False) -> pd.DataFrame:
+        """``time`` (midnight), optionally the group, and the mean of ``column`` per day with rows."""
+        def compute():
+            keys = [self.frame["time"].dt.normalize()]
+            if by_group and self.group:
+                keys.insert(0, self.frame[self.group])
+            return self._column(column).groupby(keys, observed=True).mean().reset_index()
+        return self._view(("daily", column, by_group), compute)
+
+    def label_counts(self) -> pd.DataFrame:
+        """Rows per group (index) and sentiment label (columns ``negative``/``neutral``/``positive``)."""
+        groups = self.frame[self.group] if self.group else None
+        return self._view("label_counts", lambda: label_counts(self.frame["sentiment_score"], groups))
@@ -1,12 +1,157 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
 import praw
+import prawcore
+import requests
 from dotenv import load_dotenv
 
+from utils.telemetry import telemetry
+
 # Load environment variables from .env
 load_dotenv()
 
+
+class ClientStats:
+    """Request count, error count and recent latencies for one client."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(failed)
+            self.total_seconds += seconds
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            requests_, errors, total = self.requests, self.errors, self.total_seconds
+        p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (0.0, 0.0)
+        return {
+            "requests": requests_,
+            "errors": errors,
+            "avg_latency_ms": round(total * 1000 / requests_, 1) if requests_ else 0.0,
+            "p50_latency_ms": round(float(p50), 1),
+            "p95_latency_ms": round(float(p95), 1),
+        }
+
+
+class TimedRequestor(prawcore.Requestor):
+    """prawcore Requestor that records every HTTP round trip in a ClientStats.
+
+    Round trips are also counted, across all clients, as the
+    ``reddit_request`` operation in ``utils.telemetry``.
+    """
+
+    def __init__(self, *args, stats: ClientStats = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or ClientStats()
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = super().request(*args, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            seconds = time.perf_counter() - start
+            self.stats.record(seconds, failed)
+            telemetry.timer("reddit_request").record(seconds, 1, failed)
+
+
+class RedditClientRegistry:
+    """Process-wide cache of authenticated praw.Reddit clients.
+
+    Clients are keyed by a hash of their credentials, so Streamlit reruns
+    and sessions that use the same credentials share one instance (and
+    its access token). All clients send requests through one
+    ``requests.Session`` so keep-alive connections are pooled. PRAW only
+    fetches or refreshes an access token when a request needs one, so
+    building a client here costs no network round trip.
+    """
+
+    def __init__(self, max_clients: int = 256, pool_size: int = 32):
+        self.max_clients = max_clients
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(credentials: dict) -> str:
+        items = sorted((k, str(v)) for k, v in credentials.items())
+        return hashlib.sha256(repr(items).encode()).hexdigest()
+
+    def new(self, **credentials) -> praw.Reddit:
+        """Return a client that is not cached (its auth state is its own), on the pooled session."""
+        return praw.Reddit(
+            requestor_class=TimedRequestor,
+            requestor_kwargs={"session": self.session},
+            **credentials,
+        )
+
+    def get(self, name: str = "default", worker: int = 0, **credentials) -> praw.Reddit:
+        """Return the cached client for ``credentials``, creating it on first use.
+
+        ``name`` only labels the client in :meth:`stats`. Clients are not
+        thread-safe, so threads fetching concurrently each ask for a
+        different ``worker`` number and get their own client.
+        """
+        key = self._key({**credentials, "worker": worker} if worker else credentials)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                stats = ClientStats()
+                client = praw.Reddit(
+                    requestor_class=TimedRequestor,
+                    requestor_kwargs={"session": self.session, "stats": stats},
+                    **credentials,
+                )
+                entry = (name, client, stats)
+                self._clients[key] = entry
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            self._clients.move_to_end(key)
+            return entry[1]
+
+    def stats(self) -> dict:
+        """Return {label: request/latency snapshot}; labels repeat get a #n suffix."""
+        with self._lock:
+            entries = list(self._clients.values())
+        out = {}
+        for name, _, stats in entries:
+            label, i = name, 1
+            while label in out:
+                i += 1
+                label = f"{name}#{i}"
+            out[label] = stats.snapshot()
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+registry = RedditClientRegistry()
+
+
 def get_reddit():
-    return praw.Reddit(
+    return registry.get(
+        "app",
         client_id=os.getenv("CLIENT_ID"),
         client_secret=os.getenv("CLIENT_SECRET"),
         user_agent=os.getenv("USER_AGENT", "volatility_detector")
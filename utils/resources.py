@@ -0,0 +1,113 @@
+"""Process-wide resources shared by app.py and the pages/ scripts."""
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.incremental import COMMUNITY
+from utils.backends import parse_backends
+from utils.prepared import PreparedDataset
+from utils.result_cache import ResultCache
+from utils.sentiment import SentimentCache, SentimentEnsemble
+from utils.store import FetchStore
+
+
+@st.cache_resource
+def get_analyzer():
+    """One analyzer (and score cache) per server process, shared across reruns."""
+    cache = SentimentCache(path=os.getenv("SENTIMENT_CACHE_PATH"))
+    return SentimentEnsemble(
+        cache=cache,
+        workers=int(os.getenv("SENTIMENT_WORKERS", "1")),
+        backends=parse_backends(os.getenv("SENTIMENT_BACKENDS")),
+    )
+
+
+@st.cache_resource
+def get_store():
+    """Fetched rows and high-water marks, shared by every session."""
+    # sessions never display post bodies once they are scored
+    return FetchStore(root=os.getenv("DATA_DIR", "data"), text=os.getenv("SESSION_TEXT", "drop"))
+
+
+@st.cache_resource
+def get_result_cache():
+    """Community results shared by every session (TTL + memory cap + single-flight)."""
+    return ResultCache(
+        ttl=float(os.getenv("COMMUNITY_CACHE_TTL", "300")),
+        max_bytes=int(os.getenv("COMMUNITY_CACHE_MB", "256")) * 1024 * 1024,
+    )
+
+
+def load_community(columns=None, start=None, end=None) -> pd.DataFrame:
+    """Stored posts for the subreddits this session last fetched."""
+    subreddits = st.session_state.get("subreddits")
+    if not subreddits:
+        return pd.DataFrame()
+    return get_store().read(COMMUNITY, subreddits=subreddits, start=start, end=end, columns=columns)
+
+
+def load_user(columns=None, start=None, end=None) -> pd.DataFrame:
+    """Stored activity of the logged-in user."""
+    username = st.session_state.get("reddit_username")
+    if not username:
+        return pd.DataFrame()
+    return get_store().read(f"u/{username}", start=start, end=end, columns=columns)
+
+
+@st.cache_resource(max_entries=32)
+def _prepared_slot(dataset, subreddits, columns):
+    """Holder of the current :class:`PreparedDataset` of one query, shared by every session and page."""
+    return {"lock": threading.Lock(), "version": None, "prepared": None}
+
+
+def _prepared(dataset, subreddits, columns):
+    """The prepared rows of one query, rebuilt in place when the store version changes."""
+    slot = _prepared_slot(dataset, subreddits, columns)
+    version = get_store().version(dataset)
+    with slot["lock"]:
+        if slot["prepared"] is None or slot["version"] != version:
+            # drop the stale copy before reading the new one
+            slot["prepared"] = None
+            group = "type" if dataset.startswith("u/") else "subreddit"
+            df = get_store().read(dataset, subreddits=list(subreddits) if subreddits is not None else None,
+                                  columns=list(columns))
+            slot["prepared"], slot["version"] = PreparedDataset(df, group=group), version
+        return slot["prepared"]
+
+
+def load_prepared_community(columns=("time", "subreddit", "sentiment_score")):
+    """Prepared community rows for this session's subreddits (read-only), or None."""
+    subreddits = st.session_state.get("subreddits")
+    if not subreddits:
+        return None
+    key = tuple(sorted(set(subreddits)))
+    return _prepared(COMMUNITY, key, tuple(columns))
+
+
+def load_prepared_user(columns=("time", "type", "sentiment_score", "volatility")):
+    """Prepared activity of the logged-in user (read-only), or None."""
+    username = st.session_state.get("reddit_username")
+    if not username:
+        return None
+    dataset = f"u/{username}"
+    return _prepared(dataset, None, tuple(columns))
+
+
+def prepare_session(key, df) -> PreparedDataset:
+    """A :class:`PreparedDataset` of the session frame ``df``, rebuilt only when ``df`` is replaced."""
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] is not df:
+        cached = (df, PreparedDataset(df))
+        st.session_state[key] = cached
+    return cached[1]
+
+
+def load_community_bins(freq, value="sentiment_score", by_subreddit=True) -> pd.DataFrame:
+    """Per-``freq`` count/mean/std of ``value`` for this session's subreddits, from the rollup cube."""
+    subreddits = st.session_state.get("subreddits")
+    if not subreddits:
+        return pd.DataFrame()
+    cube = get_store().rollup(COMMUNITY)
+    return cube.aggregate(freq, subreddits=subreddits, value=value, by_subreddit=by_subreddit)
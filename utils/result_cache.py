@@ -0,0 +1,108 @@
+"""Cross-session cache for expensive dashboard results."""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+
+def estimate_bytes(value) -> int:
+    """Rough in-memory size of ``value``: deep size for pandas objects, summed over tuples/lists/dicts."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_bytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_bytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """TTL cache with a memory cap and single-flight computation.
+
+    Concurrent :meth:`get_or_compute` calls for the same key share one
+    computation: the first caller runs it, the others wait for its result
+    (or its exception, which is not cached). Entries expire after ``ttl``
+    seconds, and the least recently used ones are evicted once the
+    estimated total size exceeds ``max_bytes``. Cached values are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._inflight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing it with ``compute()`` if needed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._drop(key)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value):
+        nbytes = estimate_bytes(value)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, nbytes, value)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def invalidate(self, key=None):
+        """Forget ``key``, or every entry when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight": len(self._inflight),
+            }
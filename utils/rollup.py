@@ -0,0 +1,112 @@
+"""Multi-resolution rollup of per-subreddit scores: count, sum and sum of squares per bin."""
+import numpy as np
+import pandas as pd
+
+from utils.schema import score_values
+from utils.sentiment import scores_to_sentiment
+
+BASE_FREQ = "1min"
+VALUE_COLUMNS = ("sentiment_score", "sentiment")
+BIN_COLUMNS = ["subreddit", "time", "count"] + [
+    f"{v}_{stat}" for v in VALUE_COLUMNS for stat in ("sum", "sumsq")
+]
+
+
+class RollupCube:
+    """Per-subreddit ``BASE_FREQ`` bins holding ``count``, ``<value>_sum`` and ``<value>_sumsq``.
+
+    Any coarser bin is a merge of base bins, so :meth:`aggregate` derives
+    means and standard deviations for ``"5min"`` … ``"1D"`` from the bins
+    alone, without touching the rows they were built from. New rows are
+    folded in with :meth:`merge`.
+
+    Coarse bins are aligned to the epoch, which equals ``pd.Grouper``'s
+    default (midnight of the first day) for every frequency that divides
+    a day.
+    """
+
+    def __init__(self, bins: pd.DataFrame = None):
+        if bins is None:
+            bins = pd.DataFrame({c: pd.Series(dtype="float64") for c in BIN_COLUMNS})
+            bins = bins.astype({"subreddit": "object", "time": "datetime64[ns]", "count": "int64"})
+        self.bins = bins.sort_values(["subreddit", "time"], kind="stable").reset_index(drop=True)
+
+    @classmethod
+    def from_rows(cls, df: pd.DataFrame) -> "RollupCube":
+        """Roll up rows with ``subreddit``, ``time`` and ``sentiment_score`` columns."""
+        if df.empty:
+            return cls()
+        score = score_values(df["sentiment_score"])
+        values = {"sentiment_score": score, "sentiment": scores_to_sentiment(score).astype(np.float64)}
+        frame = pd.DataFrame({
+            "subreddit": df["subreddit"].to_numpy(),
+            "time": pd.to_datetime(df["time"]).dt.floor(BASE_FREQ).to_numpy(dtype="datetime64[ns]"),
+            "count": 1,
+        })
+        for name in VALUE_COLUMNS:
+            frame[f"{name}_sum"] = values[name]
+            frame[f"{name}_sumsq"] = values[name] ** 2
+        return cls(frame.groupby(["subreddit", "time"], sort=False).sum().reset_index())
+
+    def merge(self, other: "RollupCube") -> "RollupCube":
+        """Return a cube holding the bins of both."""
+        if other.bins.empty:
+            return self
+        if self.bins.empty:
+            return other
+        both = pd.concat([self.bins, other.bins], ignore_index=True)
+        return RollupCube(both.groupby(["subreddit", "time"], sort=False).sum().reset_index())
+
+    def __len__(self):
+        return len(self.bins)
+
+    def aggregate(self, freq: str, subreddits=None, value: str = "sentiment_score",
+                  by_subreddit: bool = True) -> pd.DataFrame:
+        """Return ``count``, ``mean`` and ``std`` (ddof=1) of ``value`` per ``freq`` bin.
+
+        Columns are ``subreddit`` (when ``by_subreddit``), ``time``,
+        ``count``, ``mean`` and ``std``; only bins holding rows appear, as
+        with ``groupby(["subreddit", pd.Grouper(key="time", freq=freq)])``.
+        """
+        bins = self.bins
+        if subreddits is not None:
+            bins = bins[bins["subreddit"].isin(list(subreddits))]
+        step = pd.Timedelta(freq).value
+        base = pd.Timedelta(BASE_FREQ).value
+        if step % base:
+            raise ValueError(f"{freq!r} is not a multiple of {BASE_FREQ!r}")
+
+        t = bins["time"].to_numpy().astype(np.int64) // step * step
+        count = bins["count"].to_numpy()
+        total = bins[f"{value}_sum"].to_numpy()
+        sumsq = bins[f"{value}_sumsq"].to_numpy()
+        if by_subreddit:
+            # bins are sorted by (subreddit, time) and flooring keeps that order
+            sub = bins["subreddit"].to_numpy()
+            change = np.empty(len(t), dtype=bool)
+            change[:1] = True
+            change[1:] = (t[1:] != t[:-1]) | (sub[1:] != sub[:-1])
+        else:
+            order = np.argsort(t, kind="stable")
+            t, count, total, sumsq = t[order], count[order], total[order], sumsq[order]
+            change = np.empty(len(t), dtype=bool)
+            change[:1] = True
+            change[1:] = t[1:] != t[:-1]
+        starts = np.flatnonzero(change)
+
+        if len(starts):
+            n = np.add.reduceat(count, starts)
+            s = np.add.reduceat(total, starts)
+            ss = np.add.reduceat(sumsq, starts)
+        else:
+            n = np.zeros(0, dtype=np.int64)
+            s = ss = np.zeros(0)
+        mean = s / np.maximum(n, 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.maximum(ss - s * mean, 0.0) / (n - 1)
+        std = np.where(n > 1, np.sqrt(var), np.nan)
+
+        out = {"time": pd.to_datetime(t[starts]), "count": n, "mean": mean, "std": std}
+        if by_subreddit:
+            out = {"subreddit": bins["subreddit"].to_numpy()[starts], **out}
+        return pd.DataFrame(out)
@@ -0,0 +1,59 @@
+"""Canonical in-memory schema for scored posts.
+
+Frames of posts are held per session (and in the shared result cache),
+so they use compact dtypes: categoricals for the repeated strings,
+float32 scores, int8 sentiment and second-resolution timestamps. The
+Parquet store keeps float64 scores; compaction happens when rows are
+read into memory, after every derived column has been computed from the
+exact values.
+
+Scores are rounded to three decimals, so :func:`score_values` recovers
+the exact float64 value from a float32 column; use it (not a plain
+``astype``) wherever scores are compared with the ±0.1 thresholds.
+"""
+import numpy as np
+import pandas as pd
+
+LABEL_DTYPE = pd.CategoricalDtype(["negative", "neutral", "positive"])
+TYPE_DTYPE = pd.CategoricalDtype(["comment", "post"])
+SCORE_DECIMALS = 3
+
+DTYPES = {
+    "time": "datetime64[s]",
+    "subreddit": "category",
+    "type": TYPE_DTYPE,
+    "sentiment_label": LABEL_DTYPE,
+    "sentiment_score": np.float32,
+    "volatility": np.float32,
+    "sentiment": np.int8,
+}
+# what compact_frame does with the text column
+TEXT_MODES = ("keep", "intern", "drop")
+
+
+def compact_frame(df: pd.DataFrame, text: str = "keep") -> pd.DataFrame:
+    """Return ``df`` with the :data:`DTYPES` of the columns it has.
+
+    ``text="intern"`` stores the text column as a categorical, so repeated
+    bodies are held once; ``"drop"`` removes it (after scoring nothing
+    on the dashboard reads it).
+    """
+    if text not in TEXT_MODES:
+        raise ValueError(f"text must be one of {TEXT_MODES}, got {text!r}")
+    dtypes = {c: t for c, t in DTYPES.items() if c in df.columns}
+    if text == "intern" and "text" in df.columns:
+        dtypes["text"] = "category"
+    if text == "drop" and "text" in df.columns:
+        df = df.drop(columns="text")
+    if "time" in dtypes:
+        # tz-aware or not-yet-parsed times are left to pandas' conversion
+        df = df.assign(time=pd.to_datetime(df["time"]))
+    return df.astype(dtypes)
+
+
+def score_values(scores) -> np.ndarray:
+    """Scores as float64; float32 columns are rounded back to their exact 3-decimal values."""
+    scores = np.asarray(scores)
+    if scores.dtype == np.float32:
+        return np.round(scores.astype(np.float64), SCORE_DECIMALS)
+    return np.asarray(scores, dtype=np.float64)
@@ -1,48 +1,381 @@
+import hashlib
+import math
+import multiprocessing
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from textblob import TextBlob
+import pandas as pd
+
+from utils.backends import available_backends, create_backend
+from utils.schema import score_values
+from utils.telemetry import telemetry
+
+# nltk (which imports scipy) and textblob are imported on first scoring,
+# not at import time: pages that only read stored scores never load them
+_vader_lock = threading.Lock()
+_vader_checked = False
+
+
+def _load_vader():
+    """Return a VADER analyzer, downloading the lexicon only if it is not installed."""
+    global _vader_checked
+    import nltk
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    with _vader_lock:
+        if not _vader_checked:
+            try:
+                nltk.data.find("sentiment/vader_lexicon.zip")
+            except LookupError:
+                nltk.download("vader_lexicon", quiet=True)
+            _vader_checked = True
+    return SentimentIntensityAnalyzer()
+
+
+# ensemble members, in the column order of SentimentEnsemble.component_scores
+COMPONENTS = ("vader", "blob", "nltk")
+# backend (see utils.backends) each member is scored with by default
+DEFAULT_BACKENDS = {"vader": "vader", "blob": "textblob", "nltk": "vader"}
+
+
+class SentimentCache:
+    """Score cache keyed by a hash of (ensemble weights, backends, text).
+
+    Keeps up to ``maxsize`` scores in an in-memory LRU. When ``path`` is
+    given, scores are also written to a SQLite file so they survive process
+    restarts; memory misses fall through to that store.
+    """
+
+    _SQL_BATCH = 500
+
+    def __init__(self, maxsize: int = 100_000, path: str = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, score REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text: str, weights, backends: dict = None) -> bytes:
+        """Return a 16-byte content hash of ``text`` under ``weights``.
+
+        ``backends`` is the ensemble's non-default component -> backend
+        mapping, if any; default ensembles hash as they always have.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(tuple(float(w) for w in weights)).encode())
+        if backends:
+            h.update(repr(sorted(backends.items())).encode())
+        h.update(b"\0")
+        h.update(text.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: score} for the cached subset of ``keys``."""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                score = self._lru.get(key)
+                if score is None:
+                    missing.append(key)
+                else:
+                    self._lru.move_to_end(key)
+                    found[key] = score
+            if missing and self._db is not None:
+                for i in range(0, len(missing), self._SQL_BATCH):
+                    chunk = missing[i:i + self._SQL_BATCH]
+                    rows = self._db.execute(
+                        f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, score in rows:
+                        found[bytes(key)] = score
+                        self._remember(bytes(key), score)
+                    self.disk_hits += len(rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict):
+        """Store {key: score} in memory and, if configured, on disk."""
+        if not items:
+            return
+        with self._lock:
+            for key, score in items.items():
+                self._remember(key, score)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", items.items()
+                )
+                self._db.commit()
+
+    def _remember(self, key: bytes, score: float):
+        self._lru[key] = score
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
 
-# download VADER lexicon once
-nltk.download("vader_lexicon", quiet=True)
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._lru),
+        }
+
+    def clear(self):
+        """Drop all cached scores (memory and disk) and reset the counters."""
+        with self._lock:
+            self._lru.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM scores")
+                self._db.commit()
+            self.hits = self.misses = self.disk_hits = 0
 
 
 class SentimentEnsemble:
-    """Ensemble sentiment analyzer using VADER + TextBlob + VADER(NLTK) with configurable weights."""
+    """Ensemble sentiment analyzer using VADER + TextBlob + VADER(NLTK) with configurable weights.
+
+    ``backends`` maps components to registered backends (``utils.backends``),
+    e.g. ``{"blob": "lexicon_blob"}``; unnamed components keep ``DEFAULT_BACKENDS``.
+    """
 
-    def __init__(self, w_vader: float = 0.05, w_blob: float = 0.9, w_nltk: float = 0.05):
-        self.vader = SentimentIntensityAnalyzer()
-        self.nltk_analyzer = SentimentIntensityAnalyzer()
+    def __init__(self, w_vader: float = 0.05, w_blob: float = 0.9, w_nltk: float = 0.05,
+                 cache: SentimentCache = None, workers: int = 1, parallel_threshold: int = 2000,
+                 backends: dict = None):
+        self.cache = cache
+        # process-pool scoring: batches of at least parallel_threshold
+        # uncached texts are spread over `workers` processes
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        self._backends = {}
         self.w_vader = w_vader
         self.w_blob = w_blob
         self.w_nltk = w_nltk
+        self.backends = backends
 
-    def analyze_text(self, text: str) -> float:
-        """Return ensemble sentiment score in [-1, 1]."""
-        if not isinstance(text, str) or not text.strip():
-            return 0.0
+    @property
+    def backends(self) -> dict:
+        """Component -> backend name for every component."""
+        return dict(self._backend_names)
+
+    @backends.setter
+    def backends(self, backends: dict):
+        unknown = set(backends or ()) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"unknown ensemble components {sorted(unknown)}; expected {COMPONENTS}")
+        missing = set((backends or {}).values()) - set(available_backends())
+        if missing:
+            raise ValueError(f"unknown sentiment backends {sorted(missing)}; available: {available_backends()}")
+        self._backend_names = {**DEFAULT_BACKENDS, **(backends or {})}
+
+    def _custom_backends(self) -> dict:
+        """The components routed away from ``DEFAULT_BACKENDS`` (for cache keys)."""
+        return {c: b for c, b in self._backend_names.items() if b != DEFAULT_BACKENDS[c]}
+
+    def _backend(self, name: str):
+        """One instance per backend name, built on first use."""
+        if name not in self._backends:
+            self._backends[name] = create_backend(name)
+        return self._backends[name]
+
+    @property
+    def vader(self):
+        """VADER analyzer, built on first use."""
+        return self._backend("vader").analyzer
 
-        # VADER
-        vader_score = self.vader.polarity_scores(text).get("compound", 0.0)
+    @property
+    def nltk_analyzer(self):
+        # NLTK's analyzer is the same VADER model; share the instance so
+        # the lexicon is loaded once and each text is scored once.
+        return self.vader
 
-        # TextBlob
-        blob_score = TextBlob(text).sentiment.polarity
+    def _components(self):
+        """Return (name, weight) for each ensemble member."""
+        return tuple(zip(COMPONENTS, (self.w_vader, self.w_blob, self.w_nltk)))
 
-        # NLTK (reusing VADER)
-        nltk_score = self.nltk_analyzer.polarity_scores(text).get("compound", 0.0)
+    def _plan(self, weighted_only: bool = True):
+        """Group components by backend.
+
+        Returns a list of (backend_name, backend, names): one entry per
+        distinct backend that has at least one component with a non-zero
+        weight (or any component, when ``weighted_only`` is false).
+        """
+        plan = {}
+        for name, weight in self._components():
+            if weighted_only and weight == 0:
+                continue
+            backend = self._backend_names[name]
+            if backend not in plan:
+                plan[backend] = (backend, self._backend(backend), [])
+            plan[backend][2].append(name)
+        return list(plan.values())
+
+    def _component_scores(self, text: str, plan) -> dict:
+        """Run each distinct backend in ``plan`` once; skipped components score 0.0."""
+        scores = dict.fromkeys(COMPONENTS, 0.0)
+        for _, backend, names in plan:
+            value = backend.score(text)
+            for name in names:
+                scores[name] = value
+        return scores
+
+    def _component_matrix(self, texts, plan) -> np.ndarray:
+        """Raw component scores of ``texts`` as an ``(n, len(COMPONENTS))`` array.
+
+        Each backend in ``plan`` scores the non-empty texts in one batch;
+        skipped components, empty and non-str texts score 0.0.
+        """
+        matrix = np.zeros((len(texts), len(COMPONENTS)), dtype=np.float64)
+        scored = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if scored:
+            batch = [texts[i] for i in scored]
+            for _, backend, names in plan:
+                values = backend.score_batch(batch)
+                for name in names:
+                    matrix[scored, COMPONENTS.index(name)] = values
+        return matrix
+
+    def _analyze(self, text: str, plan) -> float:
+        if not isinstance(text, str) or not text.strip():
+            return 0.0
 
         # Weighted ensemble
         total_w = self.w_vader + self.w_blob + self.w_nltk
         if total_w == 0:
             return 0.0
 
+        scores = self._component_scores(text, plan)
+
         score = (
-            vader_score * self.w_vader +
-            blob_score * self.w_blob +
-            nltk_score * self.w_nltk
+            scores["vader"] * self.w_vader +
+            scores["blob"] * self.w_blob +
+            scores["nltk"] * self.w_nltk
         ) / total_w
         return round(float(score), 3)
 
+    def analyze_text(self, text: str) -> float:
+        """Return ensemble sentiment score in [-1, 1]."""
+        with telemetry.track("sentiment_text"):
+            if self.cache is None or not isinstance(text, str):
+                return self._analyze(text, self._plan())
+            return float(self._analyze_unique([text])[0])
+
+    def analyze_batch(self, texts) -> np.ndarray:
+        """Return ensemble scores for a sequence of texts as a float64 array.
+
+        Identical texts are scored once and the result is broadcast back,
+        so repeated bodies ("[deleted]", bot replies) cost a single pass.
+        """
+        with telemetry.track("sentiment_batch", items=len(texts)):
+            codes, uniques = pd.factorize(np.asarray(texts, dtype=object))
+            # one extra slot so the NA sentinel (-1) maps to a 0.0 score
+            unique_scores = np.zeros(len(uniques) + 1, dtype=np.float64)
+            unique_scores[:-1] = self._analyze_unique(uniques)
+            return unique_scores[codes]
+
+    def _analyze_unique(self, texts) -> np.ndarray:
+        """Score distinct texts, serving what it can from ``self.cache``."""
+        if self.cache is None:
+            return self._score_texts(texts)
+
+        scores = np.zeros(len(texts), dtype=np.float64)
+        weights = (self.w_vader, self.w_blob, self.w_nltk)
+        backends = self._custom_backends()
+        keys = [
+            SentimentCache.make_key(text, weights, backends) if isinstance(text, str) else None
+            for text in texts
+        ]
+        cached = self.cache.get_many([k for k in keys if k is not None])
+        todo = []
+        for i, key in enumerate(keys):
+            if key in cached:
+                scores[i] = cached[key]
+            else:
+                todo.append(i)
+        if todo:
+            scores[todo] = self._score_texts([texts[i] for i in todo])
+            self.cache.put_many({
+                keys[i]: scores[i] for i in todo if keys[i] is not None
+            })
+        return scores
+
+    def _score_texts(self, texts) -> np.ndarray:
+        """Score texts in-process, or on the process pool for large batches."""
+        if not len(texts):
+            return np.zeros(0, dtype=np.float64)
+        if self.workers <= 1 or len(texts) < self.parallel_threshold:
+            return self._score_batch(texts, self._plan())
+
+        results = self._map_chunks(_score_chunk, texts)
+        return np.concatenate([np.asarray(r, dtype=np.float64) for r in results])
+
+    def _score_batch(self, texts, plan) -> np.ndarray:
+        """Ensemble scores of ``texts``, identical to ``_analyze`` text by text."""
+        total_w = self.w_vader + self.w_blob + self.w_nltk
+        if total_w == 0:
+            return np.zeros(len(texts), dtype=np.float64)
+        m = self._component_matrix(texts, plan)
+        # same operation order as _analyze, then Python's round() per
+        # score: np.round rounds differently on some halfway cases
+        score = (m[:, 0] * self.w_vader + m[:, 1] * self.w_blob + m[:, 2] * self.w_nltk) / total_w
+        return np.fromiter((round(x, 3) for x in score.tolist()), dtype=np.float64, count=len(texts))
+
+    def _map_chunks(self, func, texts):
+        """Run ``func(config, chunk)`` over chunks of ``texts`` on the process pool."""
+        if self._pool is None:
+            # the analyzer lives in a threaded server: forking it could copy
+            # locks held by other threads into the workers
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker, initargs=(self._backend_names,),
+            )
+        # a few chunks per worker keeps them busy without per-text IPC
+        size = max(64, math.ceil(len(texts) / (self.workers * 4)))
+        chunks = [list(texts[i:i + size]) for i in range(0, len(texts), size)]
+        config = ((self.w_vader, self.w_blob, self.w_nltk), self._backend_names)
+        return self._pool.map(func, [config] * len(chunks), chunks)
+
+    def component_scores(self, texts) -> np.ndarray:
+        """Return the raw score of every component for every text.
+
+        The result is an ``(n_texts, len(COMPONENTS))`` float64 array,
+        unweighted and unrounded, computed for all components whatever
+        their weight. Empty and non-str texts score 0. Any weighting can
+        then be applied without rescoring (see ``utils.evaluation.WeightSweep``).
+        """
+        codes, uniques = pd.factorize(np.asarray(texts, dtype=object))
+        matrix = np.zeros((len(uniques) + 1, len(COMPONENTS)), dtype=np.float64)
+        # empty input never reaches the pool
+        if self.workers <= 1 or len(uniques) < max(self.parallel_threshold, 1):
+            matrix[:-1] = self._component_matrix(uniques, self._plan(weighted_only=False))
+        else:
+            matrix[:-1] = np.concatenate(list(self._map_chunks(_component_chunk, uniques)))
+        return matrix[codes]
+
+    def close(self):
+        """Shut down the scoring pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
     def score_to_label(self, score: float) -> str:
         """Convert numeric score → sentiment label."""
         if score > 0.1:
@@ -53,23 +386,77 @@ class SentimentEnsemble:
             return "neutral"
 
 
+# ---------- Process-pool workers ----------
+_worker_analyzer = None
+
+
+def _init_worker(backends):
+    """Build one analyzer per worker and load each configured backend's lexicon once."""
+    global _worker_analyzer
+    _worker_analyzer = SentimentEnsemble(backends=backends)
+    for name in set(backends.values()):
+        _worker_analyzer._backend(name).score("warm up")
+
+
+def _configure_worker(config) -> SentimentEnsemble:
+    weights, backends = config
+    _worker_analyzer.w_vader, _worker_analyzer.w_blob, _worker_analyzer.w_nltk = weights
+    _worker_analyzer.backends = backends
+    return _worker_analyzer
+
+
+def _score_chunk(config, texts) -> np.ndarray:
+    analyzer = _configure_worker(config)
+    return analyzer._score_batch(texts, analyzer._plan())
+
+
+def _component_chunk(config, texts) -> np.ndarray:
+    analyzer = _configure_worker(config)
+    return analyzer._component_matrix(texts, analyzer._plan(weighted_only=False))
+
+
+_LABELS = np.array(["negative", "neutral", "positive"], dtype=object)
+_default_analyzer = None
+
+
+def get_default_analyzer() -> SentimentEnsemble:
+    """Return a process-wide SentimentEnsemble with the default weights."""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = SentimentEnsemble()
+    return _default_analyzer
+
+
+def analyze_text(text: str) -> float:
+    """Score a single text with the default ensemble."""
+    return get_default_analyzer().analyze_text(text)
+
+
+def scores_to_sentiment(scores) -> np.ndarray:
+    """Map scores to discrete sentiment (-1, 0, 1) using the ±0.1 thresholds."""
+    scores = score_values(scores)
+    return (scores > 0.1).astype(np.int64) - (scores < -0.1).astype(np.int64)
+
+
+def sentiment_to_labels(sentiment) -> np.ndarray:
+    """Map discrete sentiment (-1, 0, 1) to "negative" / "neutral" / "positive"."""
+    return _LABELS[np.asarray(sentiment) + 1]
+
+
 # ---------- Helper function for DataFrames ----------
-import pandas as pd
-def analyze_sentiment(df, analyzer):
+def analyze_sentiment(df, analyzer=None):
+    if analyzer is None:
+        analyzer = get_default_analyzer()
+
     # Continuous score
-    df["sentiment_score"] = df["text"].apply(analyzer.analyze_text)
+    df["sentiment_score"] = analyzer.analyze_batch(df["text"].to_numpy())
 
     # Discrete sentiment (-1, 0, 1)
-    df["sentiment"] = df["sentiment_score"].apply(
-        lambda s: 1 if s > 0.1 else (-1 if s < -0.1 else 0)
-    )
+    sentiment = scores_to_sentiment(df["sentiment_score"].to_numpy())
+    df["sentiment"] = sentiment
 
     # Labels for readability
-    df["sentiment_label"] = df["sentiment"].map({
-        1: "positive",
-        0: "neutral",
-        -1: "negative"
-    })
+    df["sentiment_label"] = sentiment_to_labels(sentiment)
 
     return df
 
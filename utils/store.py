@@ -0,0 +1,305 @@
+"""Columnar on-disk store for fetched and scored rows, plus high-water marks."""
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from utils.rollup import RollupCube
+from utils.schema import TEXT_MODES, compact_frame, score_values
+from utils.sentiment import scores_to_sentiment, sentiment_to_labels
+
+# Stored per row; subreddit and day are encoded in the partition path
+DATA_SCHEMA = pa.schema([
+    ("time", pa.timestamp("ns")),
+    ("id", pa.string()),
+    ("text", pa.string()),
+    ("type", pa.string()),
+    ("sentiment_score", pa.float64()),
+    ("volatility", pa.float64()),
+])
+PARTITIONING = ds.partitioning(
+    pa.schema([("subreddit", pa.string()), ("day", pa.string())]), flavor="hive"
+)
+STORED_COLUMNS = ["time", "id", "text", "type", "subreddit", "sentiment_score", "volatility"]
+# derived from sentiment_score on read
+DERIVED_COLUMNS = ["sentiment", "sentiment_label"]
+
+
+def _signature(path):
+    """``(inode, mtime_ns, size)`` of ``path``, or None; every atomic replace changes it."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class FetchStore:
+    """Scored rows on disk, partitioned by subreddit and day, plus high-water marks.
+
+    A dataset (``"community"``, ``"u/<name>"``) is a hive-partitioned
+    Parquet directory ``<root>/<dataset>/subreddit=<sub>/day=<YYYY-MM-DD>/``.
+    Reads push subreddit and time filters down to partition pruning and
+    row-group statistics, and open files memory-mapped, so a read that
+    asks only for scores never touches the text column.
+
+    A source is one Reddit listing feeding a dataset (``"r/depression"``,
+    ``"u/<name>/comment"``); its high-water mark is the
+    ``(created_utc, fullname)`` of its newest stored row. Rows are written
+    before marks, and each file appears atomically via rename. The app
+    and the ingestion worker write the same store from separate
+    processes, so writes take an exclusive lock on ``<root>/.store.lock``
+    and re-read the shared files under it before merging.
+
+    Each dataset also keeps a :class:`RollupCube` of its scores beside it
+    (``<root>/<dataset>.rollup.parquet``), folded forward on every append,
+    so binned means and stds never rescan the rows.
+
+    Frames returned by :meth:`read` use the compact in-memory schema of
+    ``utils.schema``; ``text`` ("keep", "intern" or "drop") decides what
+    happens to the text column when it is read by default rather than
+    asked for by name.
+    """
+
+    def __init__(self, root: str = "data", text: str = "keep"):
+        if text not in TEXT_MODES:
+            raise ValueError(f"text must be one of {TEXT_MODES}, got {text!r}")
+        self.root = root
+        self.text = text
+        self._marks = {}
+        self._marks_signature = None
+        self._rollups = {}
+        self._lock = threading.Lock()
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _locked_files(self):
+        """Exclusive lock on the store's shared files across processes (take ``_lock`` first)."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, ".store.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _marks_path(self):
+        return os.path.join(self.root, "watermarks.json")
+
+    def _load_marks(self):
+        """Reload the marks if another process (or store) replaced the file."""
+        signature = _signature(self._marks_path())
+        if signature != self._marks_signature:
+            if signature is None:
+                self._marks = {}
+            else:
+                with open(self._marks_path()) as f:
+                    self._marks = {k: tuple(v) for k, v in json.load(f).items()}
+            self._marks_signature = signature
+        return self._marks
+
+    def _dataset_path(self, dataset):
+        return os.path.join(self.root, re.sub(r"[^\w.-]", "_", dataset))
+
+    def _rollup_path(self, dataset):
+        return self._dataset_path(dataset) + ".rollup.parquet"
+
+    def watermark(self, source: str):
+        """Return ``(created_utc, fullname)`` of the newest row from ``source``, or None."""
+        with self._lock:
+            return self._load_marks().get(source)
+
+    def read(self, dataset: str, subreddits=None, start=None, end=None, columns=None) -> pd.DataFrame:
+        """Return rows of ``dataset`` sorted by time.
+
+        ``subreddits`` and the inclusive ``start``/``end`` time bounds are
+        pushed down to the scan. ``columns`` may name any of
+        ``STORED_COLUMNS`` and ``DERIVED_COLUMNS``; the default is all
+        (with the text column handled per ``self.text``).
+        """
+        text = "keep" if columns else self.text
+        columns = list(columns or STORED_COLUMNS + DERIVED_COLUMNS)
+        if text == "drop":
+            columns.remove("text")
+        stored = [c for c in columns if c in STORED_COLUMNS]
+        derived = [c for c in columns if c in DERIVED_COLUMNS]
+        if derived and "sentiment_score" not in stored:
+            stored.append("sentiment_score")
+        if "time" not in stored:
+            stored.append("time")
+
+        path = self._dataset_path(dataset)
+        if not os.path.isdir(path):
+            return pd.DataFrame(columns=columns)
+
+        # day bounds prune partitions; time bounds use row-group statistics
+        conds = []
+        if subreddits is not None:
+            conds.append(ds.field("subreddit").isin(list(subreddits)))
+        if start is not None:
+            start = pd.Timestamp(start)
+            conds.append(ds.field("day") >= start.strftime("%Y-%m-%d"))
+            conds.append(ds.field("time") >= pa.scalar(start.value, type=pa.timestamp("ns")))
+        if end is not None:
+            end = pd.Timestamp(end)
+            conds.append(ds.field("day") <= end.strftime("%Y-%m-%d"))
+            conds.append(ds.field("time") <= pa.scalar(end.value, type=pa.timestamp("ns")))
+        expr = None
+        for cond in conds:
+            expr = cond if expr is None else expr & cond
+
+        scan = ds.dataset(
+            path,
+            schema=pa.unify_schemas([DATA_SCHEMA, PARTITIONING.schema]),
+            format="parquet",
+            partitioning=PARTITIONING,
+            filesystem=self._fs,
+        )
+        df = scan.to_table(columns=stored, filter=expr).to_pandas()
+        df = df.sort_values("time", kind="stable").reset_index(drop=True)
+
+        if derived:
+            sentiment = scores_to_sentiment(df["sentiment_score"].to_numpy())
+            if "sentiment" in derived:
+                df["sentiment"] = sentiment
+            if "sentiment_label" in derived:
+                df["sentiment_label"] = sentiment_to_labels(sentiment)
+        return compact_frame(df[columns], text=text)
+
+    def frame(self, dataset: str) -> pd.DataFrame:
+        """Return every row of ``dataset`` with all columns."""
+        return self.read(dataset)
+
+    def append(self, dataset: str, new_rows: pd.DataFrame, source_column: str, source_prefix: str):
+        """Write ``new_rows`` to ``dataset`` and advance the marks of their sources.
+
+        Each row's source is ``source_prefix + row[source_column]``. Rows
+        whose ``id`` is already stored are skipped. Returns the rows
+        written.
+        """
+        if new_rows.empty:
+            return new_rows
+        # the dedup read, rollup merge and marks merge all see the other
+        # process's latest writes
+        with self._lock, self._locked_files():
+            known = self.read(
+                dataset,
+                subreddits=new_rows["subreddit"].unique(),
+                start=new_rows["time"].min().normalize(),
+                columns=["id"],
+            )
+            new_rows = new_rows[~new_rows["id"].isin(known["id"])]
+            if new_rows.empty:
+                return new_rows
+
+            cube = self._load_rollup(dataset)
+            self._write(dataset, new_rows)
+            self._save_rollup(dataset, cube.merge(RollupCube.from_rows(new_rows)))
+
+            newest = new_rows.loc[new_rows.groupby(source_column, observed=True)["time"].idxmax()]
+            # merge into the marks on disk, not a possibly stale copy
+            marks = self._load_marks()
+            for _, row in newest.iterrows():
+                source = source_prefix + str(row[source_column])
+                mark = (row["time"].timestamp(), row["id"])
+                old = marks.get(source)
+                if old is None or mark[0] >= old[0]:
+                    marks[source] = mark
+            with tempfile.NamedTemporaryFile("w", dir=self.root, suffix=".tmp", delete=False) as f:
+                json.dump(marks, f)
+            os.replace(f.name, self._marks_path())
+            self._marks_signature = _signature(self._marks_path())
+        return new_rows
+
+    def version(self, dataset: str):
+        """A token that changes whenever rows are appended to ``dataset`` (None if it has none)."""
+        return _signature(self._rollup_path(dataset))
+
+    def rollup(self, dataset: str) -> RollupCube:
+        """Return the rollup cube of ``dataset``, reloaded when another process updated it."""
+        with self._lock, self._locked_files():
+            return self._load_rollup(dataset)
+
+    def _load_rollup(self, dataset):
+        path = self._rollup_path(dataset)
+        signature = _signature(path)
+        cached = self._rollups.get(dataset)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if signature is not None:
+            cube = RollupCube(pd.read_parquet(path))
+        else:
+            # stores written before rollups existed: build once from the scores
+            cube = RollupCube.from_rows(
+                self.read(dataset, columns=["time", "subreddit", "sentiment_score"])
+            )
+            if len(cube):
+                self._save_rollup(dataset, cube)
+                return cube
+        self._rollups[dataset] = (signature, cube)
+        return cube
+
+    def _save_rollup(self, dataset, cube):
+        path = self._rollup_path(dataset)
+        with tempfile.NamedTemporaryFile(dir=self.root, suffix=".tmp", delete=False) as f:
+            cube.bins.to_parquet(f, index=False)
+        os.replace(f.name, path)
+        self._rollups[dataset] = (_signature(path), cube)
+
+    def _write(self, dataset, rows):
+        """Write one new Parquet file into each (subreddit, day) partition of ``rows``."""
+        path = self._dataset_path(dataset)
+        rows = rows.reindex(columns=STORED_COLUMNS)
+        # rows in the compact in-memory schema are stored at full precision
+        rows = rows.astype({"type": object, "subreddit": object}).assign(
+            sentiment_score=score_values(rows["sentiment_score"])
+        )
+        days = rows["time"].dt.strftime("%Y-%m-%d")
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        for (sub, day), idx in rows.groupby([rows["subreddit"], days]).indices.items():
+            part = rows.iloc[np.sort(idx)].drop(columns="subreddit")
+            table = pa.Table.from_pandas(part, schema=DATA_SCHEMA, preserve_index=False)
+            directory = os.path.join(path, f"subreddit={sub}", f"day={day}")
+            os.makedirs(directory, exist_ok=True)
+            # dot-prefixed files are ignored by dataset discovery until renamed
+            tmp = os.path.join(directory, "." + name)
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(directory, name))
+
+    def compact(self, dataset: str):
+        """Merge the small files appended to each partition into one file."""
+        path = self._dataset_path(dataset)
+        if not os.path.isdir(path):
+            return
+        with self._lock, self._locked_files():
+            for directory, _, files in os.walk(path):
+                parts = sorted(f for f in files if f.endswith(".parquet") and not f.startswith("."))
+                if len(parts) < 2:
+                    continue
+                table = pa.concat_tables(
+                    pq.read_table(os.path.join(directory, f), schema=DATA_SCHEMA) for f in parts
+                ).sort_by("time")
+                name = f"part-{uuid.uuid4().hex}.parquet"
+                tmp = os.path.join(directory, "." + name)
+                pq.write_table(table, tmp)
+                os.replace(tmp, os.path.join(directory, name))
+                for f in parts:
+                    os.remove(os.path.join(directory, f))
@@ -0,0 +1,191 @@
+"""Timers and counters for the hot paths, as snapshots or Prometheus text.
+
+    with telemetry.track("reddit_fetch") as span:
+        rows = fetch(...)
+        span.items = len(rows)
+
+Each operation keeps a call count, an item count (posts fetched, texts
+scored, rows aggregated), a failure count (calls that raised) and the
+latencies of its last ``window`` calls for percentiles. The process-wide
+``telemetry`` instance is what ``utils.analysis.compute_metrics``
+reads; :meth:`Telemetry.write_prometheus` and :meth:`Telemetry.serve`
+export it for scraping (``METRICS_PATH`` / ``--metrics-port``). The
+app and the ingestion worker are separate processes, so each labels its
+series with ``process`` and writes its own file (:func:`process_path`).
+"""
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+PREFIX = "volatility"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Timer:
+    """Call, item and failure counts plus recent latencies for one operation."""
+
+    def __init__(self, window: int = 2048):
+        self.calls = 0
+        self.items = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, items: int = 1, failed: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.items += int(items)
+            self.failures += int(failed)
+            self.seconds += seconds
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            calls, items, failures, seconds = self.calls, self.items, self.failures, self.seconds
+        quantiles = np.percentile(latencies, [q * 100 for q in QUANTILES]) if len(latencies) else [0.0] * 3
+        return {
+            "calls": calls,
+            "items": items,
+            "failures": failures,
+            "seconds": round(seconds, 6),
+            "items_per_sec": round(items / seconds, 1) if seconds else 0.0,
+            **{f"p{int(q * 100)}_ms": round(float(v), 2) for q, v in zip(QUANTILES, quantiles)},
+        }
+
+
+class _Span:
+    __slots__ = ("items", "excluded")
+
+    def __init__(self, items):
+        self.items = items
+        self.excluded = 0.0
+
+    @contextmanager
+    def paused(self):
+        """Leave the time spent in the block out of the span."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.excluded += time.perf_counter() - start
+
+
+class Telemetry:
+    """Named :class:`Timer` objects, created on first use.
+
+    ``process`` (e.g. ``"app"``, ``"ingest"``) is added as a label to every
+    exported series.
+    """
+
+    def __init__(self, window: int = 2048, process: str = None):
+        self.window = window
+        self.process = process
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name: str) -> Timer:
+        timer = self._timers.get(name)
+        if timer is None:
+            with self._lock:
+                timer = self._timers.setdefault(name, Timer(self.window))
+        return timer
+
+    @contextmanager
+    def track(self, name: str, items: int = 1):
+        """Time the block as one call of ``name``; set ``span.items`` once the count is known.
+
+        Time spent inside ``with span.paused():`` is not counted. A block
+        that raises is recorded as a failure and the exception propagates.
+        """
+        span = _Span(items)
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield span
+            failed = False
+        finally:
+            self.timer(name).record(time.perf_counter() - start - span.excluded, span.items, failed)
+
+    def snapshot(self) -> dict:
+        """Return ``{operation: Timer.snapshot()}``, sorted by operation name."""
+        with self._lock:
+            timers = sorted(self._timers.items())
+        return {name: timer.snapshot() for name, timer in timers}
+
+    def prometheus(self) -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        seconds, items, failures = (f"{PREFIX}_operation_{m}" for m in ("seconds", "items_total", "failures_total"))
+        proc = f'process="{self.process}",' if self.process else ""
+        lines = [
+            f"# HELP {seconds} Latency of instrumented operations (recent-window quantiles).",
+            f"# TYPE {seconds} summary",
+        ]
+        for op, s in snapshot.items():
+            for q in QUANTILES:
+                lines.append(f'{seconds}{{{proc}op="{op}",quantile="{q}"}} {s[f"p{int(q * 100)}_ms"] / 1000:.6g}')
+            lines.append(f'{seconds}_sum{{{proc}op="{op}"}} {s["seconds"]:.6g}')
+            lines.append(f'{seconds}_count{{{proc}op="{op}"}} {s["calls"]}')
+        for name, key, help_ in ((items, "items", "Items processed"), (failures, "failures", "Calls that raised")):
+            lines += [f"# HELP {name} {help_} by instrumented operations.", f"# TYPE {name} counter"]
+            lines += [f'{name}{{{proc}op="{op}"}} {s[key]}' for op, s in snapshot.items()]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write :meth:`prometheus` to ``path`` atomically (node_exporter textfile style).
+
+        Each call writes its own temporary file, so concurrent writers
+        (Streamlit session threads) never race on it.
+        """
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path) or ".",
+                                         prefix=".metrics-", suffix=".tmp", delete=False) as f:
+            f.write(self.prometheus())
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.remove(f.name)
+            raise
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve :meth:`prometheus` at ``/metrics`` on a daemon thread; returns the server."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+
+
+def process_path(path: str, process: str) -> str:
+    """``path`` with ``process`` before its extension: ``metrics.prom`` -> ``metrics.app.prom``."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{process}{ext}"
+
+
+telemetry = Telemetry()
@@ -1,9 +1,195 @@
 import numpy as np
-from collections import deque
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.sentiment import SentimentEnsemble
+
+
+class VolatilityTracker:
+    """Rolling standard deviation over the last ``window_size`` scores.
+
+    Scores live in a fixed-size ring buffer with running sums of the
+    scores centred on a reference value, so each :meth:`update` is O(1).
+    Matches ``Series.rolling(window_size, min_periods).std(ddof).fillna(0)``:
+    until ``min_periods`` scores have been seen the volatility is 0.0, and
+    a window of one repeated score is exactly 0.0.
+    """
+
+    # recompute the running sums from the buffer this often to stop
+    # floating-point drift from accumulating
+    RESYNC_EVERY = 1024
+
+    def __init__(self, window_size: int = 5, min_periods: int = None, ddof: int = 1):
+        if window_size < 1:
+            raise ValueError("window_size must be >= 1")
+        self.window_size = window_size
+        self.min_periods = window_size if min_periods is None else max(min_periods, ddof + 1)
+        self.ddof = ddof
+        self._buf = np.zeros(window_size, dtype=np.float64)
+        self._updates = 0
+        self.reset()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def values(self) -> np.ndarray:
+        """Scores currently in the window, oldest first."""
+        if self._count < self.window_size:
+            return self._buf[:self._count].copy()
+        return np.roll(self._buf, -self._pos)
+
+    @property
+    def volatility(self) -> float:
+        """Volatility of the current window."""
+        n = self._count
+        if n < self.min_periods or n <= self.ddof or self._run >= n:
+            return 0.0
+        var = (self._sumsq - self._sum * self._sum / n) / (n - self.ddof)
+        return float(np.sqrt(var)) if var > 0 else 0.0
+
+    def update(self, score: float) -> float:
+        """Push one score and return the updated volatility."""
+        score = float(score)
+        last = self._buf[self._pos - 1] if self._count else None
+        # length of the run of equal scores ending at this one
+        self._run = self._run + 1 if score == last else 1
+        if self._count == self.window_size:
+            old = self._buf[self._pos] - self._ref
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+        self._buf[self._pos] = score
+        self._pos = (self._pos + 1) % self.window_size
+        d = score - self._ref
+        self._sum += d
+        self._sumsq += d * d
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._resync()
+        return self.volatility
+
+    def update_many(self, scores) -> np.ndarray:
+        """Push an array of scores; return the volatility after each one."""
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        if len(scores) == 0:
+            return np.zeros(0)
+
+        w = self.window_size
+        history = self.values
+        ext = np.concatenate((history, scores))
+        vols = grouped_rolling_std(ext, window=w, min_periods=self.min_periods, ddof=self.ddof)[len(history):]
+
+        tail = ext[-w:]
+        self._buf[:len(tail)] = tail
+        self._count = len(tail)
+        self._pos = len(tail) % w
+        changes = np.flatnonzero(tail[1:] != tail[:-1])
+        self._run = len(tail) - 1 - changes[-1] if len(changes) else len(tail)
+        self._updates += len(scores)
+        self._resync()
+        return vols
+
+    def reset(self):
+        """Forget all scores."""
+        self._pos = self._count = self._run = 0
+        self._ref = self._sum = self._sumsq = 0.0
+
+    def _resync(self):
+        # re-centre on the window mean to keep the sums well conditioned
+        window = self._buf[:self._count]
+        self._ref = float(window.mean()) if self._count else 0.0
+        centred = window - self._ref
+        self._sum = float(centred.sum())
+        self._sumsq = float(centred @ centred)
+
+
+def grouped_rolling_std(values, groups=None, window: int = 5, min_periods: int = None,
+                        ddof: int = 1) -> np.ndarray:
+    """Rolling std of ``values`` within each group, in the original row order.
+
+    Equivalent to ``Series.groupby(groups).transform(lambda s:
+    s.rolling(window, min_periods).std(ddof).fillna(0))`` but computed for
+    all groups at once: rows are stably sorted by group, and each window's
+    sums are differences of cumulative sums of the group-centred values,
+    clamped at the group's first row. NaNs are skipped and do not count
+    towards ``min_periods``, as in pandas. Numba is not needed: the
+    kernel is a handful of O(n) array passes.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    n_rows = len(values)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    min_periods = window if min_periods is None else min_periods
+    if n_rows == 0:
+        return np.zeros(0)
+
+    if groups is None:
+        order = np.arange(n_rows)
+        codes = np.zeros(n_rows, dtype=np.intp)
+    else:
+        codes, uniques = pd.factorize(pd.Series(np.asarray(groups)), use_na_sentinel=False)
+        if len(uniques) <= np.iinfo(np.uint16).max:
+            # stable argsort of 16-bit keys is a radix sort
+            codes = codes.astype(np.uint16)
+        if np.all(codes[1:] >= codes[:-1]):
+            order = np.arange(n_rows)
+        else:
+            order = np.argsort(codes, kind="stable")
+            codes = codes[order]
+    v = values[order]
+    finite = np.isfinite(v)
+
+    # first sorted position of each row's group
+    boundary = np.empty(n_rows, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(boundary)
+    group_start = starts[np.cumsum(boundary) - 1]
+
+    # centre each group on its mean to keep the cumulative sums well conditioned
+    clean = np.where(finite, v, 0.0)
+    counts = np.add.reduceat(finite.astype(np.int64), starts)
+    means = np.add.reduceat(clean, starts) / np.maximum(counts, 1)
+    centred = np.where(finite, v - np.repeat(means, np.diff(np.append(starts, n_rows))), 0.0)
+
+    cs = np.concatenate(([0.0], np.cumsum(centred)))
+    cs2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+    cn = np.concatenate(([0], np.cumsum(finite)))
+    end = np.arange(1, n_rows + 1)
+    start = np.maximum(end - window, group_start)
+    n = cn[end] - cn[start]
+    s1 = cs[end] - cs[start]
+    s2 = cs2[end] - cs2[start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (s2 - s1 * s1 / n) / (n - ddof)
+    vols = np.sqrt(np.clip(var, 0.0, None))
+    vols[(n < max(min_periods, 1)) | (n <= ddof)] = 0.0
+    # windows of one repeated value are exactly 0, as pandas reports them:
+    # count value changes between consecutive finite rows after each
+    # window's first finite row
+    idx = np.arange(n_rows)
+    prev = np.maximum.accumulate(np.where(finite, idx, 0))
+    flips = finite.copy()
+    flips[1:] &= v[1:] != clean[prev[:-1]]
+    flipped = np.concatenate(([0], np.cumsum(flips)))
+    first = np.minimum.accumulate(np.where(finite, idx, n_rows)[::-1])[::-1]
+    first = np.minimum(first[np.minimum(start, n_rows - 1)], end - 1)
+    vols[flipped[end] == flipped[first + 1]] = 0.0
+
+    out = np.empty(n_rows)
+    out[order] = vols
+    return out
+
 
 class VolatilityAnalyzer:
-    def __init__(self):
-        self.ensemble = EmotionEnsemble()
+    CRISIS_COLUMNS = ["type", "position", "severity", "avg_emotion", "local_volatility"]
+
+    def __init__(self, crisis_window: int = 5):
+        self.ensemble = SentimentEnsemble()
+        self.crisis_window = crisis_window
     
     def calculate_user_volatility(self, posts_timeline):
         """Calculate emotional volatility for a user over time"""
@@ -11,8 +197,7 @@ class VolatilityAnalyzer:
         timestamps = []
         
         for post in sorted(posts_timeline, key=lambda x: x['timestamp']):
-            result = self.ensemble.ensemble_prediction(post['text'])
-            emotions.append(result['ensemble_score'])
+            emotions.append(self.ensemble.analyze_text(post['text']))
             timestamps.append(post['timestamp'])
         
         # Calculate volatility metrics
@@ -57,27 +242,32 @@ class VolatilityAnalyzer:
         
         return stable_periods
     
-    def _detect_crisis_patterns(self, emotions):
-        """Identify potential crisis indicators"""
-        crisis_indicators = []
-        
+    def _detect_crisis_patterns(self, emotions, window_size=None):
+        """Identify potential crisis indicators.
+
+        Returns one row per window start (``position``) whose mean is below
+        -0.4 and whose standard deviation is above 0.6; the window itself is
+        ``emotions[position:position + window_size]``.
+        """
+        window_size = window_size or self.crisis_window
+        emotions = np.asarray(emotions, dtype=np.float64)
+        if len(emotions) < window_size:
+            return pd.DataFrame(columns=self.CRISIS_COLUMNS)
+
         # Pattern: Sustained negative emotion + high local volatility
-        window_size = 5
-        for i in range(len(emotions) - window_size):
-            window = emotions[i:i+window_size]
-            avg_emotion = np.mean(window)
-            local_volatility = np.std(window)
-            
-            if avg_emotion < -0.4 and local_volatility > 0.6:
-                crisis_indicators.append({
-                    'type': 'sustained_negative_volatility',
-                    'position': i,
-                    'severity': abs(avg_emotion) * local_volatility,
-                    'window_emotions': window
-                })
-        
-        return crisis_indicators
-    
+        windows = sliding_window_view(emotions, window_size)
+        avg_emotion = windows.mean(axis=1)
+        local_volatility = windows.std(axis=1)
+        hits = np.flatnonzero((avg_emotion < -0.4) & (local_volatility > 0.6))
+
+        return pd.DataFrame({
+            "type": "sustained_negative_volatility",
+            "position": hits,
+            "severity": np.abs(avg_emotion[hits]) * local_volatility[hits],
+            "avg_emotion": avg_emotion[hits],
+            "local_volatility": local_volatility[hits],
+        }, columns=self.CRISIS_COLUMNS)
+
     def _calculate_overall_volatility(self, metrics):
         """Combine different volatility measures into single score"""
         # Normalize and weight different components
@@ -90,3 +280,4 @@ class VolatilityAnalyzer:
             swing_component * 0.3 +
             range_component * 0.3
         )
+        return overall_score